@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     run.py
+#
+"""Benchmark of Requirement.docx_to_XML and DocXML.docx_to_xml
+
+    python -m benchmarks.run [options]
+
+1. Synthetic documents are generated for each combination of --sections x --tables x --rows
+   (requirements documents) and --sections x --tables x --steps (test procedures)
+2. The bundled fixtures are added (0065-DRE_TDM_Firmware_Requirements-V0.8.docx and Template.docx)
+3. Each document is converted with each engine in a fresh process, which gives a meaningful peak RSS,
+   the wall time is the best of --repeat runs
+4. The results are saved as JSON (-o) and compared with a previous run (--compare), the exit status
+   is 1 when a case is slower than --max-slowdown times its baseline
+"""
+import argparse
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import synthetic
+from testlink_tools import docxstream
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, the peak RSS is not recorded
+    resource = None
+
+RESULTS_VERSION = 1
+KIND_REQUIREMENTS = "requirements"
+KIND_TESTCASES = "testcases"
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = (
+    ("fixture-0065-requirements", KIND_REQUIREMENTS,
+     os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx"),
+     {"reqid": "DRE-DMX-FW-REQ"}),
+    ("fixture-template-testcases", KIND_TESTCASES,
+     os.path.join(ROOT_DIR, "testcases", "test", "Template.docx"),
+     {}),
+)
+
+
+def peak_rss_kb():
+    """Peak resident set size of the current process in KiB, None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(task):
+    """Convert one document and return its measures, run in a fresh worker process
+
+    task is a (kind, filename, engine, options) tuple.
+    """
+    kind, filename, engine, options = task
+    from requirements.requirement import Requirement
+    from testcases.testcases import DocXML
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    if kind == KIND_REQUIREMENTS:
+        xml = Requirement(filename, options.get("reqid", synthetic.REQ_ID), engine=engine).docx_to_XML()
+        items = xml.count("<requirement>")
+    else:
+        xml = DocXML(filename, engine=engine).docx_to_xml()
+        items = xml.count("<testcase ")
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "baseline_rss_kb": baseline, "peak_rss_kb": peak_rss_kb(),
+            "output_bytes": len(xml.encode("utf-8")), "items": items}
+
+
+def run_isolated(task):
+    """Run measure(task) in a new spawned process"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(measure, task).result()
+
+
+def parse_sizes(text):
+    """Parse a comma separated list of positive integers"""
+    try:
+        sizes = [int(size) for size in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a comma separated list of integers: {0!r}".format(text))
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("the sizes must be positive: {0!r}".format(text))
+    return sizes
+
+
+def synthetic_cases(directory, sections, tables, rows, steps):
+    """Generate the synthetic documents in *directory*, return the (name, kind, filename, params) cases
+
+    A document already generated with the same parameters is reused.
+    """
+    cases = []
+    for nb_sections, nb_tables, nb_rows in itertools.product(sections, tables, rows):
+        name = "requirements-s{0}-t{1}-r{2}".format(nb_sections, nb_tables, nb_rows)
+        filename = os.path.join(directory, name + ".docx")
+        if not os.path.exists(filename):
+            synthetic.requirements_document(filename, nb_sections, nb_tables, nb_rows)
+        cases.append((name, KIND_REQUIREMENTS, filename,
+                      {"sections": nb_sections, "tables": nb_tables, "rows": nb_rows}))
+    for nb_sections, nb_tables, nb_steps in itertools.product(sections, tables, steps):
+        name = "testcases-s{0}-t{1}-st{2}".format(nb_sections, nb_tables, nb_steps)
+        filename = os.path.join(directory, name + ".docx")
+        if not os.path.exists(filename):
+            synthetic.procedure_document(filename, nb_sections, nb_tables, nb_steps)
+        cases.append((name, KIND_TESTCASES, filename,
+                      {"sections": nb_sections, "tables": nb_tables, "steps": nb_steps}))
+    return cases
+
+
+def run_case(name, kind, filename, params, engine, repeat, options=None):
+    """Measure one case *repeat* times, return its result record"""
+    options = options or {}
+    runs = [run_isolated((kind, filename, engine, options)) for _ in range(repeat)]
+    peaks = [run["peak_rss_kb"] for run in runs if run["peak_rss_kb"] is not None]
+    return {"name": name, "kind": kind, "engine": engine,
+            "source": "synthetic" if params else "fixture",
+            "document": os.path.basename(filename), "params": params,
+            "input_bytes": os.path.getsize(filename),
+            "seconds": min(run["seconds"] for run in runs),
+            "runs": [run["seconds"] for run in runs],
+            "baseline_rss_kb": runs[0]["baseline_rss_kb"],
+            "peak_rss_kb": max(peaks) if peaks else None,
+            "output_bytes": runs[0]["output_bytes"],
+            "items": runs[0]["items"]}
+
+
+def environment():
+    """Description of the machine and of the software of a run"""
+    return {"created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, stream=None, max_slowdown=None):
+    """Print the time and peak RSS ratios of *results* against *baseline*, return the regressed cases
+    """
+    if stream is None:
+        stream = sys.stdout
+    previous = {(record["name"], record["engine"]): record for record in baseline["results"]}
+    regressions = []
+    stream.write("{0:<36} {1:<6} {2:>9} {3:>9} {4:>7} {5:>7}\n".format(
+        "CASE", "ENGINE", "SECONDS", "BASELINE", "TIME", "RSS"))
+    for record in results:
+        old = previous.get((record["name"], record["engine"]))
+        if old is None:
+            continue
+        time_ratio = record["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        if record["peak_rss_kb"] and old["peak_rss_kb"]:
+            rss_ratio = "{0:>6.2f}x".format(record["peak_rss_kb"] / old["peak_rss_kb"])
+        else:
+            rss_ratio = "{0:>7}".format("-")
+        stream.write("{0:<36} {1:<6} {2:>9.3f} {3:>9.3f} {4:>6.2f}x {5}\n".format(
+            record["name"], record["engine"], record["seconds"], old["seconds"], time_ratio, rss_ratio))
+        if max_slowdown is not None and time_ratio > max_slowdown:
+            regressions.append(record)
+    return regressions
+
+
+def print_results(results, stream=None):
+    """Print the measures of each case"""
+    if stream is None:
+        stream = sys.stdout
+    stream.write("{0:<36} {1:<6} {2:>9} {3:>10} {4:>12} {5:>7}\n".format(
+        "CASE", "ENGINE", "SECONDS", "PEAK KiB", "OUTPUT", "ITEMS"))
+    for record in results:
+        stream.write("{0:<36} {1:<6} {2:>9.3f} {3:>10} {4:>12} {5:>7}\n".format(
+            record["name"], record["engine"], record["seconds"],
+            "-" if record["peak_rss_kb"] is None else record["peak_rss_kb"],
+            record["output_bytes"], record["items"]))
+
+
+def build_parser():
+    """Return the argument parser of the benchmark"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark of the docx to TestLink XML converters")
+    parser.add_argument("--sections", type=parse_sizes, default=[1, 10], help="Heading 2 chapters (default: 1,10)")
+    parser.add_argument("--tables", type=parse_sizes, default=[10, 50], help="tables per chapter (default: 10,50)")
+    parser.add_argument("--rows", type=parse_sizes, default=[5], help="rows per requirement table (default: 5)")
+    parser.add_argument("--steps", type=parse_sizes, default=[10], help="steps per test case (default: 10)")
+    parser.add_argument("-e", "--engine", action="append", choices=docxstream.ENGINES,
+                        help="engine to measure, may be repeated (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs of each case, the best time is kept (default: 3)")
+    parser.add_argument("--no-fixtures", action="store_true", help="do not measure the bundled fixtures")
+    parser.add_argument("--no-synthetic", action="store_true", help="do not measure the synthetic documents")
+    parser.add_argument("--work-dir", help="directory of the synthetic documents, kept between runs (default: temporary)")
+    parser.add_argument("-o", "--output", help="JSON file of the results")
+    parser.add_argument("--compare", metavar="JSON", help="results of a previous run to compare with")
+    parser.add_argument("--max-slowdown", type=float, metavar="FACTOR",
+                        help="exit with status 1 when a case is slower than FACTOR times its baseline")
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the benchmark, return the exit status"""
+    args = build_parser().parse_args(argv)
+    engines = args.engine or list(docxstream.ENGINES)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="testlink-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        cases = []
+        if not args.no_synthetic:
+            cases.extend((name, kind, filename, params, {})
+                         for name, kind, filename, params in
+                         synthetic_cases(work_dir, args.sections, args.tables, args.rows, args.steps))
+        if not args.no_fixtures:
+            cases.extend((name, kind, filename, {}, options) for name, kind, filename, options in FIXTURES)
+
+        results = []
+        for name, kind, filename, params, options in cases:
+            for engine in engines:
+                results.append(run_case(name, kind, filename, params, engine, args.repeat, options))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+    report = {"version": RESULTS_VERSION, "environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        sys.stdout.write("\n")
+        if compare(results, baseline, max_slowdown=args.max_slowdown):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     synthetic.py
+#
+"""Synthetic .docx documents with the layout expected by the converters
+
+Requirements document (Requirement):
+    Heading 2 "<n> requirements" chapters, a scope paragraph, then one table per requirement:
+    Title, Reference, Description, Type, Status and filler rows up to *rows* rows
+
+Test procedure (DocXML):
+    Heading 2 "Test Suite <n>" chapters, a details paragraph, then one table per test case:
+    the Heading 3 "Test case" name, a header, the preconditions, the step header,
+    *steps* step rows and the two result rows ignored by the converter
+"""
+import docx
+
+REQ_ID = "XIFU-DRE-DMX-FW-R"
+REQ_TYPES = ('Informational', 'Feature', 'Use Case', 'User Interface', 'Non Functional', 'Constraint', 'System Function')
+REQ_HEADERS = ("Title:", "Reference:", "Description:", "Type:", "Status:")
+REQ_FILLERS = ("Verification:", "Rationale:", "Parent:", "Comment:")
+TC_COLUMNS = 4
+TC_IGNORED_ROWS = 2
+
+
+def requirement_count(sections, tables):
+    """Number of requirements of a requirements document"""
+    return sections * tables
+
+
+def requirements_document(filename, sections, tables, rows=5, reqid=REQ_ID):
+    """Write a requirements document of *sections* chapters holding *tables* requirement tables of *rows* rows
+    """
+    if rows < len(REQ_HEADERS):
+        raise ValueError("a requirement table has at least {0} rows".format(len(REQ_HEADERS)))
+    document = docx.Document()
+    document.add_heading("Synthetic requirements", 1)
+    document.add_paragraph("Requirements generated for the benchmarks of the converters.")
+    number = 0
+    for section in range(1, sections + 1):
+        document.add_heading("{0} requirements".format(section), 2)
+        document.add_paragraph("Scope of the section {0}: requirements on the firmware & the <interfaces>.".format(section))
+        for _ in range(tables):
+            number += 1
+            values = ("Requirement {0}".format(number),
+                      "{0}-{1:04d}".format(reqid, number),
+                      "The firmware shall handle the case {0}.\nLimits: 0 < x < {0}".format(number),
+                      REQ_TYPES[number % len(REQ_TYPES)],
+                      "Valid" if number % 3 else "Draft")
+            table = document.add_table(rows=rows, cols=2)
+            for row in range(rows):
+                if row < len(values):
+                    header, value = REQ_HEADERS[row], values[row]
+                else:
+                    header = REQ_FILLERS[(row - len(values)) % len(REQ_FILLERS)]
+                    value = "Not used by the converter ({0})".format(row)
+                table.cell(row, 0).text = header
+                table.cell(row, 1).text = value
+            document.add_paragraph("")
+    document.save(filename)
+
+
+def testcase_count(sections, tables):
+    """Number of test cases of a test procedure"""
+    return sections * tables
+
+
+def procedure_document(filename, sections, tables, steps=5, reqid=None):
+    """Write a test procedure of *sections* Test Suites holding *tables* test case tables of *steps* steps
+
+    With a *reqid*, the preconditions of the test case N reference the requirement N of requirements_document.
+    """
+    document = docx.Document()
+    document.add_heading("Synthetic test procedure", 1)
+    number = 0
+    for section in range(1, sections + 1):
+        document.add_heading("Test Suite {0}: synthetic suite".format(section), 2)
+        document.add_paragraph("Details of the Test Suite {0}.".format(section))
+        document.add_paragraph("Set-up: bench <A> & bench <B>.")
+        for _ in range(tables):
+            number += 1
+            table = document.add_table(rows=4 + steps + TC_IGNORED_ROWS, cols=TC_COLUMNS)
+            name = table.cell(0, 0).merge(table.cell(0, TC_COLUMNS - 1))
+            name.paragraphs[0].text = "Test case {0}".format(number)
+            name.paragraphs[0].style = "Heading 3"
+            table.cell(1, 0).merge(table.cell(1, TC_COLUMNS - 1)).text = "Preconditions"
+            preconditions = "Power on the bench\nLoad the firmware"
+            if reqid is not None:
+                preconditions += "\nCovers {0}-{1:04d}".format(reqid, number)
+            table.cell(2, 0).merge(table.cell(2, TC_COLUMNS - 1)).text = preconditions
+            for column, header in enumerate(("Step", "Actions", "Expected results", "Result")):
+                table.cell(3, column).text = header
+            for step in range(steps):
+                row = 4 + step
+                table.cell(row, 0).text = str(step + 1)
+                table.cell(row, 1).text = "Send the command {0} to the test case {1}".format(step + 1, number)
+                table.cell(row, 2).text = "The answer is received\nStatus = OK"
+            table.cell(4 + steps, 0).merge(table.cell(4 + steps, TC_COLUMNS - 1)).text = "Result: OK / NOK"
+            table.cell(5 + steps, 0).merge(table.cell(5 + steps, TC_COLUMNS - 1)).text = "Comments:"
+            document.add_paragraph("")
+    document.save(filename)
@@ -0,0 +1,49 @@
+'''
+Tests of the synthetic documents and of the benchmark runner
+'''
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks import run, synthetic
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_synthetic_documents(self):
+
+        cases = run.synthetic_cases(self.tmpdir, [2], [3], [7], [4])
+        self.assertEqual([name for name, _, _, _ in cases], ["requirements-s2-t3-r7", "testcases-s2-t3-st4"])
+        for name, kind, filename, params in cases:
+            reference = run.measure((kind, filename, "docx", {}))
+            stream = run.measure((kind, filename, "stream", {}))
+            self.assertEqual(reference["items"], params["sections"] * params["tables"])
+            self.assertEqual(stream["output_bytes"], reference["output_bytes"])
+
+    def test_requirement_table_rows(self):
+
+        with self.assertRaises(ValueError):
+            synthetic.requirements_document(os.path.join(self.tmpdir, "short.docx"), 1, 1, rows=4)
+
+    def test_compare(self):
+
+        baseline = {"results": [{"name": "case", "engine": "stream", "seconds": 1.0, "peak_rss_kb": 100}]}
+        results = [{"name": "case", "engine": "stream", "seconds": 1.5, "peak_rss_kb": 100},
+                   {"name": "new", "engine": "stream", "seconds": 9.0, "peak_rss_kb": None}]
+        out = io.StringIO()
+        self.assertEqual(run.compare(results, baseline, out, max_slowdown=2.0), [])
+        self.assertEqual(run.compare(results, baseline, out, max_slowdown=1.2), results[:1])
+        self.assertIn("1.50x", out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
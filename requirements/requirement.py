@@ -18,13 +18,17 @@
 #
 #     requirement.py
 #
-from docx.opc.exceptions import PackageNotFoundError
-from docx.api import Document
-from docx.document import Document as _Document
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import _Cell, Table, _Row
-from docx.text.paragraph import Paragraph
+import hashlib
+import time
+
+from lxml import etree
+
+from testlink_tools import docxstream, model, spreadsheet, tablegrid, testlink_xml
+from testlink_tools.cache import split_sections
+from testlink_tools.parallel import EVENT_PARAGRAPH, EVENT_TABLE, map_sections
+from testlink_tools.profiling import NULL_PROFILE
+from testlink_tools.styleindex import StyleIndex
+from testlink_tools.xmlwriter import XMLWriter
 
 """This module manages the X-IFU/DRE requirements documents
 
@@ -34,29 +38,109 @@ from docx.text.paragraph import Paragraph
     the chapter header for requirements is of style = "Heading 2" and its title contains "requirements"
     every "requirement specification" contains one or more "requirement"
 3. Convert from WORD to XML for TestLink ==> docx_to_XML (DONE)
+    engine="docx" reads the document with python-docx (reference implementation)
+    engine="stream" streams word/document.xml with lxml, without the python-docx object graph
 
-4. Convert from WORD to EXCEL ==> .xlsx file (TODO)
-5. convert from EXCEL to CSV ==> .csv file (TODO)
-6. convert from CSV to XML ==> .xml file (TODO)
+4. Convert from WORD to EXCEL ==> write_xlsx (DONE)
+5. Convert from WORD to CSV ==> write_csv (DONE)
+6. Convert from EXCEL or CSV to XML ==> testlink_tools.spreadsheet.spreadsheet_to_xml, without python-docx (DONE)
 """
 
+class BlockReader(object):
+    """Read the paragraphs and tables of a requirements document into events, whatever the state of the scan
+
+    The reader is picklable, the worker processes of a parallel conversion use a copy of it.
+    """
+
+    def __init__(self, reqid, req_dict, type_dict, index):
+        """Constructor, index is the StyleIndex of the document
+        """
+        self.reqid = reqid
+        self.req_dict = req_dict
+        self.type_dict = type_dict
+        self.index = index
+
+    def is_heading(self, block):
+        """True if the block is a Heading 2 paragraph whose title contains "requirements"
+        """
+        return (isinstance(block, docxstream.block_types()[0])
+                and self.index.block_level(block) == 2 and block.text.lower().find('requirements') >= 0)
+
+    def grid_to_req(self, grid):
+        """Map the 2-D grid of a requirement table to a model.Requirement, None if the table is too small
+        """
+        if len(grid) < len(Requirement.XML_REQ_ROWS) or min(len(row) for row in grid) < 2:
+            return None
+        req_dict = dict(self.req_dict)
+        for tag, row in Requirement.XML_REQ_ROWS:
+            req_dict[tag] = grid[row][1]
+        # Search the value corresponding to the "Type" string
+        req_type = req_dict['type']
+        if req_type in self.type_dict:
+            req_dict['type'] = self.type_dict[req_type]
+        # Status is the first letter, keep the default one when the cell is empty
+        req_dict['status'] = req_dict['status'][:1] or self.req_dict['status']
+        return model.Requirement(**req_dict)
+
+    def read(self, block, profile=NULL_PROFILE):
+        """Return (EVENT_PARAGRAPH, is_heading, text), (EVENT_TABLE, model.Requirement or None) or None for other blocks
+        """
+        paragraphs, tables = docxstream.block_types()
+        if isinstance(block, paragraphs):
+            with profile.phase('classify'):
+                is_heading = self.is_heading(block)
+            return EVENT_PARAGRAPH, is_heading, block.text
+        if isinstance(block, tables):
+            # search for REQ table: one requirement per table holding the req ID
+            with profile.phase('tables'):
+                grid = tablegrid.snapshot(block)
+                requirement = None
+                if any(text.startswith(self.reqid) for row in grid for text in row):
+                    requirement = self.grid_to_req(grid)
+            return EVENT_TABLE, requirement
+        return None
+
+
 class Requirement(object):
     """Manage Word (docx) requirement files
     """
-    XML_DOC_START  = "<requirement-specification>"
-    XML_SPEC_START = "   <req_spec>"
-    XML_REQ_START  = "      <requirement>"
-    XML_REQ_STOP   = "      </requirement>"
-    XML_SPEC_STOP  = "   </req_spec>"
-    XML_DOC_STOP   = "</requirement-specification>"
-
-    def __init__(self, filename="", reqid="XIFU-DRE-DMX-FW-R", version="V1.0", level="SRS"):
+    XML_HEADER     = testlink_xml.XML_HEADER
+    XML_DOC_START  = testlink_xml.XML_REQ_DOC_START
+    XML_SPEC_START = testlink_xml.XML_SPEC_START
+    XML_REQ_START  = testlink_xml.XML_REQ_START
+    XML_REQ_STOP   = testlink_xml.XML_REQ_STOP
+    XML_SPEC_STOP  = testlink_xml.XML_SPEC_STOP
+    XML_DOC_STOP   = testlink_xml.XML_REQ_DOC_STOP
+
+    # bump when the generated XML changes, to invalidate the section cache
+    CACHE_VERSION = "3"
+
+    # rows of the second column of a requirement table holding the XML fields
+    XML_REQ_ROWS = (('title', 0), ('docid', 1), ('description', 2), ('type', 3), ('status', 4))
+
+    def __init__(self, filename="", reqid="XIFU-DRE-DMX-FW-R", version="V1.0", level="SRS", engine=docxstream.ENGINE_DOCX,
+                 coverage=None):
         """Constructor
+
+        coverage is an optional {docid: number of Test Cases} (see testlink_tools.traceindex.TraceIndex.coverage)
+        filling the expected_coverage of the requirements, 0 when not given.
         """
+        if engine not in docxstream.ENGINES:
+            raise ValueError("unknown engine {0}, expected one of {1}".format(engine, docxstream.ENGINES))
         self.filename = filename
+        self.engine = engine
         self.xml_reqid = reqid
-        self.xml_text = ['<?xml version="1.0" encoding="UTF-8"?>']
-        self.xml_text.append('<requirement-specification>')
+        self.coverage = coverage
+        self.writer = None
+        self.profile = NULL_PROFILE
+        self.delta = None
+        # the specifications read by parse(), None when they are written
+        self.specs = None
+        # delta export: header of the specification not written yet, and whether one is open
+        self.__pending_spec = None
+        self.__spec_open = False
+        # time spent opening the document, reported by the next profiled conversion
+        self.__open_seconds = 0.0
         
         # SPECIFICATION
         # type : 2=User Requirement Specification, 3 = System Requirement Specification
@@ -77,17 +161,14 @@ class Requirement(object):
         self.xml_type_tags =['Informational', 'Feature', 'Use Case', 'User Interface', 'Non Functional', 'Constraint', 'System Function']
         self.xml_type_vals =[1, 2, 3, 4, 5, 6, 7]
         self.xml_type_dict = dict(zip(self.xml_type_tags, self.xml_type_vals))
-        v = 'Use Case'
-        for key, value in self.xml_type_dict.items():
-            if (v == key):
-                print("valeur = ", value)
 
-        try:
-            self.document = Document(filename)
-            print("document", self.document)
-            
-        except (ValueError, PackageNotFoundError) as error:
-            print("ERROR {0} : {1}".format(type(error), error))
+        # the stream engine does not need the python-docx Document
+        if engine == docxstream.ENGINE_STREAM:
+            return
+        # a missing or unreadable file raises docx.opc.exceptions.PackageNotFoundError
+        start = time.perf_counter()
+        self.document = docxstream.open_document(filename)
+        self.__open_seconds = time.perf_counter() - start
 
     def __iter_block_items(self, parent):
         """From : https://stackoverflow.com/questions/29240707/python-docx-get-tables-from-paragraph
@@ -98,6 +179,13 @@ class Requirement(object):
         Document object, but also works for a _Cell object, which itself can
         contain paragraphs and tables.
         """
+        # python-docx is only imported by the "docx" engine
+        from docx.document import Document as _Document
+        from docx.oxml.table import CT_Tbl
+        from docx.oxml.text.paragraph import CT_P
+        from docx.table import _Cell, Table, _Row
+        from docx.text.paragraph import Paragraph
+
         if isinstance(parent, _Document):
             parent_elm = parent.element.body
         elif isinstance(parent, _Cell):
@@ -114,88 +202,255 @@ class Requirement(object):
                 yield Table(child, parent)
 
     def __spec_to_xml(self, title, spec_id, scope):
-        """Format a requirement specification to XML text
+        """Format a requirement specification to XML text (or keep it for parse)
         """
+        spec = model.ReqSpec(title, self.spec_doc_id + str(spec_id), scope=scope, **self.xml_spec_dict)
+        if self.specs is not None:
+            self.specs.append(spec)
+            return
+        writer = self.writer
+        # in a delta export the header is written before the first added or modified requirement
+        if self.delta is not None:
+            writer = XMLWriter()
         # Close the previous specification
-        if spec_id > 1:
-            self.xml_text.append(Requirement.XML_SPEC_STOP)
+        elif spec_id > 1:
+            writer.write('\n' + Requirement.XML_SPEC_STOP)
         
-        # start to fill the XML specification
-        self.xml_text.append('   <req_spec title=\"{0}\" doc_id=\"{1}\">'.format(title, self.spec_doc_id + str(spec_id)))
-        for tag, val in self.xml_spec_dict.items():
-            self.xml_text.append('      <{0}>{1}</{0}>'.format(tag, val))
-        # Add the scope which is the next paragraph after the heading
-        self.xml_text.append('      <{0}>{1}</{0}>'.format('scope', scope))
-
-    def __req_to_xml(self, req_dict):
-        """Format a requirement to XML text
-        """
-        self.xml_text.append(Requirement.XML_REQ_START)
-        for tag, val in req_dict.items():
-            self.xml_text.append('      <{0}>{1}</{0}>'.format(tag, val))
-        self.xml_text.append(Requirement.XML_REQ_STOP)
-
-    def docx_to_XML(self, document):
-        """Scan a .docx document to extract Paragraphs and Tables for "requirement specification" and "requirements"
+        testlink_xml.write_reqspec_start(spec, writer)
+        if self.delta is not None:
+            self.__pending_spec = writer.drain()
+
+    def __emit_req(self, requirement):
+        """Write a requirement (or keep it for parse), in a delta export only if it is added or modified since the previous import
         """
-        scope = ""
-        heading_title = ""
-        new_spec = False
-        spec_id = 0
-        
-        # One pass to read the word document and fill the XML values
-        for block in self.__iter_block_items(document):
-            # read Paragraph
-            if isinstance(block, Paragraph):
-                # pickup the title of the paragraph as requirement specification title
-                if block.style.name.lower().find("heading 2") >=0 and block.text.lower().find('requirements') >= 0:
-                    heading_title = block.text
-                    new_spec = True
+        if self.coverage is not None:
+            requirement.expected_coverage = self.coverage.get(requirement.docid, 0)
+        if self.specs is not None:
+            # the requirements before the first specification
+            if not self.specs:
+                self.specs.append(model.ReqSpec(None, None))
+            self.specs[-1].requirements.append(requirement)
+            return
+        if self.delta is None:
+            testlink_xml.write_requirement(requirement, self.writer)
+            return
+        scratch = XMLWriter()
+        testlink_xml.write_requirement(requirement, scratch)
+        fragment = scratch.drain()
+        if not self.delta.check(fragment):
+            return
+        if self.__pending_spec is not None:
+            if self.__spec_open:
+                self.writer.write('\n' + Requirement.XML_SPEC_STOP)
+            self.writer.write(self.__pending_spec)
+            self.__pending_spec = None
+            self.__spec_open = True
+        self.writer.write(fragment)
+
+    def __blocks(self, document, engine, raw, parallel):
+        """Return the paragraphs and tables of the document body with the selected engine, and the raw XML of the styles
+
+        With raw=True the stream engine keeps the XML of each block (for the cache), with raw=True or parallel=True
+        it leaves the tables serialized, read only by the workers or for the sections not found in the cache.
+        """
+        if engine is None:
+            engine = self.engine
+        if engine == docxstream.ENGINE_STREAM:
+            styles = docxstream.styles_xml(self.filename)
+            return docxstream.iter_block_items(self.filename, raw=raw, tables=not (raw or parallel)), styles
+        if engine != docxstream.ENGINE_DOCX:
+            raise ValueError("unknown engine {0}, expected one of {1}".format(engine, docxstream.ENGINES))
+        if document is None and hasattr(self, "document"):
+            document = self.document
+        elif document is None:
+            with self.profile.phase("open"):
+                document = docxstream.open_document(self.filename)
+        return self.__iter_block_items(document), etree.tostring(document.styles.element)
+
+    def __event_to_xml(self, event, state):
+        """Replay the event of one paragraph or table, state holds the scope, heading_title, new_spec and spec_id of the scan
+        """
+        profile = self.profile
+        profile.count('blocks')
+        if event is None:
+            return
+        # read Paragraph
+        if event[0] == EVENT_PARAGRAPH:
+            profile.count('paragraphs')
+            _, is_heading, text = event
+            # pickup the title of the paragraph as requirement specification title
+            if is_heading:
+                state['heading_title'] = text
+                state['new_spec'] = True
+            # append all lines between the header and the first table and build the scope
+            elif state['new_spec']:
+                state['scope'] = state['scope'] + text
+        # read table
+        else:
+            profile.count('tables')
+            _, requirement = event
+            # the scope paragraph is ending just before the first table
+            if state['new_spec']:
+                state['spec_id'] = state['spec_id'] + 1
+                with profile.phase('emit'):
+                    self.__spec_to_xml(state['heading_title'], state['spec_id'], state['scope'])
+                profile.count('specifications')
+                state['new_spec'] = False
+                state['scope'] = ""
+            if requirement is not None:
+                with profile.phase('emit'):
+                    self.__emit_req(requirement)
+                profile.count('requirements')
+
+    def __cache_salt(self, styles):
+        """Settings of the conversion which change the generated XML, part of every cache key
+        """
+        settings = [Requirement.CACHE_VERSION, self.xml_reqid, self.spec_doc_id,
+                    sorted(self.xml_spec_dict.items()), sorted(self.xml_req_dict.items()),
+                    sorted(self.xml_type_dict.items()), hashlib.sha256(styles).hexdigest()]
+        if self.coverage is not None:
+            settings.append(sorted(self.coverage.items()))
+        return repr(settings)
+
+    def __convert(self, writer, document, engine, cache, profile, delta, jobs):
+        """Write the XML text to writer, yield after each block (or each section taken from the cache or read by the workers)
+        """
+        if cache is not None and delta is not None:
+            raise ValueError("the section cache holds whole sections, it cannot be used for a delta export")
+        parallel = jobs is not None and jobs > 1
+        if parallel and cache is not None:
+            raise ValueError("the section cache cannot be used with jobs > 1")
+        state = {'scope': "", 'heading_title': "", 'new_spec': False, 'spec_id': 0}
+        self.profile = profile = profile if profile is not None else NULL_PROFILE
+        self.writer = writer
+        self.delta = delta
+        self.__pending_spec = None
+        self.__spec_open = False
+        profile.start(type(self).__name__, self.filename, engine or self.engine)
+        try:
+            profile.add('open', self.__open_seconds)
+            self.__open_seconds = 0.0
+            with profile.phase('open'):
+                blocks, styles = self.__blocks(document, engine, cache is not None, parallel)
+                salt = self.__cache_salt(styles) if cache is not None else ""
+                reader = BlockReader(self.xml_reqid, self.xml_req_dict, self.xml_type_dict, StyleIndex(styles))
+                stylesheet = docxstream.StyleSheet(styles or None)
+            writer.write(Requirement.XML_HEADER + '\n' + Requirement.XML_DOC_START)
+
+            # One pass to read the word document and fill the XML values, section by section
+            blocks = profile.iter_timed('parse', blocks)
+            sections = split_sections(blocks, profile.timed('classify', reader.is_heading))
+            if parallel:
+                # the sections are read by the workers, their events are replayed in document order
+                sections = map_sections(reader.read, stylesheet, sections, jobs)
+                for section, events in profile.iter_timed('workers', sections):
+                    profile.begin_section(section[0])
+                    section_start = writer.bytes_written
+                    with profile.phase('walk'):
+                        for event in events:
+                            self.__event_to_xml(event, state)
+                    profile.end_section(False, writer.bytes_written - section_start)
+                    yield
+                sections = ()
+            for section in sections:
+                profile.begin_section(section[0])
+                section_start = writer.bytes_written
+                if cache is None:
+                    for block in section:
+                        with profile.phase('walk'):
+                            self.__event_to_xml(reader.read(block, profile), state)
+                        yield
+                    profile.end_section(False, writer.bytes_written - section_start)
                     continue
-                else:
-                    # append all lines between the header and the first table and build the scope
-                    if new_spec:
-                        scope = scope + block.text
+                with profile.phase('cache'):
+                    key = cache.fingerprint(salt, state, section)
+                    entry = cache.get(key)
+                if entry is not None:
+                    writer.write(entry['xml'])
+                    state.update(entry['state'])
+                    profile.end_section(True, writer.bytes_written - section_start)
+                    yield
                     continue
-                # read table
-            elif isinstance(block, Table):
-                # the scope paragraph is ending just before the first table
-                if new_spec:
-                    spec_id = spec_id + 1
-                    self.__spec_to_xml(heading_title, spec_id, scope)
-                    new_spec = False
-                    scope = ""
-                # search for REQ table
-                table = block
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.find(self.xml_reqid):
-                            continue
-                        else:
-                            print("cell text=", cell.text)
-                            for j, col in enumerate(table.columns):        
-                                if j == 1:
-                                    # for XML conversion: < and > are not allowed in text
-                                    content = (cell.text.replace('<', 'lt').replace('>', 'gt') for cell in col.cells)
-                                    l = list(content)
-                                    # rearrange items from docx Document to XML for TestLink
-                                    self.xml_req_vals[1] = l[0] # Title
-                                    self.xml_req_vals[0] = l[1] # Reference REQ_ID
-                                    self.xml_req_vals[5] = l[2] # Description
-                                    self.xml_req_vals[7] = l[3] # Type
-                                    self.xml_req_vals[6] = str(l[4])[0] # Status
-                                    # Search the value corresponding to the "Type" string
-                                    for key, value in self.xml_type_dict.items():
-                                        if (l[3] == key):                  
-                                            print("valeur = ", value)
-                                            self.xml_req_vals[7] = value
-                                    
-                                    req_dict = dict(zip(self.xml_req_tags, self.xml_req_vals))
-                                    self.__req_to_xml(req_dict)
-
-        # build the full XML text
-        full_xml_text = '\n'.join(self.xml_text) + '\n' + Requirement.XML_SPEC_STOP +  '\n' + Requirement.XML_DOC_STOP
-        return full_xml_text
+                writer.begin_capture()
+                for block in section:
+                    with profile.phase('walk'):
+                        self.__event_to_xml(reader.read(docxstream.attach(block, stylesheet), profile), state)
+                    yield
+                with profile.phase('cache'):
+                    cache.put(key, {'xml': writer.end_capture(), 'state': state})
+                profile.end_section(False, writer.bytes_written - section_start)
+
+            if delta is None or self.__spec_open:
+                writer.write('\n' + Requirement.XML_SPEC_STOP)
+            writer.write('\n' + Requirement.XML_DOC_STOP)
+            profile.count('bytes_written', writer.bytes_written)
+            yield
+        finally:
+            profile.stop()
+            self.writer = None
+            self.profile = NULL_PROFILE
+            self.delta = None
+
+    def parse(self, document=None, engine=None, profile=None, jobs=None):
+        """Scan a .docx document into the intermediate model, return the list of testlink_tools.model.ReqSpec
+
+        The requirements found before the first specification are kept in a first ReqSpec whose doc_id is None.
+        testlink_tools.testlink_xml.write_requirements writes them as docx_to_XML, the other arguments are the same.
+        """
+        self.specs = specs = []
+        writer = XMLWriter()
+        try:
+            for _ in self.__convert(writer, document, engine, None, profile, None, jobs):
+                writer.drain()
+        finally:
+            self.specs = None
+        return specs
+
+    def iter_XML(self, document=None, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """Generate the XML text piece by piece while the document is scanned, same arguments as docx_to_XML
+        """
+        writer = XMLWriter()
+        for _ in self.__convert(writer, document, engine, cache, profile, delta, jobs):
+            text = writer.drain()
+            if text:
+                yield text
+
+    def write_XML(self, out, document=None, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """Write the XML text to the file handle out while the document is scanned, return the number of bytes written (UTF-8)
+        """
+        writer = XMLWriter(out)
+        for _ in self.__convert(writer, document, engine, cache, profile, delta, jobs):
+            pass
+        return writer.bytes_written
+
+    def docx_to_XML(self, document=None, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """Scan a .docx document to extract Paragraphs and Tables for "requirement specification" and "requirements"
+
+        engine overrides the engine given to the constructor, document is only used by the "docx" engine.
+        cache is an optional testlink_tools.cache.SectionCache, the XML of the unchanged
+        "requirements" sections is then taken from the cache.
+        profile is an optional testlink_tools.profiling.Profile recording the timings and counters of the conversion.
+        delta is an optional testlink_tools.delta.Delta, only the requirements added or modified since the previous
+        import are then written (it cannot be combined with the cache).
+        jobs > 1 reads the "requirements" sections in that many worker processes, the XML is the same
+        (it cannot be combined with the cache).
+        Return the full XML text, see write_XML and iter_XML to stream it instead.
+        """
+        return ''.join(self.iter_XML(document, engine, cache, profile, delta, jobs))
+
+    def write_xlsx(self, filename, document=None, engine=None, jobs=None):
+        """Write the requirements to an .xlsx file, one row per requirement (see testlink_tools.spreadsheet)
+
+        Return the number of requirements written.
+        """
+        return spreadsheet.write_xlsx(self.parse(document, engine, jobs=jobs), filename)
+
+    def write_csv(self, filename, document=None, engine=None, jobs=None):
+        """Write the requirements to a .csv file, one row per requirement (see testlink_tools.spreadsheet)
+
+        Return the number of requirements written.
+        """
+        return spreadsheet.write_csv(self.parse(document, engine, jobs=jobs), filename)
 
 if __name__ == '__main__':
     """main method to test this script as a unit test.
@@ -216,13 +471,8 @@ if __name__ == '__main__':
         requirement = Requirement(filename, docid, "V0.8", typespec)
         xml = requirement.docx_to_XML(requirement.document)
     
-        print("XML================\n", xml)
-    
         f = open("result.xml", 'w', encoding='utf-8')
         f.write(xml)
         f.close()
     except:
         print("Please choose a valid .docx file...")
-        
-else:
-    print("Importing...", __name__)
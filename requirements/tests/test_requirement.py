@@ -3,19 +3,74 @@ Created on 24 juin 2021
 
 @author: Odile
 '''
+import os
+import shutil
+import tempfile
 import unittest
 from docx.document import Document
 
 from requirements.requirement import Requirement
+from testlink_tools.cache import SectionCache
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+REQ_DOCX = os.path.join(DATA_DIR, "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
 
 class TestRequirement(unittest.TestCase):
 
 
     def test_requirement_constructor(self):
         
-        req = Requirement("D:/MYCORE_OCJ/S.O.F.T.S/ATHENA/PYTHON/requirements/data/0065-Requirements.docx", "V3.0", "User")
+        req = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V3.0", "USR")
         self.assertIsInstance(req.document, Document)
 
+    def test_stream_engine_is_byte_identical(self):
+
+        req = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8")
+        reference = req.docx_to_XML(req.document)
+        # the comparison covers the requirement tables
+        self.assertEqual(reference.count("<requirement>"), 59)
+        stream = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream").docx_to_XML()
+        self.assertEqual(stream, reference)
+
+    def test_requirement_tables(self):
+
+        req = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream")
+        xml = req.docx_to_XML()
+        self.assertEqual(xml.count("<requirement>"), 59)
+        self.assertEqual(xml.count("<docid>DRE-DMX-FW-REQ-0010</docid>"), 1)
+        self.assertIn("<title>Host FPGA</title>", xml)
+
+    def test_section_cache(self):
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            reference = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream").docx_to_XML()
+            first = SectionCache(tmpdir)
+            self.assertEqual(Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream").docx_to_XML(cache=first), reference)
+            second = SectionCache(tmpdir)
+            self.assertEqual(Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream").docx_to_XML(cache=second), reference)
+            self.assertEqual((second.hits, second.misses), (first.misses, 0))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_parallel_sections(self):
+
+        reference = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8").docx_to_XML()
+        for engine in ("docx", "stream"):
+            req = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine=engine)
+            self.assertEqual(req.docx_to_XML(jobs=3), reference)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            with self.assertRaises(ValueError):
+                req.docx_to_XML(cache=SectionCache(tmpdir), jobs=2)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_unknown_engine(self):
+
+        with self.assertRaises(ValueError):
+            Requirement(REQ_DOCX, engine="sax")
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
-    unittest.main()
\ No newline at end of file
+    unittest.main()
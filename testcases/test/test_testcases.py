@@ -0,0 +1,28 @@
+'''
+Tests of the test procedure converter
+'''
+import os
+import unittest
+
+from testcases.testcases import DocXML
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DOCX = os.path.join(DATA_DIR, "Template.docx")
+
+class TestDocXML(unittest.TestCase):
+
+
+    def test_stream_engine_is_byte_identical(self):
+
+        reference = DocXML(TEMPLATE_DOCX).docx_to_xml()
+        stream = DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml()
+        self.assertEqual(stream, reference)
+
+    def test_parallel_sections(self):
+
+        reference = DocXML(TEMPLATE_DOCX).docx_to_xml()
+        for engine in ("docx", "stream"):
+            self.assertEqual(DocXML(TEMPLATE_DOCX, engine=engine).docx_to_xml(jobs=2), reference)
+
+if __name__ == "__main__":
+    unittest.main()
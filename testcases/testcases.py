@@ -19,13 +19,21 @@
 #     testcasev1.py
 #
 
-from docx.opc.exceptions import PackageNotFoundError
-from docx.api import Document # function to open a docx file
-from docx.document import Document as _Document # Document object (created with Document function)
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.table import _Cell, Table, _Row
-from docx.text.paragraph import Paragraph
+import hashlib
+import logging
+import time
+
+from lxml import etree
+
+from testlink_tools import docxstream
+from testlink_tools.cache import split_sections
+from testlink_tools.parallel import EVENT_PARAGRAPH, EVENT_TABLE, map_sections
+from testlink_tools.profiling import NULL_PROFILE
+from testlink_tools.styleindex import StyleIndex
+from testlink_tools.tablelayout import TableLayout
+from testlink_tools import testlink_xml
+from testlink_tools.model import Step, TestCase, TestSuite
+from testlink_tools.xmlwriter import XMLWriter, escape
 
 """This module manages the X-IFU/DRE test procedures documents
 
@@ -35,149 +43,121 @@ from docx.text.paragraph import Paragraph
     each sub-chapter (style = "Heading 2") corresponds to a "Test Suite" for TestLink
     every "Test Suite" contains one or more "Test Case"
 3. Convert from WORD to XML for TestLink ==> docx_to_XML (DONE)
+    engine="docx" reads the document with python-docx (reference implementation)
+    engine="stream" streams word/document.xml with lxml, without the python-docx object graph
 """
 
-class TestSuite:
-    """ Manage Test Suite sections of the test procedure """
-
-    XML_TS_START = '<testsuite name="{}"> \n'
-    XML_TS_STOP = '</testsuite>'
-
-    def __init__(self,name,details,num_ts,tc_list):
-        """ Constructor """
-        self.name = name
-        self.details = details
-        self.order = num_ts
-        self.tc_list = tc_list
-        self.xml_text =""
-
-    def to_xml(self):
-        """ generates the equivalent xml text of the Test Suite """ 
-
-        self.xml_text += TestSuite.XML_TS_START.format(self.name)
-        self.xml_text += "<node_order><![CDATA[{}]]></node_order> \n".format(self.order)
-        self.xml_text += "<details><![CDATA[{}]]></details> \n".format(self.details)
-        
-        # Generates the xml text of the Test Cases in the Test Suite"
-        for testcase in self.tc_list:
-            self.xml_text += testcase.to_xml()
-        self.xml_text += TestSuite.XML_TS_STOP
-        return self.xml_text
-
-
-class TestCase :
-    """ Manage Test Cases of the test procedure """
-
-    XML_TC_START = '<testcase name="{}"> \n'
-    XML_TC_STOP = "</testcase>"
-    XML_STEP_START = "<step> \n"
-    XML_STEP_STOP = "</step> \n"
-
-    def __init__(self,table,num_tc):
-        """ Constructor """
-
-        self.table = table
-        self.xml_text = ""
-        self.xml_tags = ['node_order','preconditions','steps']
-        self.xml_vals = [num_tc,"",""]
-        self.xml_dict = dict(zip(self.xml_tags,self.xml_vals))
-        
-    def to_xml(self):
-        """ generates the equivalent xml text of the Test Case """
-
-        nb_row = 0
-        step_counter = 0
-
-        # read the table row by row
-        for row in self.table.rows:
-            
-            nb_cell = 0
-            nb_row += 1
-
-            # row 2 and 4 are ignored
-            if nb_row == 2 or nb_row == 4: 
-                continue
-            # the last two rows are ignored
-            if nb_row == len(self.table.rows) - 1:
-                break
-
-            # read the cells of each row
-            for cell in row.cells:
-                nb_cell +=1
-                cell_txt =""
-                # pickup the name
-                if nb_row == 1:
-                    self.xml_text += TestCase.XML_TC_START.format(cell.text)
-                    break
-                # pickup preconditions
-                elif nb_row == 3:
-                    # manage the line breaks
-                    for para in cell.paragraphs:
-                        if para.text != "":
-                            cell_txt += '<p>' + para.text + '</p>' +'\n'
-                    self.xml_dict["preconditions"] = "<![CDATA[{}]]>".format(cell_txt)
-                    break
-                # read the steps section of the Test case
-                else:
-                    # add the step number
-                    if nb_cell == 1 :
-                        self.xml_dict["steps"] += TestCase.XML_STEP_START
-                        step_counter += 1
-                        self.xml_dict["steps"] += "<{0}> {1} </{0}> \n".format("step_number",step_counter)
-                    # pickup actions
-                    elif nb_cell == 2 :
-                        # manage the line breaks
-                        for para in cell.paragraphs:
-                            if para.text != "":
-                                cell_txt +='<p>' + para.text + '</p>' +'\n'
-                        self.xml_dict["steps"] += "<{0}> <![CDATA[{1}]]> </{0}> \n".format("actions",cell_txt + '\n')
-                    # pickup expected results
-                    elif nb_cell == 3:
-                        # manage the line breaks
-                        for para in cell.paragraphs:
-                            if para.text != "":
-                                cell_txt += '<p>' + para.text + '</p>' +'\n'
-                        self.xml_dict["steps"] += "<{0}> <![CDATA[{1}]]> </{0}> \n".format("expectedresults",cell_txt + '\n')
-                        self.xml_dict["steps"] += TestCase.XML_STEP_STOP
-                        # the other cells of a step row are ignored
-                        break    
-        
-        # Add a general step to the Test Case (not in the docx file)
-        self.xml_dict["steps"] += TestCase.XML_STEP_START
-        self.xml_dict["steps"] += "<{0}> {1} </{0}> \n".format("step_number",step_counter+1)
-        self.xml_dict["steps"] += "<{0}> <![CDATA[{1}]]> </{0}> \n".format("actions", "Lister les participants au test" + '\n')
-        self.xml_dict["steps"] += "<{0}> <![CDATA[{1}]]> </{0}> \n".format("expectedresults", "" + '\n')
-        self.xml_dict["steps"] += TestCase.XML_STEP_STOP
-
-        # generates the xml text of the Test Case
-        for tag,val in self.xml_dict.items():
-            self.xml_text +=  "<{0}> {1} </{0}> \n".format(tag,val)
-        self.xml_text += TestCase.XML_TC_STOP
-        return self.xml_text
+_LOG = logging.getLogger(__name__)
+
+# layout of the tables of testcases/test/Template.docx
+DEFAULT_LAYOUT = TableLayout()
+
+
+def paragraphs_to_html(paragraphs):
+    """ html text of the non empty paragraphs of a cell, one <p> per paragraph to manage the line breaks """
+    return "".join('<p>' + escape(para.text) + '</p>' +'\n' for para in paragraphs if para.text != "")
+
+
+def read_testcase(table, layout=DEFAULT_LAYOUT):
+    """ Read a Test Case table into a TestCase of the model, the node_order is set by the caller
+
+    The cells of the name, the preconditions and the steps (actions, expected results) are found by the
+    testlink_tools.tablelayout.TableLayout *layout*: in the Template, row 1 holds the name, row 3 the preconditions,
+    the following rows the steps, rows 2 and 4 and the last two rows are ignored.
+    Return None, with a logged warning, when the table has no name cell. """
+
+    name, preconditions, steps = layout.read(table)
+    if name is None:
+        # a Test Case without a name cannot be imported, TestLink needs <testcase name="...">
+        _LOG.warning("Test Case table without a name cell at %s, skipped", layout.name)
+        return None
+    testcase = TestCase(name.text)
+    if preconditions is not None:
+        testcase.preconditions = paragraphs_to_html(preconditions.paragraphs)
+    for actions, expectedresults in steps:
+        testcase.steps.append(Step(len(testcase.steps) + 1,
+                                   paragraphs_to_html(actions.paragraphs) if actions is not None else None,
+                                   paragraphs_to_html(expectedresults.paragraphs) if expectedresults is not None else None))
+
+    # Add a general step to the Test Case (not in the docx file)
+    testcase.steps.append(Step(len(testcase.steps) + 1, "Lister les participants au test", ""))
+    return testcase
+
+
+class BlockReader:
+    """ Read the paragraphs and tables of a test procedure into events, whatever the Test Suite being read
+
+    The reader is picklable, the worker processes of a parallel conversion use a copy of it. """
+
+    def __init__(self, index, layout=DEFAULT_LAYOUT):
+        """ Constructor, index is the StyleIndex of the document, layout the TableLayout of the Test Case tables """
+        self.index = index
+        self.layout = layout
+
+    def is_heading(self, block):
+        """ True if the block is a Heading 2 paragraph whose title contains "Test Suite" """
+        return (isinstance(block, docxstream.block_types()[0])
+                and self.index.block_level(block) == 2 and block.text.lower().find("test suite") >= 0)
+
+    def read(self, block, profile=NULL_PROFILE):
+        """ Read one paragraph or table, the tables of the Test Cases are read into the model and not kept
+
+        Return (EVENT_PARAGRAPH, is_heading, text), (EVENT_TABLE, TestCase or None) or None for other blocks,
+        the node_order of the TestCase is set when the event is replayed """
+        paragraphs, tables = docxstream.block_types()
+        if isinstance(block, paragraphs):
+            with profile.phase("classify"):
+                is_heading = self.is_heading(block)
+            return EVENT_PARAGRAPH, is_heading, block.text
+        if isinstance(block, tables):
+            # find a new Test case (a "Test case" Heading 3 in the first cell) and pickup the corresponding table 
+            with profile.phase("tables"):
+                first = block.cell(0,0)
+                is_tc = first.text.lower().find("test case") >= 0 and self.index.block_level(first.paragraphs[0]) == 3
+                testcase = read_testcase(block, self.layout) if is_tc else None
+            return EVENT_TABLE, testcase
+        return None
 
                            
 class DocXML:
     """ Manage Word (docx) test procedure file """ 
 
-    XML_DOC_START = """<?xml version="1.0" encoding="UTF-8"?>
-    <testsuite id="" name="" >
-    <node_order><![CDATA[]]>
-    </node_order><details>
-    <![CDATA[]]></details>"""
-    XML_DOC_STOP = "</testsuite>"
+    XML_DOC_START = testlink_xml.XML_TS_DOC_START
+    XML_DOC_STOP = testlink_xml.XML_TS_DOC_STOP
 
-    def __init__(self,filename):
-        """ Constructor """
+    # bump when the generated xml changes, to invalidate the section cache
+    CACHE_VERSION = "3"
 
-        try:
-            self.doc = Document(filename)
-            print("document", self.doc)
-            
-        except (ValueError, PackageNotFoundError) as error:
-            print("ERROR {0} : {1}".format(type(error), error))
+    def __init__(self,filename,engine=docxstream.ENGINE_DOCX,layout=None):
+        """ Constructor
 
-        self.xml_text = DocXML.XML_DOC_START
-        self.ts_list = []
+        layout gives the regions of the Test Case tables: a testlink_tools.tablelayout.TableLayout, a layout dict,
+        or a template .docx whose first Test Case table is the model (default: the layout of the Template) """
+
+        if engine not in docxstream.ENGINES:
+            raise ValueError("unknown engine {0}, expected one of {1}".format(engine, docxstream.ENGINES))
+        self.filename = filename
+        self.engine = engine
+        if layout is None or isinstance(layout, TableLayout):
+            self.layout = layout or DEFAULT_LAYOUT
+        elif isinstance(layout, dict):
+            self.layout = TableLayout(layout)
+        else:
+            self.layout = TableLayout.from_template(layout)
+        self.writer = None
+        self.profile = NULL_PROFILE
+        self.delta = None
+        # the Test Suites read by parse(), None when they are written
+        self.testsuites = None
+        # time spent opening the document, reported by the next profiled conversion
+        self.__open_seconds = 0.0
+
+        # the stream engine does not need the python-docx Document
+        if engine == docxstream.ENGINE_DOCX:
+            # a missing or unreadable file raises docx.opc.exceptions.PackageNotFoundError
+            start = time.perf_counter()
+            self.doc = docxstream.open_document(filename)
+            self.__open_seconds = time.perf_counter() - start
 
     def __iter_block_items(self, parent):
         """From : https://stackoverflow.com/questions/29240707/python-docx-get-tables-from-paragraph
@@ -188,6 +168,13 @@ class DocXML:
         Document object, but also works for a _Cell object, which itself can
         contain paragraphs and tables.
         """
+        # python-docx is only imported by the "docx" engine
+        from docx.document import Document as _Document
+        from docx.oxml.table import CT_Tbl
+        from docx.oxml.text.paragraph import CT_P
+        from docx.table import _Cell, Table, _Row
+        from docx.text.paragraph import Paragraph
+
         if isinstance(parent, _Document):
             parent_elm = parent.element.body
         elif isinstance(parent, _Cell):
@@ -203,56 +190,231 @@ class DocXML:
             elif isinstance(child, CT_Tbl):
                 yield Table(child, parent)
 
-    def docx_to_xml(self):
-        """ Scan a docx document to extract Paragraphs and Tables for "Test Suites" and "Test Cases" and generates the full xml text"""
-
-        new_ts = False
-        details_ts =""
-        name_ts= ""
-        tc_list = []
-        TS_counter = 0
-        TC_counter = 0
-
-        # one pass to read the word document and pickup the Test Suites and Test Cases informations
-        for block in self.__iter_block_items(self.doc):
-            # read paragraphs
-            if isinstance(block, Paragraph):
-                # find a new Test Suite and pickup the title as Test Suite name
-                if block.style.name.lower().find("heading 2") >=0 and block.text.lower().find("test suite") >= 0 :
-
-                    # if a new Test Suite is find, add the previous one to the list and reset the informations
-                    if new_ts == False and TS_counter > 0:
-                        self.ts_list.append(TestSuite(name_ts, details_ts,TS_counter,tc_list))
-                        name_ts = ""
-                        details_ts = ""
-                        tc_list = []
-                    
-                    # pickup the title
-                    new_ts = True
-                    TS_counter +=1
-                    name_ts = block.text
-                
-                # if a Test Suite is open pickup the following text as details 
-                elif new_ts and block.text !="":
-                    details_ts += '<p>' + block.text + '</p>' +'\n'
-            # read table
-            elif isinstance(block, Table):
-                # find a new Test case and pickup the corresponding table 
-                if block.cell(0,0).text.lower().find("test case") >= 0 and block.cell(0,0).paragraphs[0].style.name.lower().find("heading 3") >= 0:
-                    
-                    # details of the Test Suite is frozen and pickup the table
-                    new_ts = False
-                    TC_counter += 1
-                    tc_list.append(TestCase(block,TC_counter))
-
-        # add the last Test Suite to the list
-        self.ts_list.append(TestSuite(name_ts, details_ts,TS_counter,tc_list))
-    
-        # generates the full xml text
-        for testsuite in self.ts_list:
-            self.xml_text += testsuite.to_xml()
-        self.xml_text += DocXML.XML_DOC_STOP
-        return self.xml_text    
+    def __blocks(self, engine, raw, parallel):
+        """ Return the paragraphs and tables of the document body with the selected engine, and the raw XML of the styles
+
+        With raw=True the stream engine keeps the XML of each block (for the cache), with raw=True or parallel=True
+        it leaves the tables serialized, read only by the workers or for the sections not found in the cache. """
+        if engine is None:
+            engine = self.engine
+        if engine == docxstream.ENGINE_STREAM:
+            styles = docxstream.styles_xml(self.filename)
+            return docxstream.iter_block_items(self.filename, raw=raw, tables=not (raw or parallel)), styles
+        if engine != docxstream.ENGINE_DOCX:
+            raise ValueError("unknown engine {0}, expected one of {1}".format(engine, docxstream.ENGINES))
+        if not hasattr(self, "doc"):
+            with self.profile.phase("open"):
+                self.doc = docxstream.open_document(self.filename)
+        return self.__iter_block_items(self.doc), etree.tostring(self.doc.styles.element)
+
+    def __event_to_ts(self, event, state):
+        """ Replay the event of one paragraph or table, state holds the Test Suite being read and the counters """
+        profile = self.profile
+        profile.count("blocks")
+        if event is None:
+            return
+        # read paragraphs
+        if event[0] == EVENT_PARAGRAPH:
+            profile.count("paragraphs")
+            _, is_heading, text = event
+            # find a new Test Suite and pickup the title as Test Suite name
+            if is_heading:
+                # pickup the title (the previous Test Suite is added by __flush at the end of its section)
+                state["new_ts"] = True
+                state["TS_counter"] +=1
+                state["name_ts"] = text
+
+            # if a Test Suite is open pickup the following text as details 
+            elif state["new_ts"] and text !="":
+                state["details_ts"] += '<p>' + escape(text) + '</p>' +'\n'
+        # read table
+        else:
+            profile.count("tables")
+            _, testcase = event
+            if testcase is not None:
+                # details of the Test Suite is frozen and pickup the Test Case
+                state["new_ts"] = False
+                state["TC_counter"] += 1
+                testcase.node_order = state["TC_counter"]
+                state["tc_list"].append(testcase)
+
+    def __flush(self, state, last):
+        """ Write (or keep for parse) the Test Suite being read and reset the informations, return True if written
+
+        Before a new Test Suite the previous one is written only if it has been closed by a Test Case,
+        the last Test Suite is always written. """
+        if not last and (state["new_ts"] or state["TS_counter"] == 0):
+            return False
+        with self.profile.phase("emit"):
+            testsuite = TestSuite(state["name_ts"], state["details_ts"], state["TS_counter"], state["tc_list"])
+            if self.testsuites is not None:
+                self.testsuites.append(testsuite)
+            elif self.delta is None:
+                testlink_xml.write_testsuite(testsuite, self.writer)
+            else:
+                self.__delta_to_xml(testsuite)
+        self.profile.count("test_suites")
+        self.profile.count("test_cases", len(state["tc_list"]))
+        self.profile.count("steps", sum(len(tc.steps) for tc in state["tc_list"]))
+        state["name_ts"] = ""
+        state["details_ts"] = ""
+        state["tc_list"] = []
+        return True
+
+    def __delta_to_xml(self, testsuite):
+        """ Write the Test Suite with its added or modified Test Cases, if it or one of them changed since the previous import """
+        scratch = XMLWriter()
+        testlink_xml.write_testsuite_start(testsuite, scratch)
+        start = scratch.drain()
+        changed = self.delta.check(start + testlink_xml.XML_TS_STOP)
+        testcases = []
+        # every Test Case is checked, to record it in the manifest
+        for testcase in testsuite.testcases:
+            fragment = testlink_xml.testcase_xml(testcase)
+            if self.delta.check(fragment, testsuite.name):
+                testcases.append(fragment)
+        if changed or testcases:
+            self.writer.write(start)
+            for fragment in testcases:
+                self.writer.write(fragment)
+            self.writer.write(testlink_xml.XML_TS_STOP)
+
+    def __cache_salt(self, styles):
+        """ Settings of the conversion which change the generated xml, part of every cache key """
+        salt = [DocXML.CACHE_VERSION, hashlib.sha256(styles).hexdigest()]
+        if self.layout != DEFAULT_LAYOUT:
+            salt.append(self.layout.key())
+        return repr(salt)
+
+    def __convert(self, writer, engine, cache, profile, delta, jobs):
+        """ Write the xml text to writer, yield after each block (or each section taken from the cache or read by the workers) """
+
+        if cache is not None and delta is not None:
+            raise ValueError("the section cache holds whole sections, it cannot be used for a delta export")
+        parallel = jobs is not None and jobs > 1
+        if parallel and cache is not None:
+            raise ValueError("the section cache cannot be used with jobs > 1")
+        state = {"new_ts": False, "details_ts": "", "name_ts": "", "tc_list": [], "TS_counter": 0, "TC_counter": 0}
+        flushed = False
+        self.profile = profile = profile if profile is not None else NULL_PROFILE
+        self.writer = writer
+        self.delta = delta
+        profile.start(type(self).__name__, self.filename, engine or self.engine)
+        try:
+            profile.add("open", self.__open_seconds)
+            self.__open_seconds = 0.0
+            with profile.phase("open"):
+                blocks, styles = self.__blocks(engine, cache is not None, parallel)
+                salt = self.__cache_salt(styles) if cache is not None else ""
+                reader = BlockReader(StyleIndex(styles), self.layout)
+                stylesheet = docxstream.StyleSheet(styles or None)
+            writer.write(DocXML.XML_DOC_START)
+
+            # one pass to read the word document and pickup the Test Suites and Test Cases informations, section by section
+            blocks = profile.iter_timed("parse", blocks)
+            sections = split_sections(blocks, profile.timed("classify", reader.is_heading))
+            if parallel:
+                # the sections are read by the workers, their events are replayed in document order
+                sections = map_sections(reader.read, stylesheet, sections, jobs)
+                for section, events in profile.iter_timed("workers", sections):
+                    profile.begin_section(section[0])
+                    section_start = writer.bytes_written
+                    with profile.phase("walk"):
+                        for event in events:
+                            self.__event_to_ts(event, state)
+                    flushed = self.__flush(state, False)
+                    profile.end_section(False, writer.bytes_written - section_start)
+                    yield
+                sections = ()
+            for section in sections:
+                profile.begin_section(section[0])
+                section_start = writer.bytes_written
+                # the Test Cases still pending (before the first Test Suite) are not cached
+                cacheable = cache is not None and not state["tc_list"]
+                if cacheable:
+                    with profile.phase("cache"):
+                        key = cache.fingerprint(salt, {k: v for k, v in state.items() if k != "tc_list"}, section)
+                        entry = cache.get(key)
+                    if entry is not None:
+                        writer.write(entry["xml"])
+                        state.update(entry["state"])
+                        state["tc_list"] = []
+                        flushed = entry["flushed"]
+                        profile.end_section(True, writer.bytes_written - section_start)
+                        yield
+                        continue
+                    writer.begin_capture()
+
+                for block in section:
+                    with profile.phase("walk"):
+                        self.__event_to_ts(reader.read(docxstream.attach(block, stylesheet), profile), state)
+                    yield
+                flushed = self.__flush(state, False)
+
+                if cacheable:
+                    xml = writer.end_capture()
+                    if not state["tc_list"]:
+                        with profile.phase("cache"):
+                            cache.put(key, {"xml": xml, "flushed": flushed,
+                                            "state": {k: v for k, v in state.items() if k != "tc_list"}})
+                profile.end_section(False, writer.bytes_written - section_start)
+                yield
+
+            # add the last Test Suite
+            if not flushed:
+                self.__flush(state, True)
+            writer.write(DocXML.XML_DOC_STOP)
+            profile.count("bytes_written", writer.bytes_written)
+            yield
+        finally:
+            profile.stop()
+            self.writer = None
+            self.profile = NULL_PROFILE
+            self.delta = None
+
+    def parse(self, engine=None, profile=None, jobs=None):
+        """ Scan the docx document into the intermediate model, return the list of testlink_tools.model.TestSuite
+
+        The Test Cases found before the first Test Suite are added to it.
+        testlink_tools.testlink_xml.write_testsuites writes them as docx_to_xml, the other arguments are the same """
+        self.testsuites = testsuites = []
+        writer = XMLWriter()
+        try:
+            for _ in self.__convert(writer, engine, None, profile, None, jobs):
+                writer.drain()
+        finally:
+            self.testsuites = None
+        return testsuites
+
+    def iter_xml(self, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """ Generate the xml text piece by piece while the document is scanned, same arguments as docx_to_xml """
+        writer = XMLWriter()
+        for _ in self.__convert(writer, engine, cache, profile, delta, jobs):
+            text = writer.drain()
+            if text:
+                yield text
+
+    def write_xml(self, out, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """ Write the xml text to the file handle out while the document is scanned, return the number of bytes written (UTF-8) """
+        writer = XMLWriter(out)
+        for _ in self.__convert(writer, engine, cache, profile, delta, jobs):
+            pass
+        return writer.bytes_written
+
+    def docx_to_xml(self, engine=None, cache=None, profile=None, delta=None, jobs=None):
+        """ Scan a docx document to extract Paragraphs and Tables for "Test Suites" and "Test Cases" and generates the full xml text
+
+        engine overrides the engine given to the constructor
+        cache is an optional testlink_tools.cache.SectionCache, the xml text of the unchanged
+        "Test Suite" sections is then taken from the cache
+        profile is an optional testlink_tools.profiling.Profile recording the timings and counters of the conversion
+        delta is an optional testlink_tools.delta.Delta, only the Test Suites and Test Cases added or modified since
+        the previous import are then written (it cannot be combined with the cache)
+        jobs > 1 reads the "Test Suite" sections in that many worker processes, the xml text is the same
+        (it cannot be combined with the cache)
+        see write_xml and iter_xml to stream the xml text instead of returning it
+        """
+        return "".join(self.iter_xml(engine, cache, profile, delta, jobs))
     
 
 if __name__ == "__main__":
@@ -271,10 +433,3 @@ if __name__ == "__main__":
         f.close()
     except:
         print("Please choose a valid .docx file...")
-else:
-    print("Importing...", __name__)
-
-
-
-
-
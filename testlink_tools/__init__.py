@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     __init__.py
+#
+"""Shared helpers for the X-IFU/DRE TestLink converters
+
+The converters themselves live in requirements/requirement.py and testcases/testcases.py,
+this package holds what they have in common.
+
+The package also gives the public API below, each name is imported on first access only:
+"import testlink_tools" loads none of the modules, and python-docx is imported by the "docx" engine only.
+
+    Requirement, DocXML                  the requirements and test procedures converters
+    ENGINE_DOCX, ENGINE_STREAM           the engines of the converters
+    spreadsheet_to_xml                   TestLink XML of a requirements .xlsx or .csv
+    validate_xml, merge_xml              check and merge generated TestLink XML files (validate.validate, merge.merge)
+"""
+import importlib
+
+# public name: (module, attribute)
+_API = {
+    "Requirement": ("requirements.requirement", "Requirement"),
+    "DocXML": ("testcases.testcases", "DocXML"),
+    "ENGINE_DOCX": ("testlink_tools.docxstream", "ENGINE_DOCX"),
+    "ENGINE_STREAM": ("testlink_tools.docxstream", "ENGINE_STREAM"),
+    "spreadsheet_to_xml": ("testlink_tools.spreadsheet", "spreadsheet_to_xml"),
+    "validate_xml": ("testlink_tools.validate", "validate"),
+    "merge_xml": ("testlink_tools.merge", "merge"),
+}
+
+__all__ = sorted(_API)
+
+
+def __getattr__(name):
+    if name not in _API:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+    module, attribute = _API[name]
+    value = getattr(importlib.import_module(module), attribute)
+    # the next accesses do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_API))
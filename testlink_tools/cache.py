@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     cache.py
+#
+"""On-disk cache of the XML generated for each Heading 2 section
+
+1. The converters split the document body at their Heading 2 boundaries
+   ("requirements" for Requirement, "Test Suite" for DocXML)
+2. Each section is fingerprinted with the raw XML of its blocks, the state entering the section
+   (counters, pending text), the converter settings and the cache version
+3. When the fingerprint is known, the stored XML fragment and exit state are reused,
+   otherwise the section is converted and stored
+4. The entries are evicted in least recently used order when the cache is over its size
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from lxml import etree
+
+# bump when the format of the entries changes
+CACHE_VERSION = "1"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+ENTRY_SUFFIX = ".json"
+
+
+def block_xml(block):
+    """Return the raw XML of a python-docx Paragraph/Table or of a stream snapshot read with raw=True
+    """
+    xml = getattr(block, "xml", None)
+    if xml is not None:
+        return xml
+    return etree.tostring(block._element)
+
+
+def split_sections(blocks, is_boundary):
+    """Group *blocks* into lists, a new list starting at each block for which is_boundary(block) is true
+
+    The blocks before the first boundary form the first list.
+    """
+    section = []
+    for block in blocks:
+        if is_boundary(block) and section:
+            yield section
+            section = []
+        section.append(block)
+    if section:
+        yield section
+
+
+class SectionCache(object):
+    """Size-bounded LRU cache of section fragments, one JSON file per entry
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, version=CACHE_VERSION):
+        """Constructor
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # index of the entries, least recently used first
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(ENTRY_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(ENTRY_SUFFIX)], stat.st_size))
+        entries.sort()
+        self.index = OrderedDict((key, size) for _, key, size in entries)
+        self.size = sum(self.index.values())
+
+    def fingerprint(self, salt, state, blocks):
+        """Return the key of a section from the converter *salt*, the entering *state* and the raw XML of *blocks*
+        """
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(salt.encode())
+        digest.update(json.dumps(state, sort_keys=True).encode())
+        for block in blocks:
+            xml = block_xml(block)
+            digest.update(str(len(xml)).encode())
+            digest.update(xml)
+        return digest.hexdigest()
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the value stored for *key*, None if not found
+        """
+        if key not in self.index:
+            self.misses += 1
+            return None
+        try:
+            with open(self.__path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(self.__path(key))
+        except (OSError, ValueError):
+            # removed by another process or partially written
+            self.size -= self.index.pop(key)
+            self.misses += 1
+            return None
+        if entry.get("version") != self.version:
+            self.misses += 1
+            return None
+        self.index.move_to_end(key)
+        self.hits += 1
+        return entry["value"]
+
+    def put(self, key, value):
+        """Store *value* (JSON serializable) for *key* and evict the least recently used entries
+        """
+        data = json.dumps({"version": self.version, "value": value}).encode("utf-8")
+        handle, tmpname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.replace(tmpname, self.__path(key))
+        self.size += len(data) - self.index.pop(key, 0)
+        self.index[key] = len(data)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes
+        """
+        while self.size > self.max_bytes and self.index:
+            key, size = self.index.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self.__path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry
+        """
+        while self.index:
+            key, _ = self.index.popitem()
+            try:
+                os.remove(self.__path(key))
+            except OSError:
+                pass
+        self.size = 0
+
+
+class MemorySectionCache(SectionCache):
+    """Size-bounded LRU cache of section fragments kept in memory, for a long running process (watch mode)
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, version=CACHE_VERSION):
+        """Constructor
+        """
+        self.directory = None
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.index = OrderedDict()
+        self.entries = {}
+        self.size = 0
+
+    def get(self, key):
+        """Return the value stored for *key*, None if not found
+        """
+        if key not in self.index:
+            self.misses += 1
+            return None
+        self.index.move_to_end(key)
+        self.hits += 1
+        # a copy, the converters update the state they are given
+        return json.loads(self.entries[key])
+
+    def put(self, key, value):
+        """Store *value* (JSON serializable) for *key* and evict the least recently used entries
+        """
+        data = json.dumps(value)
+        self.entries[key] = data
+        self.size += len(data) - self.index.pop(key, 0)
+        self.index[key] = len(data)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_bytes
+        """
+        while self.size > self.max_bytes and self.index:
+            key, size = self.index.popitem(last=False)
+            self.size -= size
+            del self.entries[key]
+
+    def clear(self):
+        """Remove every entry
+        """
+        self.index.clear()
+        self.entries.clear()
+        self.size = 0
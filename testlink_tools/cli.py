@@ -0,0 +1,593 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     cli.py
+#
+"""Non-interactive command line of the testlink-tools
+
+    python -m testlink_tools convert [options] PATH [PATH ...]
+    python -m testlink_tools watch [options] DIRECTORY
+    python -m testlink_tools upload --url URL --project NAME [options] XML [XML ...]
+    python -m testlink_tools trace DATABASE [DOCID ...]
+    python -m testlink_tools validate XML [XML ...]
+    python -m testlink_tools merge -o OUTPUT XML [XML ...]
+    python -m testlink_tools results --procedure DOCX_OR_XML -o OUTPUT LOG [LOG ...]
+
+PATH is a .docx file, a glob pattern or a directory (searched recursively for .docx files).
+Each document is detected as a requirements document (Heading 2 containing "requirements")
+or as a test procedure (Heading 2 containing "Test Suite"), converted in a process pool and
+written to its own .xml file. A failing document does not stop the batch, a summary with
+the status and the time of each file is printed at the end.
+A .xlsx or .csv file given as a file or a glob pattern holds requirements, one row per requirement
+(see testlink_tools.spreadsheet), its XML is written without python-docx.
+
+--profile writes the timings and counters of each conversion next to its output, as <output>.profile.json.
+
+--delta writes only the entries added or modified since the previous run: the previous entries are read
+from <output>.manifest.json, or from the previous <output> when there is no manifest yet. The removed
+entries are listed in <output>.delta.json and the manifest is updated.
+
+--index DATABASE adds the requirements, Test Cases and requirement references of each document to a
+traceability index (see testlink_tools.traceindex). The test procedures are converted first, and the
+expected_coverage of the requirements is the number of indexed Test Cases referencing them.
+trace queries the index: the Test Cases covering some requirements, or the coverage of all of them.
+
+--validate checks each output with testlink_tools.validate once written, the issues are listed in
+<output>.validation.json and an invalid output is reported as failed. validate checks existing .xml files.
+
+merge streams several generated .xml files of the same kind into a single import (see testlink_tools.merge).
+
+results writes the TestLink execution results import of the logs of a test bench (see testlink_tools.results),
+joined with the Test Cases and steps of a test procedure.
+
+upload sends generated .xml files to TestLink through its XML-RPC API (see testlink_tools.upload),
+the objects created are recorded in <xml>.upload.jsonl to resume an interrupted upload.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from testlink_tools import docxstream, spreadsheet
+from testlink_tools.cache import DEFAULT_MAX_BYTES, SectionCache
+from testlink_tools.delta import Delta
+from testlink_tools.merge import merge as merge_xml
+from testlink_tools.profiling import CAPTURES, Profile
+from testlink_tools.results import CaseIndex, iter_executions, iter_log_records, write_results
+from testlink_tools.styleindex import StyleIndex
+from testlink_tools.tablelayout import TableLayout
+from testlink_tools.traceindex import TraceIndex
+from testlink_tools.upload import DEFAULT_JOBS, DEFAULT_RETRIES, UploadError, Uploader
+from testlink_tools.validate import DEFAULT_MAX_ISSUES, validate as validate_xml
+from testlink_tools.watch import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL, Watcher, make_backend
+
+KIND_AUTO = "auto"
+KIND_REQUIREMENTS = "requirements"
+KIND_TESTCASES = "testcases"
+KINDS = (KIND_AUTO, KIND_REQUIREMENTS, KIND_TESTCASES)
+
+
+def detect_kind(filename):
+    """Return KIND_REQUIREMENTS or KIND_TESTCASES from the first matching Heading 2, None if unknown
+    """
+    if spreadsheet.spreadsheet_format(filename) is not None:
+        return KIND_REQUIREMENTS
+    index = StyleIndex(docxstream.styles_xml(filename))
+    for block in docxstream.iter_block_items(filename, tables=False):
+        if not isinstance(block, docxstream.StreamParagraph) or index.level(block.style_id) != 2:
+            continue
+        title = block.text.lower()
+        if title.find("requirements") >= 0:
+            return KIND_REQUIREMENTS
+        if title.find("test suite") >= 0:
+            return KIND_TESTCASES
+    return None
+
+
+def expand_paths(patterns):
+    """Return the sorted .docx files matching the files, glob patterns and directories of *patterns*
+    """
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "**", "*.docx"), recursive=True)
+        else:
+            matches = glob.glob(pattern, recursive=True) or [pattern]
+        for match in matches:
+            # skip the lock files of Word
+            if not os.path.basename(match).startswith("~$"):
+                found.add(os.path.normpath(match))
+    return sorted(found)
+
+
+def output_names(filenames, output_dir=None):
+    """Return the output .xml file of each input, next to the input or in *output_dir*
+    """
+    outputs = []
+    used = set()
+    for filename in filenames:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        directory = output_dir if output_dir is not None else os.path.dirname(filename)
+        output = os.path.join(directory, stem + ".xml")
+        counter = 1
+        while output in used:
+            counter += 1
+            output = os.path.join(directory, "{0}_{1}.xml".format(stem, counter))
+        used.add(output)
+        outputs.append(output)
+    return outputs
+
+
+def convert_file(task, cache=None):
+    """Convert one document, run in a worker process
+
+    task is a (filename, output, options) tuple, options a dict of the command line options,
+    cache a section cache used instead of the --cache option (the in-memory cache of the watch mode).
+    Return a dict with the filename, output, kind, status, seconds and error message.
+    """
+    filename, output, options = task
+    result = {"filename": filename, "output": output, "kind": options["kind"],
+              "status": "OK", "seconds": 0.0, "error": ""}
+    start = time.perf_counter()
+    try:
+        kind = options["kind"]
+        if kind == KIND_AUTO:
+            kind = detect_kind(filename)
+            if kind is None:
+                raise ValueError("neither a requirements document nor a test procedure")
+        result["kind"] = kind
+        if cache is None and options.get("cache"):
+            cache = SectionCache(options["cache"], options.get("cache_size", DEFAULT_MAX_BYTES))
+        profile = None
+        if options.get("profile"):
+            profile = Profile(options.get("profile_capture"))
+        delta = None
+        if options.get("delta"):
+            if os.path.exists(output + ".manifest.json"):
+                delta = Delta.from_manifest(output + ".manifest.json")
+            elif os.path.exists(output):
+                delta = Delta.from_export(output)
+            else:
+                delta = Delta()
+        # written aside and renamed, a failing conversion leaves no partial output
+        with open(output + ".part", 'w', encoding='utf-8') as f:
+            if options.get("index"):
+                index_file(filename, kind, f, options, profile)
+            elif spreadsheet.spreadsheet_format(filename) is not None:
+                if kind != KIND_REQUIREMENTS:
+                    raise ValueError("a spreadsheet holds requirements only")
+                spreadsheet.spreadsheet_to_xml(filename, f)
+            elif kind == KIND_REQUIREMENTS:
+                from requirements.requirement import Requirement
+                requirement = Requirement(filename, options["reqid"], options["version"], options["level"],
+                                          engine=options["engine"])
+                requirement.write_XML(f, cache=cache, profile=profile, delta=delta, jobs=options.get("section_jobs"))
+            else:
+                from testcases.testcases import DocXML
+                procedure = DocXML(filename, engine=options["engine"], layout=options.get("layout"))
+                procedure.write_xml(f, cache=cache, profile=profile, delta=delta, jobs=options.get("section_jobs"))
+        os.replace(output + ".part", output)
+        if delta is not None:
+            with open(output + ".delta.json", 'w', encoding='utf-8') as f:
+                json.dump(delta.report(), f, indent=2)
+            delta.save_manifest(output + ".manifest.json")
+        if profile is not None:
+            with open(output + ".profile.json", 'w', encoding='utf-8') as f:
+                json.dump(profile.report(), f, indent=2)
+        if options.get("validate"):
+            report = validate_xml(output)
+            with open(output + ".validation.json", 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            if not report["valid"]:
+                raise ValueError("invalid XML, {0} issue(s), first: {1}".format(
+                    report["issue_count"], format_issue(report["issues"][0])))
+    except Exception as error:
+        result["status"] = "FAILED"
+        result["error"] = "{0}: {1}".format(type(error).__name__, error)
+        if os.path.exists(output + ".part"):
+            os.remove(output + ".part")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def format_issue(issue):
+    """Return an issue of testlink_tools.validate as one line of text
+    """
+    return "line {0} [{1}]: {2}".format(issue["line"], issue["section"] or "-", issue["message"])
+
+
+def index_file(filename, kind, out, options, profile=None):
+    """Convert one document through the intermediate model, write its XML to *out* and add it to the --index database
+    """
+    from testlink_tools.testlink_xml import write_requirements, write_testsuites
+    from testlink_tools.xmlwriter import XMLWriter
+    if spreadsheet.spreadsheet_format(filename) is not None:
+        # the expected_coverage is the one of the spreadsheet
+        specs = spreadsheet.read_reqspecs(filename)
+        write_requirements(specs, XMLWriter(out))
+        with TraceIndex(options["index"]) as index:
+            index.add_requirements(filename, specs)
+    elif kind == KIND_REQUIREMENTS:
+        from requirements.requirement import Requirement
+        with TraceIndex(options["index"]) as index:
+            coverage = index.coverage(options["reqid"])
+        requirement = Requirement(filename, options["reqid"], options["version"], options["level"],
+                                  engine=options["engine"], coverage=coverage)
+        specs = requirement.parse(profile=profile, jobs=options.get("section_jobs"))
+        write_requirements(specs, XMLWriter(out))
+        with TraceIndex(options["index"]) as index:
+            index.add_requirements(filename, specs)
+    else:
+        from testcases.testcases import DocXML
+        procedure = DocXML(filename, engine=options["engine"], layout=options.get("layout"))
+        testsuites = procedure.parse(profile=profile, jobs=options.get("section_jobs"))
+        write_testsuites(testsuites, XMLWriter(out))
+        with TraceIndex(options["index"]) as index:
+            index.add_testsuites(filename, testsuites)
+
+
+def convert(filenames, outputs, options, jobs=None):
+    """Convert *filenames* to *outputs* in a process pool of *jobs* workers, return the results in input order
+
+    With an --index database the test procedures are converted before the requirements documents,
+    so that the expected_coverage of the requirements counts their Test Cases.
+    """
+    tasks = [(filename, output, options) for filename, output in zip(filenames, outputs)]
+    batches = [tasks]
+    if options.get("index"):
+        kinds = []
+        for filename, _, _ in tasks:
+            try:
+                kinds.append(options["kind"] if options["kind"] != KIND_AUTO else detect_kind(filename))
+            except Exception:
+                # reported by its conversion
+                kinds.append(None)
+        batches = [[task for task, kind in zip(tasks, kinds) if kind != KIND_REQUIREMENTS],
+                   [task for task, kind in zip(tasks, kinds) if kind == KIND_REQUIREMENTS]]
+    results = {}
+    for batch in batches:
+        if jobs == 1 or len(batch) <= 1:
+            batch_results = [convert_file(task) for task in batch]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                batch_results = list(executor.map(convert_file, batch))
+        results.update((task[0], result) for task, result in zip(batch, batch_results))
+    return [results[task[0]] for task in tasks]
+
+
+def print_summary(results, total, stream=None):
+    """Print the status and time of each converted file
+    """
+    if stream is None:
+        stream = sys.stdout
+    width = max([len(result["filename"]) for result in results] + [4])
+    stream.write("{0:<6} {1:>8} {2:<12} {3:<{4}} {5}\n".format("STATUS", "SECONDS", "KIND", "FILE", width, "OUTPUT"))
+    for result in results:
+        detail = result["output"] if result["status"] == "OK" else result["error"]
+        stream.write("{0:<6} {1:>8.2f} {2:<12} {3:<{4}} {5}\n".format(
+            result["status"], result["seconds"], result["kind"] or "?", result["filename"], width, detail))
+    failed = sum(1 for result in results if result["status"] != "OK")
+    stream.write("{0} file(s), {1} failed, {2:.2f} s\n".format(len(results), failed, total))
+
+
+def add_conversion_arguments(parser):
+    """Add the options of the conversion of a document to the *parser* of a command
+    """
+    parser.add_argument("-k", "--kind", choices=KINDS, default=KIND_AUTO, help="document kind (default: auto)")
+    parser.add_argument("-e", "--engine", choices=docxstream.ENGINES, default=docxstream.ENGINE_STREAM,
+                        help="conversion engine (default: stream)")
+    parser.add_argument("--reqid", default="XIFU-DRE-DMX-FW-R", help="requirement ID prefix")
+    parser.add_argument("--version", default="V1.0", help="version of the requirement specification")
+    parser.add_argument("--level", default="SRS", choices=["Section", "SRS", "USR"],
+                        help="type of the requirement specification")
+    parser.add_argument("--layout", metavar="TEMPLATE",
+                        help="template .docx whose first Test Case table gives the layout of the Test Case tables "
+                             "(default: the layout of testcases/test/Template.docx)")
+    incremental = parser.add_mutually_exclusive_group()
+    incremental.add_argument("--cache", metavar="DIR", help="directory of the section cache (default: no cache)")
+    incremental.add_argument("--delta", action="store_true",
+                             help="write only the entries added or modified since the previous run of the same output")
+    incremental.add_argument("--index", metavar="DATABASE",
+                             help="add the documents to a traceability index and fill the expected coverage from it")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar="MB",
+                        help="maximum size of the section cache (default: %(default)s MB)")
+    parser.add_argument("--profile", action="store_true",
+                        help="write the timings and counters of each conversion to <output>.profile.json")
+    parser.add_argument("--validate", action="store_true",
+                        help="check each output and list its issues in <output>.validation.json")
+    parser.add_argument("--profile-capture", choices=CAPTURES,
+                        help="add the cProfile functions or the tracemalloc allocations to the profile (implies --profile)")
+
+
+def conversion_options(args):
+    """Return the dict of the conversion options given to convert_file
+    """
+    return {"kind": args.kind, "engine": args.engine, "reqid": args.reqid,
+            "version": args.version, "level": args.level,
+            "cache": args.cache, "cache_size": args.cache_size * 1024 * 1024, "delta": args.delta, "index": args.index,
+            "profile": args.profile or args.profile_capture is not None, "profile_capture": args.profile_capture,
+            "section_jobs": getattr(args, "section_jobs", 1),
+            "layout": TableLayout.from_template(args.layout) if args.layout else None,
+            "validate": args.validate}
+
+
+def build_parser():
+    """Return the argument parser of the command line
+    """
+    parser = argparse.ArgumentParser(prog="testlink-tools", description="X-IFU/DRE TestLink tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_convert = commands.add_parser("convert", help="convert .docx documents to TestLink XML")
+    parser_convert.add_argument("paths", nargs="+", metavar="PATH", help=".docx, .xlsx or .csv file, glob pattern or directory")
+    parser_convert.add_argument("-o", "--output-dir", help="directory of the .xml files (default: next to each input)")
+    parser_convert.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: number of cores)")
+    parser_convert.add_argument("--section-jobs", type=int, default=1, metavar="N",
+                                help="read the Heading 2 sections of each document in N worker processes, "
+                                     "the documents are then converted one after another (default: 1)")
+    add_conversion_arguments(parser_convert)
+
+    parser_watch = commands.add_parser("watch", help="convert the .docx documents of a directory each time they are saved")
+    parser_watch.add_argument("directory", help="directory searched recursively for .docx files")
+    parser_watch.add_argument("-o", "--output-dir", help="directory of the .xml files (default: next to each input)")
+    parser_watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE, metavar="SECONDS",
+                              help="quiet time after a save before converting (default: %(default)s s)")
+    parser_watch.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                              help="polling interval (default: %(default)s s)")
+    parser_watch.add_argument("--polling", action="store_true", help="poll the directory instead of using inotify")
+    add_conversion_arguments(parser_watch)
+
+    parser_upload = commands.add_parser("upload", help="upload TestLink XML files through the XML-RPC API")
+    parser_upload.add_argument("paths", nargs="+", metavar="XML", help=".xml file or glob pattern")
+    parser_upload.add_argument("--url", required=True, help="XML-RPC end point, http://host/testlink/lib/api/xmlrpc/v1/xmlrpc.php")
+    parser_upload.add_argument("--devkey", default=os.environ.get("TESTLINK_DEVKEY"),
+                               help="API key of the user (default: $TESTLINK_DEVKEY)")
+    parser_upload.add_argument("--project", required=True, help="name of the TestLink test project")
+    parser_upload.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                               help="number of concurrent requests (default: %(default)s)")
+    parser_upload.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                               help="retries of a call failing with a network error or HTTP 429/5xx (default: %(default)s)")
+    parser_upload.add_argument("--author", default="admin", help="author login of the Test Cases (default: admin)")
+    parser_upload.add_argument("--no-checkpoint", action="store_true",
+                               help="do not record the created objects in <xml>.upload.jsonl")
+
+    parser_validate = commands.add_parser("validate", help="check TestLink XML files before an import")
+    parser_validate.add_argument("paths", nargs="+", metavar="XML", help=".xml file or glob pattern")
+    parser_validate.add_argument("--max-issues", type=int, default=DEFAULT_MAX_ISSUES, metavar="N",
+                                 help="issues listed per file (default: %(default)s)")
+
+    parser_merge = commands.add_parser("merge", help="merge generated TestLink XML files into a single import")
+    parser_merge.add_argument("paths", nargs="+", metavar="XML", help=".xml file or glob pattern, in import order")
+    parser_merge.add_argument("-o", "--output", required=True, help="merged .xml file")
+
+    parser_results = commands.add_parser("results", help="write the TestLink execution results of test bench logs")
+    parser_results.add_argument("paths", nargs="+", metavar="LOG",
+                                help=".csv or JSON lines log file (.gz accepted) or glob pattern, in execution order")
+    parser_results.add_argument("-p", "--procedure", required=True,
+                                help="test procedure of the Test Cases, .docx document or its generated .xml")
+    parser_results.add_argument("-o", "--output", required=True, help="results .xml file")
+    parser_results.add_argument("--ids", metavar="JSONL",
+                                help="upload checkpoint holding the TestLink ids of the Test Cases "
+                                     "(default: <procedure .xml>.upload.jsonl when it exists)")
+    parser_results.add_argument("--project", help="name of the TestLink test project")
+    parser_results.add_argument("--prefix", help="Test Case prefix of the test project")
+    parser_results.add_argument("--testplan", help="name of the test plan")
+    parser_results.add_argument("--build", help="name of the build")
+    parser_results.add_argument("--tester", help="login of the tester")
+    parser_results.add_argument("--max-issues", type=int, default=DEFAULT_MAX_ISSUES, metavar="N",
+                                help="issues listed (default: %(default)s)")
+
+    parser_trace = commands.add_parser("trace", help="query the traceability index filled by convert --index")
+    parser_trace.add_argument("database", help="SQLite database of the index")
+    parser_trace.add_argument("docids", nargs="*", metavar="DOCID",
+                              help="requirements whose Test Cases are listed (default: the coverage of every requirement)")
+    parser_trace.add_argument("--prefix", default="", help="only the requirement IDs starting with PREFIX")
+    parser_trace.add_argument("--uncovered", action="store_true", help="list only the requirements without Test Case")
+    return parser
+
+
+def upload(args):
+    """Upload the XML files of the command line, return the exit status"""
+    filenames = sorted(set(match for pattern in args.paths for match in (glob.glob(pattern) or [pattern])))
+    if args.devkey is None:
+        sys.stderr.write("no devKey, use --devkey or $TESTLINK_DEVKEY\n")
+        return 2
+    failed = 0
+    sys.stdout.write("{0:<6} {1:>7} {2:>7} {3:>6} {4:>8} {5}\n".format("STATUS", "CREATED", "SKIPPED", "FAILED", "SECONDS", "FILE"))
+    with Uploader(args.url, args.devkey, args.project, jobs=args.jobs, retries=args.retries, author=args.author) as uploader:
+        for filename in filenames:
+            try:
+                with open(filename, "rb") as f:
+                    xml = f.read()
+                report = uploader.upload_xml(xml, None if args.no_checkpoint else filename + ".upload.jsonl")
+            except (OSError, ValueError, UploadError) as error:
+                failed += 1
+                sys.stdout.write("{0:<6} {1:>7} {2:>7} {3:>6} {4:>8} {5} {6}: {7}\n".format(
+                    "FAILED", "-", "-", "-", "-", filename, type(error).__name__, error))
+                continue
+            failed += 1 if report["failed"] else 0
+            sys.stdout.write("{0:<6} {1:>7} {2:>7} {3:>6} {4:>8.2f} {5}\n".format(
+                "FAILED" if report["failed"] else "OK", report["created"], report["skipped"],
+                len(report["failed"]), report["seconds"], filename))
+            for key, error in report["failed"].items():
+                sys.stdout.write("       {0}: {1}\n".format(key, error))
+    return 1 if failed else 0
+
+
+def validate(args):
+    """Validate the XML files of the command line, return the exit status"""
+    filenames = sorted(set(match for pattern in args.paths for match in (glob.glob(pattern) or [pattern])))
+    failed = 0
+    for filename in filenames:
+        start = time.perf_counter()
+        try:
+            report = validate_xml(filename, args.max_issues)
+        except OSError as error:
+            failed += 1
+            sys.stdout.write("FAILED {0} {1}: {2}\n".format(filename, type(error).__name__, error))
+            continue
+        seconds = time.perf_counter() - start
+        if report["valid"]:
+            sys.stdout.write("OK     {0} {1}, {2} requirement(s), {3} Test Case(s), {4:.2f} s\n".format(
+                filename, report["kind"], report["requirements"], report["testcases"], seconds))
+            continue
+        failed += 1
+        sys.stdout.write("FAILED {0} {1} issue(s)\n".format(filename, report["issue_count"]))
+        for issue in report["issues"]:
+            sys.stdout.write("       {0}\n".format(format_issue(issue)))
+    return 1 if failed else 0
+
+
+def merge(args):
+    """Merge the XML files of the command line, return the exit status"""
+    filenames = [match for pattern in args.paths for match in (sorted(glob.glob(pattern)) or [pattern])]
+    filenames = [filename for filename in filenames if os.path.abspath(filename) != os.path.abspath(args.output)]
+    try:
+        with open(args.output + ".part", "w", encoding="utf-8") as f:
+            report = merge_xml(filenames, f)
+        os.replace(args.output + ".part", args.output)
+    except (OSError, ValueError) as error:
+        if os.path.exists(args.output + ".part"):
+            os.remove(args.output + ".part")
+        sys.stderr.write("{0}: {1}\n".format(type(error).__name__, error))
+        return 1
+    if report["kind"] == KIND_REQUIREMENTS:
+        counts = "{0} specification(s), {1} requirement(s)".format(report["specifications"], report["requirements"])
+    else:
+        counts = "{0} Test Suite(s), {1} Test Case(s)".format(report["testsuites"], report["testcases"])
+    sys.stdout.write("{0}: {1} file(s), {2}, {3} duplicate(s) dropped\n".format(
+        args.output, report["inputs"], counts, len(report["duplicates"])))
+    for duplicate in report["duplicates"]:
+        sys.stdout.write("    duplicate {0}\n".format(duplicate))
+    return 0
+
+
+def execution_results(args):
+    """Write the execution results of the logs of the command line, return the exit status"""
+    filenames = [match for pattern in args.paths for match in (sorted(glob.glob(pattern)) or [pattern])]
+    ids = args.ids
+    if ids is None and os.path.exists(args.procedure + ".upload.jsonl"):
+        ids = args.procedure + ".upload.jsonl"
+    try:
+        index = CaseIndex.from_file(args.procedure)
+        if ids is not None:
+            index.load_ids(ids)
+        with open(args.output + ".part", "w", encoding="utf-8") as f:
+            report = write_results(iter_executions(iter_log_records(filenames)), index, f, args.project, args.prefix,
+                                   args.testplan, args.build, args.tester, args.max_issues)
+        os.replace(args.output + ".part", args.output)
+    except (OSError, ValueError) as error:
+        if os.path.exists(args.output + ".part"):
+            os.remove(args.output + ".part")
+        sys.stderr.write("{0}: {1}\n".format(type(error).__name__, error))
+        return 1
+    sys.stdout.write("{0}: {1} record(s), {2} execution(s), {3} step(s), {4} skipped, {5} without TestLink id\n".format(
+        args.output, report["records"], report["executions"], report["steps"], report["skipped"],
+        report["unidentified"]))
+    for issue in report["issues"]:
+        sys.stdout.write("    {0}, line {1}: {2}\n".format(issue["file"], issue["line"], issue["message"]))
+    return 1 if report["issue_count"] else 0
+
+
+def trace(args):
+    """Print the Test Cases covering the requirements of the command line, or the coverage of all of them"""
+    if not os.path.exists(args.database):
+        sys.stderr.write("{0} not found\n".format(args.database))
+        return 2
+    with TraceIndex(args.database) as index:
+        if args.docids:
+            for docid in args.docids:
+                testcases = index.covering(docid)
+                sys.stdout.write("{0} {1} Test Case(s)\n".format(docid, len(testcases)))
+                for document, testsuite, name in testcases:
+                    sys.stdout.write("    {0} / {1} ({2})\n".format(testsuite, name, document))
+            return 0
+        uncovered = index.uncovered(args.prefix)
+        if args.uncovered:
+            for docid in uncovered:
+                sys.stdout.write(docid + "\n")
+            return 0
+        coverage = index.coverage(args.prefix)
+        docids = sorted(set(coverage) | set(uncovered))
+        for docid in docids:
+            sys.stdout.write("{0:<40} {1:>4}\n".format(docid, coverage.get(docid, 0)))
+        sys.stdout.write("{0} requirement(s), {1} not covered\n".format(len(docids), len(uncovered)))
+    return 0
+
+
+def watch(args):
+    """Watch the directory of the command line until interrupted, return the exit status"""
+    if not os.path.isdir(args.directory):
+        sys.stderr.write("{0} is not a directory\n".format(args.directory))
+        return 2
+    try:
+        options = conversion_options(args)
+    except (OSError, ValueError) as error:
+        sys.stderr.write("{0}: {1}\n".format(type(error).__name__, error))
+        return 2
+    backend = make_backend(args.directory, args.polling, args.interval)
+    Watcher(args.directory, options, args.output_dir, args.debounce, backend).run()
+    return 0
+
+
+def main(argv=None):
+    """Entry point of the command line, return the exit status
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "upload":
+        return upload(args)
+    if args.command == "watch":
+        return watch(args)
+    if args.command == "trace":
+        return trace(args)
+    if args.command == "validate":
+        return validate(args)
+    if args.command == "merge":
+        return merge(args)
+    if args.command == "results":
+        return execution_results(args)
+
+    if args.section_jobs > 1 and args.cache:
+        parser.error("--section-jobs cannot be combined with --cache")
+    filenames = expand_paths(args.paths)
+    if not filenames:
+        sys.stderr.write("no .docx file found\n")
+        return 2
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    outputs = output_names(filenames, args.output_dir)
+    try:
+        options = conversion_options(args)
+    except (OSError, ValueError) as error:
+        # the --layout template
+        sys.stderr.write("{0}: {1}\n".format(type(error).__name__, error))
+        return 2
+
+    start = time.perf_counter()
+    # the worker processes read the sections of one document at a time
+    jobs = 1 if args.section_jobs > 1 else args.jobs
+    results = convert(filenames, outputs, options, jobs)
+    print_summary(results, time.perf_counter() - start)
+    return 1 if any(result["status"] != "OK" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     delta.py
+#
+"""Delta export: only the requirements, Test Suites and Test Cases changed since the previous import
+
+The previous import is described by a manifest, a JSON file mapping the key of each entry to the hash of its content:
+    requirements  docid
+    testsuites    name of the Test Suite
+    testcases     "<name of the Test Suite>/<name of the Test Case>"
+
+    delta = Delta.from_export("previous.xml")       # or Delta.from_manifest("previous.manifest.json")
+    xml = DocXML(filename).docx_to_xml(delta=delta)  # only the added and modified entries
+    delta.report()                                   # added, modified, removed keys and unchanged count
+    delta.save_manifest("previous.manifest.json")    # manifest of the whole document, for the next delta
+
+The hash is computed on the parsed XML (tags, attributes and stripped texts), so a manifest built from
+a previous export matches the entries generated again. node_order is left out of the hash: inserting
+a Test Case renumbers the following ones, they are not exported again for that.
+"""
+import hashlib
+import json
+
+from lxml import etree
+
+MANIFEST_VERSION = 1
+KIND_REQUIREMENTS = "requirements"
+KIND_TESTSUITES = "testsuites"
+KIND_TESTCASES = "testcases"
+KINDS = (KIND_REQUIREMENTS, KIND_TESTSUITES, KIND_TESTCASES)
+
+# children left out of the hash of an entry: the entries nested in a Test Suite are hashed on their own
+_SKIPPED_TAGS = frozenset(("node_order", "testcase", "testsuite", "requirement", "req_spec"))
+
+
+def _canonical(element, parts):
+    """Append the tag, attributes, text and children (but the skipped ones) of element to parts"""
+    parts.append(element.tag)
+    parts.extend(sorted(element.attrib.items()))
+    parts.append((element.text or "").strip())
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _SKIPPED_TAGS:
+            _canonical(child, parts)
+    parts.append("/")
+
+
+def entry_hash(element):
+    """Return the content hash of a <requirement>, <testsuite> or <testcase> element"""
+    parts = []
+    _canonical(element, parts)
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def entry_key(element, suite_name=""):
+    """Return the (kind, key) of a <requirement>, <testsuite> or <testcase> element, None for other elements"""
+    if element.tag == "requirement":
+        return KIND_REQUIREMENTS, (element.findtext("docid") or "").strip()
+    if element.tag == "testsuite":
+        return KIND_TESTSUITES, element.get("name", "")
+    if element.tag == "testcase":
+        return KIND_TESTCASES, suite_name + "/" + element.get("name", "")
+    return None
+
+
+class Delta(object):
+    """Compare the generated entries with the manifest of the previous import
+    """
+
+    def __init__(self, previous=None):
+        """Constructor, previous is a manifest dict {kind: {key: hash}}"""
+        previous = previous or {}
+        self.previous = dict((kind, dict(previous.get(kind, {}))) for kind in KINDS)
+        self.manifest = dict((kind, {}) for kind in KINDS)
+        self.added = dict((kind, []) for kind in KINDS)
+        self.modified = dict((kind, []) for kind in KINDS)
+        self.unchanged = dict((kind, 0) for kind in KINDS)
+
+    @classmethod
+    def from_manifest(cls, filename):
+        """Return a Delta against the manifest saved by save_manifest"""
+        with open(filename, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError("{0}: unknown manifest version {1}".format(filename, manifest.get("version")))
+        return cls(manifest["entries"])
+
+    @classmethod
+    def from_export(cls, filename):
+        """Return a Delta against a previous TestLink XML export, read as a stream"""
+        previous = dict((kind, {}) for kind in KINDS)
+        for _, element in etree.iterparse(filename, events=("end",), tag=("requirement", "testsuite", "testcase")):
+            parent = element.getparent()
+            # the unnamed root <testsuite> of a test procedure is not a Test Suite
+            if element.tag == "testsuite" and parent is None:
+                continue
+            suite_name = parent.get("name", "") if parent is not None else ""
+            kind, key = entry_key(element, suite_name)
+            previous[kind][key] = entry_hash(element)
+            if element.tag != "testsuite":
+                element.clear(keep_tail=True)
+        return cls(previous)
+
+    def check(self, fragment, suite_name=""):
+        """Record the XML fragment of an entry, return True if it is added or modified since the previous import
+
+        suite_name is the name of the Test Suite of a Test Case fragment.
+        """
+        element = etree.fromstring(fragment)
+        kind, key = entry_key(element, suite_name)
+        digest = entry_hash(element)
+        self.manifest[kind][key] = digest
+        previous = self.previous[kind].get(key)
+        if previous is None:
+            self.added[kind].append(key)
+            return True
+        if previous != digest:
+            self.modified[kind].append(key)
+            return True
+        self.unchanged[kind] += 1
+        return False
+
+    def removed(self, kind):
+        """Keys of the previous import which are not in the document"""
+        manifest = self.manifest[kind]
+        return [key for key in self.previous[kind] if key not in manifest]
+
+    def report(self):
+        """Return the added, modified and removed keys and the number of unchanged entries of each kind"""
+        return dict((kind, {"added": self.added[kind], "modified": self.modified[kind],
+                            "removed": self.removed(kind), "unchanged": self.unchanged[kind]})
+                    for kind in KINDS)
+
+    def save_manifest(self, filename):
+        """Save the manifest of the entries of the document, the previous import of the next delta"""
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.manifest}, f, indent=1, sort_keys=True)
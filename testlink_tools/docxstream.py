@@ -0,0 +1,561 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     docxstream.py
+#
+"""Streaming reader for the body of a Word (docx) document
+
+1. Map the .docx in memory, read the zip central directory and locate word/document.xml and word/styles.xml
+   through the package relationships (Package), the other parts (images, embedded objects...) are never read
+2. Stream word/document.xml with lxml.etree.iterparse, one body child (w:p or w:tbl) at a time
+3. Snapshot each paragraph or table into a light object which mimics the few python-docx attributes
+   used by the converters (style.name, text, rows, columns, cells, paragraphs, cell())
+4. Drop the handled subtree, so the memory does not grow with the size of the document
+
+The python-docx object graph (docx.api.Document) stays the reference implementation,
+both engines must produce byte-identical XML. open_document gives it a package reduced to the main document
+and styles parts, so that python-docx does not load the media either. python-docx is imported only by the "docx"
+engine: importing this module (or the converters) does not load it.
+"""
+import io
+import mmap
+import os
+import posixpath
+import shutil
+import sys
+import zipfile
+
+from lxml import etree
+
+ENGINE_DOCX = "docx"
+ENGINE_STREAM = "stream"
+ENGINES = (ENGINE_DOCX, ENGINE_STREAM)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+RT_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+RT_STYLES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+
+
+def qn(tag):
+    """Return the clark name of a "w:xxx" tag, e.g. qn("w:p") = "{...main}p"
+    """
+    return "{%s}%s" % (W_NS, tag.split(":")[1])
+
+
+W_BODY = qn("w:body")
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+W_R = qn("w:r")
+W_HYPERLINK = qn("w:hyperlink")
+W_VAL = qn("w:val")
+
+# run children translated to text, same mapping as python-docx (docx.oxml.text.run)
+_RUN_TEXT = {
+    qn("w:cr"): "\n",
+    qn("w:noBreakHyphen"): "-",
+    qn("w:ptab"): "\t",
+    qn("w:tab"): "\t",
+}
+W_T = qn("w:t")
+W_BR = qn("w:br")
+W_TYPE = qn("w:type")
+
+# style names stored in lower case in styles.xml and shown capitalized by Word (docx.styles.BabelFish)
+_UI_STYLE_NAMES = {
+    "caption": "Caption",
+    "footer": "Footer",
+    "header": "Header",
+}
+_UI_STYLE_NAMES.update(("heading %d" % level, "Heading %d" % level) for level in range(1, 10))
+
+
+def part_name(package, rels_name, rel_type, base="/"):
+    """Return the zip member name targeted by the first relationship of type *rel_type*, None if not found
+    """
+    try:
+        rels = etree.fromstring(package.read(rels_name))
+    except KeyError:
+        return None
+    for rel in rels.iterchildren("{%s}Relationship" % RELS_NS):
+        if rel.get("Type") == rel_type and rel.get("TargetMode") != "External":
+            target = rel.get("Target")
+            return posixpath.normpath(posixpath.join(base, target)).lstrip("/")
+    return None
+
+
+def main_parts(package):
+    """Return the zip member names of the main document part and of its styles part (or None)
+    """
+    document = part_name(package, "_rels/.rels", RT_OFFICE_DOCUMENT)
+    if document is None:
+        raise ValueError("file '{0}' is not a Word file, no main document part".format(package.filename))
+    directory, name = posixpath.split(document)
+    styles = part_name(package, posixpath.join(directory, "_rels", name + ".rels"), RT_STYLES, "/" + directory)
+    return document, styles
+
+
+class _MappedFile(object):
+    """Read-only file object over a memory map, for zipfile (mmap has no seekable() before Python 3.13)
+    """
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    def read(self, size=-1):
+        return self.mapping.read(size if size >= 0 else None)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        try:
+            self.mapping.seek(offset, whence)
+        except ValueError as error:
+            # a file raises OSError, zipfile handles it for files shorter than the end of central directory
+            raise OSError(str(error))
+        return self.mapping.tell()
+
+    def tell(self):
+        return self.mapping.tell()
+
+    def seekable(self):
+        return True
+
+
+class Package(object):
+    """A .docx file mapped in memory, whose parts are decompressed only when read
+
+    Opening reads the zip central directory and the package relationships, the pages of the file holding
+    the other parts are never touched: the cost of a document depends on its text, not on its media.
+    """
+
+    def __init__(self, filename):
+        """Constructor, raise OSError or zipfile.BadZipFile like zipfile.ZipFile(filename)
+
+        filename may also be a binary file object, read as it is.
+        """
+        self.filename = filename
+        self.mapping = None
+        self.zip = None
+        if hasattr(filename, "read"):
+            source = filename
+        else:
+            with open(filename, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # mmap cannot map an empty file
+                    raise zipfile.BadZipFile("File is not a zip file")
+                self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            source = _MappedFile(self.mapping)
+        try:
+            self.zip = zipfile.ZipFile(source)
+            self.zip.filename = filename
+            self.document, self.styles = main_parts(self.zip)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the zip and the memory map, the parts opened before are no longer readable
+        """
+        if self.zip is not None:
+            self.zip.close()
+        if self.mapping is not None:
+            self.mapping.close()
+
+    def has_part(self, name):
+        return name is not None and name in self.zip.NameToInfo
+
+    def styles_xml(self):
+        """Return the raw XML of the styles part, empty if the document has no styles
+        """
+        return self.zip.read(self.styles) if self.has_part(self.styles) else b""
+
+    def open_document(self):
+        """Return a binary file object decompressing the main document part as it is read
+        """
+        return self.zip.open(self.document)
+
+    def text_package(self):
+        """Return a .docx in memory (uncompressed) holding only the main document and styles parts
+
+        The relationships to the other parts are dropped, the external ones (hyperlinks) are kept.
+        """
+        directory, name = posixpath.split(self.document)
+        document_rels = posixpath.join(directory, "_rels", name + ".rels")
+        kept = set(part for part in (self.document, self.styles) if self.has_part(part))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as package:
+            package.writestr("[Content_Types].xml", self.zip.read("[Content_Types].xml"))
+            package.writestr("_rels/.rels", _kept_rels(self.zip.read("_rels/.rels"), "/", kept))
+            if self.has_part(document_rels):
+                package.writestr(document_rels, _kept_rels(self.zip.read(document_rels), "/" + directory, kept))
+            for part in sorted(kept):
+                with self.zip.open(part) as source, package.open(part, "w") as target:
+                    shutil.copyfileobj(source, target)
+        buffer.seek(0)
+        return buffer
+
+
+def _kept_rels(xml, base, kept):
+    """Relationships part *xml* without the relationships to the internal parts missing from *kept*
+    """
+    rels = etree.fromstring(xml)
+    for rel in list(rels):
+        target = posixpath.normpath(posixpath.join(base, rel.get("Target", ""))).lstrip("/")
+        if rel.get("TargetMode") != "External" and target not in kept:
+            rels.remove(rel)
+    return etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def open_document(filename):
+    """Return the python-docx Document of a .docx, loaded from its main document and styles parts only
+
+    Raise docx.opc.exceptions.PackageNotFoundError when the file is missing or is not a zip, like docx.Document.
+    """
+    # python-docx is only needed by the "docx" engine
+    from docx.api import Document
+    from docx.opc.exceptions import PackageNotFoundError
+    try:
+        package = Package(filename)
+    except (OSError, zipfile.BadZipFile):
+        raise PackageNotFoundError("Package not found at '{0}'".format(filename))
+    with package:
+        return Document(package.text_package())
+
+
+def paragraph_text(p):
+    """Text of a w:p element, the same as python-docx Paragraph.text
+    """
+    chunks = []
+    for child in p.iterchildren(W_R, W_HYPERLINK):
+        runs = (child,) if child.tag == W_R else child.iterchildren(W_R)
+        for r in runs:
+            for item in r.iterchildren():
+                tag = item.tag
+                if tag == W_T:
+                    chunks.append(item.text or "")
+                elif tag == W_BR:
+                    if item.get(W_TYPE, "textWrapping") == "textWrapping":
+                        chunks.append("\n")
+                elif tag in _RUN_TEXT:
+                    chunks.append(_RUN_TEXT[tag])
+    return "".join(chunks)
+
+
+def paragraph_style_id(p):
+    """Value of ./w:pPr/w:pStyle/@w:val, None if not present
+    """
+    pPr = p.find(qn("w:pPr"))
+    if pPr is None:
+        return None
+    pStyle = pPr.find(qn("w:pStyle"))
+    if pStyle is None:
+        return None
+    return pStyle.get(W_VAL)
+
+
+def _int_val(parent, tag, default):
+    """Integer value of the w:val attribute of the *tag* child of *parent*
+    """
+    if parent is None:
+        return default
+    child = parent.find(tag)
+    if child is None:
+        return default
+    return int(child.get(W_VAL))
+
+
+class StreamStyle(object):
+    """Paragraph style, only the name is known
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class StyleSheet(object):
+    """Paragraph styles of word/styles.xml, resolved like python-docx styles.get_by_id()
+    """
+
+    def __init__(self, xml=None):
+        """Constructor
+        """
+        self.styles = {}
+        self.default = None
+        if xml is None:
+            return
+        root = etree.fromstring(xml)
+        for style in root.iterchildren(qn("w:style")):
+            style_id = style.get(qn("w:styleId"))
+            is_paragraph = style.get(W_TYPE) == "paragraph"
+            name = style.find(qn("w:name"))
+            if name is not None:
+                name = name.get(W_VAL)
+                name = _UI_STYLE_NAMES.get(name, name)
+            entry = StreamStyle(name) if is_paragraph else None
+            if style_id is not None:
+                self.styles.setdefault(style_id, entry)
+            # the last default paragraph style wins
+            if is_paragraph and style.get(qn("w:default")) in ("1", "true", "on"):
+                self.default = entry
+
+    def get(self, style_id):
+        """Return the paragraph style matching *style_id*, the default style if not found
+        """
+        style = self.styles.get(style_id) if style_id else None
+        if style is None:
+            return self.default
+        return style
+
+
+class StreamParagraph(object):
+    """Snapshot of a w:p element
+    """
+    __slots__ = ("style_id", "style", "text", "xml")
+
+    def __init__(self, p, styles):
+        """Constructor
+        """
+        self.style_id = paragraph_style_id(p)
+        self.style = styles.get(self.style_id)
+        self.text = paragraph_text(p)
+        self.xml = None
+
+
+class StreamCell(object):
+    """Snapshot of a w:tc element, only the paragraphs directly in the cell are kept
+    """
+    __slots__ = ("paragraphs",)
+
+    def __init__(self, tc, styles):
+        """Constructor
+        """
+        self.paragraphs = [StreamParagraph(p, styles) for p in tc.iterchildren(W_P)]
+
+    @property
+    def text(self):
+        return "\n".join(p.text for p in self.paragraphs)
+
+
+class StreamRow(object):
+    """Snapshot of a w:tr element
+    """
+    __slots__ = ("grid_before", "tcs", "above", "_cells")
+
+    def __init__(self, grid_before, tcs, above):
+        """Constructor
+
+        tcs is a list of (cell, grid_span, vmerge) tuples
+        """
+        self.grid_before = grid_before
+        self.tcs = tcs
+        self.above = above
+        self._cells = None
+
+    def tc_at_grid_offset(self, grid_offset):
+        """Return the index of the tc starting exactly at *grid_offset*
+        """
+        remaining_offset = grid_offset - self.grid_before
+        for index, tc in enumerate(self.tcs):
+            if remaining_offset < 0:
+                break
+            if remaining_offset == 0:
+                return index
+            remaining_offset -= tc[1]
+        raise ValueError("no `tc` element at grid_offset={0}".format(grid_offset))
+
+    def iter_tc_cells(self, index):
+        """Generate the cell of the tc at *index* once per spanned grid column
+        """
+        cell, grid_span, vmerge = self.tcs[index]
+        if vmerge == "continue":
+            if self.above is None:
+                raise ValueError("no tr above topmost tr in w:tbl")
+            grid_offset = self.grid_before + sum(tc[1] for tc in self.tcs[:index])
+            yield from self.above.iter_tc_cells(self.above.tc_at_grid_offset(grid_offset))
+            return
+        for _ in range(grid_span):
+            yield cell
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            self._cells = tuple(cell for index in range(len(self.tcs)) for cell in self.iter_tc_cells(index))
+        return self._cells
+
+
+class StreamColumn(object):
+    """Column of a StreamTable
+    """
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def cells(self):
+        return tuple(self.table.column_cells(self.index))
+
+
+class StreamTable(object):
+    """Snapshot of a w:tbl element, with the layout grid of python-docx (docx.table.Table)
+    """
+
+    def __init__(self, tbl, styles):
+        """Constructor
+        """
+        grid = tbl.find(qn("w:tblGrid"))
+        self.column_count = len(grid.findall(qn("w:gridCol")))
+        self.rows = []
+        above = None
+        for tr in tbl.iterchildren(W_TR):
+            tcs = []
+            for tc in tr.iterchildren(W_TC):
+                tcPr = tc.find(qn("w:tcPr"))
+                vmerge = None if tcPr is None else tcPr.find(qn("w:vMerge"))
+                if vmerge is not None:
+                    vmerge = vmerge.get(W_VAL, "continue")
+                tcs.append((StreamCell(tc, styles), _int_val(tcPr, qn("w:gridSpan"), 1), vmerge))
+            row = StreamRow(_int_val(tr.find(qn("w:trPr")), qn("w:gridBefore"), 0), tcs, above)
+            self.rows.append(row)
+            above = row
+        self.columns = [StreamColumn(self, index) for index in range(self.column_count)]
+        self._grid = None
+        self.xml = None
+
+    @property
+    def _cells(self):
+        """One cell per position of the layout grid, spanned cells are repeated
+        """
+        if self._grid is None:
+            cells = []
+            for row in self.rows:
+                for cell, grid_span, vmerge in row.tcs:
+                    for grid_span_idx in range(grid_span):
+                        if vmerge == "continue":
+                            cells.append(cells[-self.column_count])
+                        elif grid_span_idx > 0:
+                            cells.append(cells[-1])
+                        else:
+                            cells.append(cell)
+            self._grid = cells
+        return self._grid
+
+    def cell(self, row_idx, col_idx):
+        """Cell at row_idx, col_idx intersection
+        """
+        return self._cells[col_idx + row_idx * self.column_count]
+
+    def column_cells(self, column_idx):
+        """Cells in the column at column_idx
+        """
+        cells = self._cells
+        return [cells[idx] for idx in range(column_idx, len(cells), self.column_count)]
+
+
+class RawTable(object):
+    """Serialized w:tbl element, snapshotted into a StreamTable by attach() in the process reading it
+    """
+    __slots__ = ("xml",)
+
+    def __init__(self, xml):
+        self.xml = xml
+
+
+def detach(block, styles):
+    """Return a picklable copy of a paragraph or table, to be read in another process
+
+    python-docx paragraphs are snapshotted with the StyleSheet *styles*, python-docx tables are serialized.
+    """
+    if isinstance(block, (StreamParagraph, StreamTable, RawTable)):
+        return block
+    element = block._element
+    if element.tag == W_P:
+        return StreamParagraph(element, styles)
+    return RawTable(etree.tostring(element))
+
+
+def attach(block, styles):
+    """Return the StreamTable of a RawTable, read with the StyleSheet *styles*, other blocks as they are
+    """
+    if isinstance(block, RawTable):
+        return StreamTable(etree.fromstring(block.xml), styles)
+    return block
+
+
+# paragraph and table classes of both engines, the python-docx ones are added once python-docx is loaded
+_BLOCK_TYPES = ((StreamParagraph,), (StreamTable,))
+
+
+def block_types():
+    """Return (paragraph classes, table classes) for the isinstance tests on the blocks of either engine
+
+    The python-docx classes are only looked up when python-docx has been imported: a python-docx block cannot exist
+    before, and the "stream" engine never imports it.
+    """
+    global _BLOCK_TYPES
+    if len(_BLOCK_TYPES[0]) == 1 and "docx" in sys.modules:
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+        _BLOCK_TYPES = ((Paragraph, StreamParagraph), (Table, StreamTable))
+    return _BLOCK_TYPES
+
+
+def styles_xml(filename):
+    """Return the raw XML of the styles part, empty if the document has no styles
+    """
+    with Package(filename) as package:
+        return package.styles_xml()
+
+
+def iter_block_items(filename, raw=False, tables=True):
+    """Generate a StreamParagraph or a StreamTable for each paragraph and table child of the body, in document order
+
+    The handled subtree is cleared before the next one is parsed.
+    With raw=True the serialized w:p or w:tbl element is kept in the xml attribute of each block.
+    With tables=False the tables are generated as RawTable, left to attach() in a worker process
+    or when a section is not found in the cache.
+    """
+    with Package(filename) as package:
+        styles = StyleSheet(package.styles_xml() or None)
+        with package.open_document() as source:
+            for _, elem in etree.iterparse(source, events=("end",), tag=(W_P, W_TBL)):
+                parent = elem.getparent()
+                if parent is None or parent.tag != W_BODY:
+                    continue
+                if elem.tag == W_P:
+                    block = StreamParagraph(elem, styles)
+                elif tables:
+                    block = StreamTable(elem, styles)
+                else:
+                    block = RawTable(etree.tostring(elem))
+                if raw and block.xml is None:
+                    block.xml = etree.tostring(elem)
+                yield block
+                # drop this block and everything before it
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     fakeserver.py
+#
+"""Local stand-in of the TestLink XML-RPC API, to test the uploader offline
+
+    python -m testlink_tools.fakeserver [--port 8090] [--devkey KEY] [--latency SECONDS] [--fail-every N]
+
+Only the methods used by testlink_tools.upload are served, the created objects are kept in memory.
+The server keeps the HTTP/1.1 connections alive, counts the connections and the requests, and can
+add a latency to each call or answer "503 Service Unavailable" to inject failures.
+"""
+import argparse
+import itertools
+import sys
+import threading
+import time
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+API_PATH = "/lib/api/xmlrpc/v1/xmlrpc.php"
+# error codes of the TestLink API
+ERROR_INVALID_DEVKEY = 2000
+ERROR_NO_PROJECT = 7011
+ERROR_NO_PARENT = 8000
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    """Keep-alive handler counting the connections and injecting failures"""
+    protocol_version = "HTTP/1.1"
+    rpc_paths = (API_PATH, "/RPC2")
+
+    def setup(self):
+        SimpleXMLRPCRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        if self.server.should_fail():
+            # read the request to keep the connection usable
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            self.send_response(503)
+            self.send_header("Content-length", "0")
+            self.end_headers()
+            return
+        SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTestLink(ThreadingMixIn, SimpleXMLRPCServer):
+    """In-memory TestLink XML-RPC server running in a background thread
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, devkey="devkey", project="PROJECT", latency=0.0, fail_every=0):
+        """Constructor, port 0 selects a free port
+
+        latency is added to each call, every fail_every-th request is answered with an HTTP 503 (0: never).
+        """
+        SimpleXMLRPCServer.__init__(self, (host, port), requestHandler=_RequestHandler,
+                                    logRequests=False, allow_none=True)
+        self.devkey = devkey
+        self.latency = latency
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+        self.ids = itertools.count(1)
+        self.projects = {project: {"id": str(next(self.ids)), "name": project, "prefix": project[:3]}}
+        # created objects by id
+        self.testsuites = {}
+        self.testcases = {}
+        self.reqspecs = {}
+        self.requirements = {}
+        self.thread = None
+        for name in ("checkDevKey", "getTestProjectByName", "getFirstLevelTestSuitesForTestProject",
+                     "createTestSuite", "createTestCase", "createRequirementSpec", "createRequirement"):
+            self.register_function(getattr(self, "_" + name), "tl." + name)
+
+    @property
+    def url(self):
+        """URL of the API"""
+        host, port = self.server_address[:2]
+        return "http://{0}:{1}{2}".format(host, port, API_PATH)
+
+    def start(self):
+        """Serve in a background thread, return self"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def should_fail(self):
+        """Count a request, return True if it must be answered with a failure"""
+        with self.lock:
+            self.requests += 1
+            if self.fail_every and self.requests % self.fail_every == 0:
+                self.failures += 1
+                return True
+        return False
+
+    def __call(self, args):
+        """Common checks of the API calls, return an error list or None"""
+        if self.latency:
+            time.sleep(self.latency)
+        if args.get("devKey") != self.devkey:
+            return [{"code": ERROR_INVALID_DEVKEY, "message": "Can not authenticate client: invalid developer key"}]
+        return None
+
+    def __create(self, table, parent_table, parent_field, args, fields, required=True):
+        """Store a new object of table with the fields of args, return the TestLink answer
+
+        args[parent_field] is the id of the parent in parent_table, optional if not required.
+        """
+        error = self.__call(args)
+        if error is not None:
+            return error
+        parent = args.get(parent_field)
+        if (required or parent is not None) and parent not in parent_table:
+            return [{"code": ERROR_NO_PARENT, "message": "{0} {1} does not exist".format(parent_field, parent)}]
+        with self.lock:
+            identifier = str(next(self.ids))
+            table[identifier] = dict((field, args.get(field)) for field in fields)
+        return [{"operation": "create", "status": True, "id": identifier, "message": "Success!"}]
+
+    def _checkDevKey(self, args):
+        return self.__call(args) is None
+
+    def _getTestProjectByName(self, args):
+        error = self.__call(args)
+        if error is not None:
+            return error
+        project = self.projects.get(args.get("testprojectname"))
+        if project is None:
+            return [{"code": ERROR_NO_PROJECT, "message": "Test project does not exist"}]
+        return project
+
+    def _getFirstLevelTestSuitesForTestProject(self, args):
+        error = self.__call(args)
+        if error is not None:
+            return error
+        with self.lock:
+            return [{"id": identifier, "name": suite["testsuitename"]} for identifier, suite in self.testsuites.items()
+                    if suite["parentid"] in (None, args.get("testprojectid"))]
+
+    def _createTestSuite(self, args):
+        return self.__create(self.testsuites, self.testsuites, "parentid", args,
+                             ("testprojectid", "testsuitename", "details", "parentid", "order"), required=False)
+
+    def _createTestCase(self, args):
+        return self.__create(self.testcases, self.testsuites, "testsuiteid", args,
+                             ("testprojectid", "testsuiteid", "testcasename", "summary", "preconditions",
+                              "steps", "order", "authorlogin"))
+
+    def _createRequirementSpec(self, args):
+        return self.__create(self.reqspecs, self.reqspecs, "parentid", args,
+                             ("testprojectid", "parentid", "docid", "title", "scope", "type"), required=False)
+
+    def _createRequirement(self, args):
+        return self.__create(self.requirements, self.reqspecs, "reqspecid", args,
+                             ("testprojectid", "reqspecid", "docid", "title", "scope", "status", "type",
+                              "expected_coverage"))
+
+
+def main(argv=None):
+    """Run the server in the foreground"""
+    parser = argparse.ArgumentParser(prog="python -m testlink_tools.fakeserver",
+                                     description="local stand-in of the TestLink XML-RPC API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--devkey", default="devkey")
+    parser.add_argument("--project", default="PROJECT")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each call")
+    parser.add_argument("--fail-every", type=int, default=0, metavar="N", help="answer HTTP 503 to every N-th request")
+    args = parser.parse_args(argv)
+    server = FakeTestLink(args.host, args.port, args.devkey, args.project, args.latency, args.fail_every)
+    sys.stdout.write("serving {0}\n".format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout.write("{0} connections, {1} requests, {2} failures\n".format(
+            server.connections, server.requests, server.failures))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     merge.py
+#
+"""Merge of several generated TestLink XML files into a single import
+
+    with open("project.xml", "w", encoding="utf-8") as out:
+        report = merge(["srs.xml", "fw-requirements.xml"], out)
+
+The inputs are all requirements documents (written as one <requirement-specification>) or all test procedures
+(written as one top-level <testsuite>). They are read one specification or Test Suite at a time
+(testlink_xml.iter_reqspecs / iter_testsuites) and written at once, the memory does not grow with the inputs
+but for the keys of the duplicate checks.
+
+Each converted document numbers its specifications from 1 (doc_id "V1.0-SRS1", "V1.0-SRS2"...) and its
+Test Suites and Test Cases from 1, so the merged file is renumbered:
+    the doc_id of a specification keeps its prefix, the number follows the specifications of that prefix
+    the node_order of the specifications, Test Suites and Test Cases follows the merged file
+Duplicates are dropped, the first one is kept: the requirements by docid, the Test Cases by Test Suite and name.
+A specification or a Test Suite whose entries are all duplicates is dropped as well.
+"""
+import re
+
+from lxml import etree
+
+from testlink_tools import testlink_xml
+from testlink_tools.xmlwriter import XMLWriter
+
+KIND_REQUIREMENTS = "requirements"
+KIND_TESTCASES = "testcases"
+_ROOT_KINDS = {"requirement-specification": KIND_REQUIREMENTS, "testsuite": KIND_TESTCASES}
+_DOC_ID_NUMBER = re.compile(r"\d+$")
+
+
+def document_kind(filename):
+    """Return KIND_REQUIREMENTS or KIND_TESTCASES from the root element of a TestLink XML file
+    """
+    for _, elem in etree.iterparse(filename, events=("start",)):
+        if elem.tag not in _ROOT_KINDS:
+            raise ValueError("{0}: unexpected root element <{1}>".format(filename, elem.tag))
+        return _ROOT_KINDS[elem.tag]
+    raise ValueError("{0}: empty document".format(filename))
+
+
+def _report(kind, sources):
+    return {"kind": kind, "inputs": len(sources), "specifications": 0, "requirements": 0, "testsuites": 0,
+            "testcases": 0, "duplicates": []}
+
+
+def merge_requirements(sources, out):
+    """Merge requirements XML files (filenames or binary file objects) into the file handle out, return a report
+
+    The report counts the specifications and requirements written and lists the docids of the dropped duplicates.
+    """
+    report = _report(KIND_REQUIREMENTS, sources)
+    writer = XMLWriter(out)
+    writer.write(testlink_xml.XML_HEADER + '\n' + testlink_xml.XML_REQ_DOC_START)
+    docids = set()
+    numbers = {}
+    opened = False
+    for source in sources:
+        for spec in testlink_xml.iter_reqspecs(source):
+            requirements = []
+            for requirement in spec.requirements:
+                if requirement.docid in docids:
+                    report["duplicates"].append(requirement.docid)
+                    continue
+                docids.add(requirement.docid)
+                requirements.append(requirement)
+            if spec.requirements and not requirements:
+                continue
+            # the requirements outside any specification stay in the previous one
+            if spec.doc_id is not None:
+                if opened:
+                    writer.write('\n' + testlink_xml.XML_SPEC_STOP)
+                prefix = _DOC_ID_NUMBER.sub("", spec.doc_id)
+                numbers[prefix] = numbers.get(prefix, 0) + 1
+                spec.doc_id = prefix + str(numbers[prefix])
+                report["specifications"] += 1
+                spec.node_order = report["specifications"]
+                testlink_xml.write_reqspec_start(spec, writer)
+                opened = True
+            for requirement in requirements:
+                testlink_xml.write_requirement(requirement, writer)
+            report["requirements"] += len(requirements)
+    if opened:
+        writer.write('\n' + testlink_xml.XML_SPEC_STOP)
+    writer.write('\n' + testlink_xml.XML_REQ_DOC_STOP)
+    return report
+
+
+def merge_testsuites(sources, out):
+    """Merge test procedure XML files (filenames or binary file objects) into the file handle out, return a report
+
+    The report counts the Test Suites and Test Cases written and lists the "<Test Suite>/<Test Case>"
+    names of the dropped duplicates.
+    """
+    report = _report(KIND_TESTCASES, sources)
+    writer = XMLWriter(out)
+    writer.write(testlink_xml.XML_TS_DOC_START)
+    names = set()
+    for source in sources:
+        for testsuite in testlink_xml.iter_testsuites(source):
+            testcases = []
+            for testcase in testsuite.testcases:
+                key = (testsuite.name, testcase.name)
+                if key in names:
+                    report["duplicates"].append("{0}/{1}".format(*key))
+                    continue
+                names.add(key)
+                report["testcases"] += 1
+                testcase.node_order = report["testcases"]
+                testcases.append(testcase)
+            if testsuite.testcases and not testcases:
+                continue
+            testsuite.testcases = testcases
+            if testsuite.name is None:
+                # the Test Cases outside any Test Suite
+                for testcase in testcases:
+                    testlink_xml.write_testcase(testcase, writer)
+                continue
+            report["testsuites"] += 1
+            testsuite.node_order = report["testsuites"]
+            testlink_xml.write_testsuite(testsuite, writer)
+    writer.write(testlink_xml.XML_TS_DOC_STOP)
+    return report
+
+
+def merge(filenames, out):
+    """Merge TestLink XML files of the same kind into the file handle out, return the report of the merge
+    """
+    kinds = set(document_kind(filename) for filename in filenames)
+    if not kinds:
+        raise ValueError("no file to merge")
+    if len(kinds) != 1:
+        raise ValueError("cannot merge requirements documents with test procedures")
+    if kinds.pop() == KIND_REQUIREMENTS:
+        return merge_requirements(filenames, out)
+    return merge_testsuites(filenames, out)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     model.py
+#
+"""Intermediate model of the converted documents, between the parsing of the .docx and the serializers
+
+    ReqSpec       requirement specification, a "requirements" Heading 2 section
+    Requirement   one requirement table
+    TestSuite     a "Test Suite" Heading 2 section
+    TestCase      one test case table
+    Step          one step row of a test case table
+
+The converters fill the model in a single pass and drop the python-docx objects (or stream snapshots)
+as soon as a table is read. The texts are kept as written in the XML: the titles and names are plain text,
+the details, preconditions, actions and expected results are the HTML of the cell paragraphs.
+testlink_tools.testlink_xml writes the model as TestLink XML, parse() of the converters returns it
+to write other formats without parsing the document again.
+"""
+
+
+class _Model(object):
+    """Common helpers of the model classes, the fields are the __slots__ of each class
+    """
+    __slots__ = ()
+
+    def as_dict(self):
+        """Return the fields as a dict, the nested entries as lists of dicts
+        """
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = [item.as_dict() for item in value]
+            result[name] = value
+        return result
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(
+            "{0}={1!r}".format(name, getattr(self, name)) for name in self.__slots__))
+
+
+class Requirement(_Model):
+    """Requirement, the fields of a requirement table
+    """
+    __slots__ = ("docid", "title", "version", "revision", "node_order", "description", "status", "type",
+                 "expected_coverage")
+
+    def __init__(self, docid="", title="", version=1, revision=1, node_order=0, description="", status="V", type=2,
+                 expected_coverage=0):
+        """Constructor
+        """
+        self.docid = docid
+        self.title = title
+        self.version = version
+        self.revision = revision
+        self.node_order = node_order
+        self.description = description
+        self.status = status
+        self.type = type
+        self.expected_coverage = expected_coverage
+
+
+class ReqSpec(_Model):
+    """Requirement specification and its requirements
+
+    A ReqSpec with a doc_id None holds the requirements found before the first specification.
+    """
+    __slots__ = ("title", "doc_id", "version", "type", "node_order", "total_req", "scope", "requirements")
+
+    def __init__(self, title, doc_id, version=1, type=3, node_order=1, total_req=0, scope="", requirements=None):
+        """Constructor
+        """
+        self.title = title
+        self.doc_id = doc_id
+        self.version = version
+        self.type = type
+        self.node_order = node_order
+        self.total_req = total_req
+        self.scope = scope
+        self.requirements = requirements if requirements is not None else []
+
+
+class Step(_Model):
+    """Step of a Test Case, actions and expectedresults are None when the row has no such cell
+    """
+    __slots__ = ("number", "actions", "expectedresults")
+
+    def __init__(self, number, actions=None, expectedresults=None):
+        """Constructor
+        """
+        self.number = number
+        self.actions = actions
+        self.expectedresults = expectedresults
+
+
+class TestCase(_Model):
+    """Test Case and its steps
+
+    name is None when the table has no name row, preconditions is None when it has no preconditions row.
+    """
+    __slots__ = ("name", "node_order", "preconditions", "steps")
+
+    def __init__(self, name, node_order=0, preconditions=None, steps=None):
+        """Constructor
+        """
+        self.name = name
+        self.node_order = node_order
+        self.preconditions = preconditions
+        self.steps = steps if steps is not None else []
+
+
+class TestSuite(_Model):
+    """Test Suite and its Test Cases
+    """
+    __slots__ = ("name", "details", "node_order", "testcases")
+
+    def __init__(self, name, details, node_order, testcases=None):
+        """Constructor
+        """
+        self.name = name
+        self.details = details
+        self.node_order = node_order
+        self.testcases = testcases if testcases is not None else []
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     parallel.py
+#
+"""Section-level parallel conversion of a single document
+
+The conversion of a block is split in two steps:
+1. read: the state-independent work (table snapshots, requirement fields, Test Case rendering)
+   turns a paragraph or a table into an event, a picklable tuple
+2. replay: the converter applies the events to its scan state in document order and writes the XML
+
+With jobs > 1 the body is split at the Heading 2 boundaries and the sections are read by a pool of
+worker processes, while the main process replays the events of the sections in document order.
+The counters (spec_id, node_order, TS/TC numbering) only live in the replay, so the XML is the same
+as the sequential conversion, which runs both steps block by block.
+"""
+from collections import deque
+
+from testlink_tools import docxstream
+
+# kinds of events, the first item of the tuple
+EVENT_PARAGRAPH = "paragraph"
+EVENT_TABLE = "table"
+
+# sections submitted ahead of the one being replayed, per worker
+PENDING_PER_JOB = 2
+
+
+def read_section(read, styles, blocks):
+    """Return the events of the detached blocks of a section, read by read(block) in a worker process
+    """
+    return [read(docxstream.attach(block, styles)) for block in blocks]
+
+
+def map_sections(read, styles, sections, jobs):
+    """Generate (section, events) for each section of blocks, in document order
+
+    The sections are read by read(block) in *jobs* worker processes, the tables of the docx engine
+    are sent serialized and read with the StyleSheet *styles*.
+    At most PENDING_PER_JOB * jobs sections are in flight, so the memory does not grow with the document.
+    """
+    # multiprocessing is only imported by the parallel conversions
+    from concurrent.futures import ProcessPoolExecutor
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for section in sections:
+            detached = [docxstream.detach(block, styles) for block in section]
+            pending.append((section, executor.submit(read_section, read, styles, detached)))
+            if len(pending) >= PENDING_PER_JOB * jobs:
+                section, future = pending.popleft()
+                yield section, future.result()
+        while pending:
+            section, future = pending.popleft()
+            yield section, future.result()
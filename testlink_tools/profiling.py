@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     profiling.py
+#
+"""Timings and counters of a conversion, per phase and per Heading 2 section
+
+A Profile is given to Requirement.docx_to_XML / DocXML.docx_to_xml (and their iter/write variants):
+
+    profile = Profile()
+    DocXML(filename, engine="stream").docx_to_xml(profile=profile)
+    print(profile.format())   # or profile.report() for a JSON serializable dict
+
+The phases are exclusive, the time of a phase entered inside another one is only counted once:
+    open      opening the .docx package with python-docx (the stream engine opens it while reading the first block)
+    parse     reading the next paragraph or table of the body
+    classify  resolving the style of the paragraphs to find the Heading 2 sections
+    walk      the rest of the scan of a paragraph or table
+    tables    reading the requirement tables and the test case tables
+    emit      writing the XML
+    cache     fingerprints, reads and writes of the section cache
+    workers   waiting for the sections read by the worker processes (jobs > 1), the phases of the
+              workers themselves are not recorded
+
+The counters only count the work done: a section taken from the cache counts as a cached section.
+
+capture="cprofile" or capture="tracemalloc" adds the most expensive functions or allocation sites to the report.
+"""
+import io
+import time
+import tracemalloc
+from collections import OrderedDict
+
+PHASES = ("open", "parse", "classify", "walk", "tables", "emit", "cache", "workers")
+CAPTURE_CPROFILE = "cprofile"
+CAPTURE_TRACEMALLOC = "tracemalloc"
+CAPTURES = (CAPTURE_CPROFILE, CAPTURE_TRACEMALLOC)
+
+
+class _Phase(object):
+    """Context manager adding its duration, less the duration of the nested phases, to a phase of a Profile
+    """
+    __slots__ = ("profile", "name", "start", "nested")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.profile._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = self.profile._stack
+        stack.pop()
+        self.profile.phases[self.name] += elapsed - self.nested
+        if stack:
+            stack[-1].nested += elapsed
+        return False
+
+
+class _NoPhase(object):
+    """Context manager doing nothing, the phases of a NullProfile"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullProfile(object):
+    """Profile recording nothing, used by the converters when no profile is given
+    """
+    _NO_PHASE = _NoPhase()
+
+    def start(self, converter, filename, engine):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name):
+        return NullProfile._NO_PHASE
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def timed(self, name, function):
+        return function
+
+    def iter_timed(self, name, iterable):
+        return iterable
+
+    def begin_section(self, block):
+        pass
+
+    def end_section(self, cached=False, bytes_written=0):
+        pass
+
+
+NULL_PROFILE = NullProfile()
+
+
+class Profile(NullProfile):
+    """Timings and counters of one or more conversions
+    """
+
+    def __init__(self, capture=None, top=20):
+        """Constructor, capture is None, "cprofile" or "tracemalloc", top the number of captured entries reported
+        """
+        if capture is not None and capture not in CAPTURES:
+            raise ValueError("unknown capture {0}, expected one of {1}".format(capture, CAPTURES))
+        self.capture = capture
+        self.top = top
+        self.runs = []
+        self.seconds = 0.0
+        self.phases = OrderedDict((name, 0.0) for name in PHASES)
+        self.counters = OrderedDict()
+        self.sections = []
+        self._stack = []
+        self._section = None
+        self._start = None
+        self._profiler = None
+        self._tracing = False
+        self._peak = 0
+        self._snapshot = None
+
+    def start(self, converter, filename, engine):
+        """Start the recording of a conversion"""
+        self.runs.append({"converter": converter, "filename": filename, "engine": engine})
+        if self.capture == CAPTURE_CPROFILE:
+            if self._profiler is None:
+                # cProfile and pstats are only imported by the captures
+                import cProfile
+                self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.capture == CAPTURE_TRACEMALLOC:
+            # keep the tracing of the caller running
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+
+    def stop(self):
+        """Stop the recording of a conversion"""
+        self.seconds += time.perf_counter() - self._start
+        if self.capture == CAPTURE_CPROFILE:
+            self._profiler.disable()
+        elif self.capture == CAPTURE_TRACEMALLOC:
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self._snapshot = tracemalloc.take_snapshot()
+            if self._tracing:
+                tracemalloc.stop()
+
+    def phase(self, name):
+        """Return a context manager timing the phase *name*"""
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        """Add *seconds* measured elsewhere to the phase *name*"""
+        self.phases[name] += seconds
+
+    def count(self, name, value=1):
+        """Add *value* to the counter *name*, of the conversion and of the current section"""
+        self.counters[name] = self.counters.get(name, 0) + value
+        if self._section is not None:
+            counters = self._section["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def timed(self, name, function):
+        """Return *function* timed in the phase *name*"""
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def iter_timed(self, name, iterable):
+        """Generate the items of *iterable*, the time of each step is counted in the phase *name*"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def __elapsed(self):
+        return sum(self.phases.values())
+
+    def begin_section(self, block):
+        """Start the recording of a Heading 2 section, *block* is its first paragraph or table"""
+        # the Heading 2 title, or the first paragraph of the text before the first section
+        title = getattr(block, "text", "")
+        self._section = {"title": title, "seconds": self.__elapsed(), "cached": False,
+                         "bytes_written": 0, "counters": OrderedDict()}
+
+    def end_section(self, cached=False, bytes_written=0):
+        """End the recording of the current section, *bytes_written* is the size of its XML in UTF-8"""
+        section = self._section
+        section["seconds"] = self.__elapsed() - section["seconds"]
+        section["cached"] = cached
+        section["bytes_written"] = bytes_written
+        self.sections.append(section)
+        self._section = None
+        self.count("cached_sections" if cached else "sections")
+
+    def __capture_report(self):
+        if self.capture == CAPTURE_CPROFILE and self._profiler is not None:
+            import pstats
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            stats.sort_stats(pstats.SortKey.CUMULATIVE)
+            functions = []
+            for function in stats.fcn_list[:self.top]:
+                primitive, calls, tottime, cumtime, _ = stats.stats[function]
+                functions.append({"function": "{0}:{1}({2})".format(*function), "calls": calls,
+                                  "tottime": tottime, "cumtime": cumtime})
+            return {"mode": self.capture, "functions": functions}
+        if self.capture == CAPTURE_TRACEMALLOC and self._snapshot is not None:
+            allocations = []
+            for stat in self._snapshot.statistics("lineno")[:self.top]:
+                frame = stat.traceback[0]
+                allocations.append({"location": "{0}:{1}".format(frame.filename, frame.lineno),
+                                    "size": stat.size, "count": stat.count})
+            return {"mode": self.capture, "peak_bytes": self._peak, "allocations": allocations}
+        return None
+
+    def report(self):
+        """Return the recorded timings and counters as a JSON serializable dict"""
+        report = OrderedDict()
+        report["runs"] = self.runs
+        report["seconds"] = self.seconds
+        report["phases"] = dict(self.phases)
+        report["counters"] = dict(self.counters)
+        report["sections"] = [dict(section, counters=dict(section["counters"])) for section in self.sections]
+        capture = self.__capture_report()
+        if capture is not None:
+            report["capture"] = capture
+        return report
+
+    def dump_stats(self, filename):
+        """Save the cProfile statistics to *filename* (for pstats, snakeviz...)"""
+        if self._profiler is None:
+            raise ValueError("no cProfile capture recorded")
+        self._profiler.dump_stats(filename)
+
+    def format(self):
+        """Return the report as text"""
+        lines = ["{0:.3f} s".format(self.seconds)]
+        for name, seconds in self.phases.items():
+            lines.append("  {0:<10} {1:>9.3f} s".format(name, seconds))
+        for name, value in self.counters.items():
+            lines.append("  {0:<18} {1:>10}".format(name, value))
+        for section in self.sections:
+            lines.append("  {0:>9.3f} s {1:>10} B {2} {3}".format(
+                section["seconds"], section["bytes_written"], "cached" if section["cached"] else "      ",
+                section["title"]))
+        capture = self.__capture_report()
+        if capture is not None and capture["mode"] == CAPTURE_CPROFILE:
+            for function in capture["functions"]:
+                lines.append("  {0:>9.3f} s {1:>8} {2}".format(function["cumtime"], function["calls"], function["function"]))
+        elif capture is not None:
+            lines.append("  peak {0} B".format(capture["peak_bytes"]))
+            for allocation in capture["allocations"]:
+                lines.append("  {0:>10} B {1:>8} {2}".format(allocation["size"], allocation["count"], allocation["location"]))
+        return "\n".join(lines)
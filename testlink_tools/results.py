@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     results.py
+#
+"""TestLink execution results import (<results>) written from the logs of a test bench
+
+    index = CaseIndex.from_file("procedure.docx")       # or the .xml of the procedure
+    index.load_ids("procedure.xml.upload.jsonl")        # the TestLink ids recorded by the upload
+    with open("results.xml", "w", encoding="utf-8") as out:
+        report = write_results(iter_executions(iter_log_records(["bench.csv"])), index, out,
+                               testplan="Campaign 1", build="FW 1.2", tester="bench")
+
+1. The Test Cases and their steps are read once from a test procedure (DocXML.parse, or the generated XML read
+   back by testlink_xml.iter_testsuites) into a name index: "<Test Suite>/<Test Case>" and the Test Case name alone,
+   the runs of white space of the names being compared as one space
+2. The log files are read one record at a time: .csv with a header row, or JSON lines (.jsonl, .ndjson),
+   optionally compressed (.gz). A record holds the Test Case name, the step number (empty for the verdict of the
+   whole Test Case), the verdict, the timestamp and the notes (LOG_FIELDS, some aliases are accepted)
+3. The consecutive records of a Test Case are one execution, written as soon as the next Test Case starts:
+   the memory holds the index and the steps of one execution, whatever the size of the logs.
+   Without a Test Case record, the verdict of an execution is the worst verdict of its steps (f, b, then p)
+
+The records of unknown Test Cases or steps and the unreadable verdicts and timestamps are counted, the first
+*max_issues* of them are listed with their file and line. TestLink finds the Test Case of an execution with its
+id attribute: the internal id recorded by upload in <xml>.upload.jsonl (load_ids), the name attribute is only
+informative and an execution of a Test Case without id is written but counted as "unidentified".
+"""
+import csv
+import datetime
+import gzip
+import json
+import re
+
+from testlink_tools import docxstream, testlink_xml
+from testlink_tools.xmlwriter import XMLWriter, cdata, quoteattr
+
+DEFAULT_MAX_ISSUES = 100
+LOG_FIELDS = ("testcase", "step", "verdict", "timestamp", "notes")
+# the column names or JSON keys accepted for each field
+_ALIASES = {"testcase": ("testcase", "test_case", "test case", "tc", "name"),
+            "step": ("step", "step_number", "step number"),
+            "verdict": ("verdict", "result", "status"),
+            "timestamp": ("timestamp", "time", "date", "datetime"),
+            "notes": ("notes", "note", "comment", "message")}
+PASSED = "p"
+FAILED = "f"
+BLOCKED = "b"
+# worst first
+_VERDICT_ORDER = (FAILED, BLOCKED, PASSED)
+_VERDICTS = {"p": PASSED, "pass": PASSED, "passed": PASSED, "ok": PASSED, "success": PASSED,
+             "f": FAILED, "fail": FAILED, "failed": FAILED, "ko": FAILED, "error": FAILED, "nok": FAILED,
+             "b": BLOCKED, "blocked": BLOCKED}
+# the records of the steps not run are dropped
+_NOT_RUN = frozenset(("n", "not run", "skip", "skipped", "na", "n/a"))
+_STEP_NUMBER = re.compile(r"\d+")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _normalize(name):
+    """Name with its runs of white space (line breaks of the Word cells, double spaces) as one space"""
+    return " ".join(name.split())
+
+
+class _Case(object):
+    """Test Case of the index"""
+    __slots__ = ("testsuite", "name", "steps", "id")
+
+    def __init__(self, testsuite, name, steps):
+        self.testsuite = testsuite
+        self.name = name
+        self.steps = steps
+        self.id = None
+
+
+class CaseIndex(object):
+    """Name index of the Test Cases of a test procedure, built once before reading the logs
+    """
+
+    def __init__(self, testsuites=()):
+        """Constructor, testsuites is an iterable of model.TestSuite
+        """
+        self.keys = {}
+        self.names = {}
+        for testsuite in testsuites:
+            self.add_testsuite(testsuite)
+
+    @classmethod
+    def from_file(cls, filename, engine=docxstream.ENGINE_STREAM):
+        """Return the index of a test procedure, a .docx document or its generated .xml
+        """
+        if filename.lower().endswith(".xml"):
+            return cls(testlink_xml.iter_testsuites(filename))
+        from testcases.testcases import DocXML
+        return cls(DocXML(filename, engine=engine).parse())
+
+    def add_testsuite(self, testsuite):
+        """Index the Test Cases of a model.TestSuite
+        """
+        for testcase in testsuite.testcases:
+            if testcase.name is None:
+                continue
+            case = _Case(testsuite.name or "", testcase.name, frozenset(step.number for step in testcase.steps))
+            self.keys[_normalize(case.testsuite) + "/" + _normalize(case.name)] = case
+            self.names.setdefault(_normalize(case.name), []).append(case)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load_ids(self, checkpoint):
+        """Set the TestLink ids of the Test Cases from the checkpoint file of an upload, return the number set
+        """
+        count = 0
+        with open(checkpoint, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # last line cut by an interruption
+                    continue
+                key = entry.get("key", "")
+                if not key.startswith("testcase:"):
+                    continue
+                testsuite, _, name = key[len("testcase:"):].partition("/")
+                case = self.keys.get(_normalize(testsuite) + "/" + _normalize(name))
+                if case is not None:
+                    case.id = entry["id"]
+                    count += 1
+        return count
+
+    def lookup(self, name):
+        """Return the Test Case of a "<Test Suite>/<Test Case>" key or of a Test Case name
+
+        The runs of white space do not matter. Raise KeyError when the name is unknown or found in several Test Suites.
+        """
+        name = _normalize(name)
+        case = self.keys.get(name)
+        if case is not None:
+            return case
+        cases = self.names.get(name, ())
+        if len(cases) != 1:
+            raise KeyError("Test Case '{0}' {1}".format(
+                name, "unknown" if not cases else "found in several Test Suites, give '<Test Suite>/<Test Case>'"))
+        return cases[0]
+
+
+class Execution(object):
+    """Consecutive records of a Test Case in a log"""
+    __slots__ = ("name", "verdict", "timestamp", "notes", "steps", "source", "line", "records")
+
+    def __init__(self, name, source, line):
+        self.name = name
+        self.verdict = None
+        self.timestamp = ""
+        self.notes = ""
+        # step number: (verdict, notes, line), in the order of the log
+        self.steps = {}
+        self.source = source
+        self.line = line
+        self.records = 0
+
+
+def _field(record, field):
+    for alias in _ALIASES[field]:
+        value = record.get(alias)
+        if value is not None:
+            return str(value).strip()
+    return ""
+
+
+def _open_log(filename):
+    if filename.lower().endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8-sig", newline="")
+    return open(filename, encoding="utf-8-sig", newline="")
+
+
+def iter_log_records(filenames):
+    """Generate (filename, line, record) for each record of the log files, record being a dict of LOG_FIELDS
+
+    A .csv file (or .csv.gz) has a header row, the other files are JSON lines. The blank lines are skipped.
+    """
+    for filename in filenames:
+        stem = filename.lower()[:-3] if filename.lower().endswith(".gz") else filename.lower()
+        with _open_log(filename) as f:
+            if stem.endswith(".csv"):
+                reader = csv.reader(f)
+                header = [name.strip().lower() for name in next(reader, ())]
+                # the column of each field is found once, from the header
+                columns = [next((header.index(alias) for alias in _ALIASES[field] if alias in header), None)
+                           for field in LOG_FIELDS]
+                for row in reader:
+                    if not any(row):
+                        continue
+                    yield filename, reader.line_num, dict(
+                        (field, row[column].strip() if column is not None and column < len(row) else "")
+                        for field, column in zip(LOG_FIELDS, columns))
+                continue
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as error:
+                    raise ValueError("{0}, line {1}: {2}".format(filename, number, error))
+                entry = dict((str(key).strip().lower(), value) for key, value in entry.items())
+                yield filename, number, dict((field, _field(entry, field)) for field in LOG_FIELDS)
+
+
+def iter_executions(records):
+    """Generate the Execution of each run of consecutive records of the same Test Case
+
+    records are the (filename, line, record) of iter_log_records. A step logged twice in an execution keeps
+    its last record.
+    """
+    execution = None
+    for filename, line, record in records:
+        name = record["testcase"]
+        if execution is None or name != execution.name or filename != execution.source:
+            if execution is not None:
+                yield execution
+            execution = Execution(name, filename, line)
+        execution.records += 1
+        step = record["step"]
+        if step:
+            execution.steps.pop(step, None)
+            execution.steps[step] = (record["verdict"], record["notes"], line)
+        else:
+            execution.verdict = record["verdict"]
+            execution.notes = record["notes"]
+        if record["timestamp"]:
+            execution.timestamp = record["timestamp"]
+    if execution is not None:
+        yield execution
+
+
+def parse_verdict(text):
+    """Return PASSED, FAILED or BLOCKED, "" for a step not run; raise ValueError for an unknown verdict
+    """
+    word = text.strip().lower()
+    if word in _NOT_RUN:
+        return ""
+    if word not in _VERDICTS:
+        raise ValueError("unknown verdict '{0}'".format(text))
+    return _VERDICTS[word]
+
+
+def parse_timestamp(text):
+    """Return the TestLink timestamp (TIMESTAMP_FORMAT) of an ISO 8601 date or a number of seconds since the epoch
+
+    Raise ValueError for another text.
+    """
+    text = text.strip()
+    try:
+        seconds = float(text)
+    except ValueError:
+        seconds = None
+    try:
+        if seconds is not None:
+            # out of the platform range ("1e20", "inf") raises OverflowError or OSError
+            moment = datetime.datetime.fromtimestamp(seconds)
+        else:
+            moment = datetime.datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        raise ValueError("unreadable timestamp '{0}'".format(text))
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+class _Report(object):
+    """Counters and first issues of write_results"""
+
+    def __init__(self, max_issues):
+        self.max_issues = max_issues
+        self.counts = {"records": 0, "executions": 0, "steps": 0, "unidentified": 0, "skipped": 0,
+                       "issue_count": 0}
+        self.issues = []
+
+    def issue(self, source, line, message):
+        self.counts["issue_count"] += 1
+        if len(self.issues) < self.max_issues:
+            self.issues.append({"file": source, "line": line, "message": message})
+
+    def report(self):
+        report = dict(self.counts)
+        report["issues"] = self.issues
+        return report
+
+
+def write_results(executions, index, out, testproject=None, prefix=None, testplan=None, build=None, tester=None,
+                  max_issues=DEFAULT_MAX_ISSUES):
+    """Write the TestLink <results> XML of the executions to the file handle out, return a report
+
+    executions are the Execution of iter_executions, index the CaseIndex of the test procedure.
+    testproject, prefix, testplan and build select where TestLink imports the results, when they are not
+    chosen in the import page. The report counts the records, the executions and steps written, the executions
+    without TestLink id, the executions skipped (unknown Test Case, no verdict) and lists the first issues.
+    """
+    report = _Report(max_issues)
+    writer = XMLWriter(out)
+    writer.write(testlink_xml.XML_HEADER + "\n<results>")
+    if testproject is not None:
+        writer.write('\n\t<testproject name="{0}" prefix="{1}"/>'.format(quoteattr(testproject), quoteattr(prefix or "")))
+    if testplan is not None:
+        writer.write('\n\t<testplan name="{0}"/>'.format(quoteattr(testplan)))
+    if build is not None:
+        writer.write('\n\t<build name="{0}"/>'.format(quoteattr(build)))
+    for execution in executions:
+        report.counts["records"] += execution.records
+        try:
+            case = index.lookup(execution.name)
+        except KeyError as error:
+            report.issue(execution.source, execution.line, error.args[0])
+            report.counts["skipped"] += 1
+            continue
+        steps = []
+        for step, (verdict, notes, line) in execution.steps.items():
+            match = _STEP_NUMBER.search(step)
+            if match is None or int(match.group(0)) not in case.steps:
+                report.issue(execution.source, line, "Test Case '{0}' has no step '{1}'".format(case.name, step))
+                continue
+            try:
+                verdict = parse_verdict(verdict)
+            except ValueError as error:
+                report.issue(execution.source, line, str(error))
+                continue
+            if verdict:
+                steps.append((int(match.group(0)), verdict, notes))
+        verdict = ""
+        if execution.verdict is not None:
+            try:
+                verdict = parse_verdict(execution.verdict)
+            except ValueError as error:
+                report.issue(execution.source, execution.line, str(error))
+        if not verdict and steps:
+            verdict = min((step[1] for step in steps), key=_VERDICT_ORDER.index)
+        if not verdict:
+            report.counts["skipped"] += 1
+            continue
+        timestamp = ""
+        if execution.timestamp:
+            try:
+                timestamp = parse_timestamp(execution.timestamp)
+            except ValueError as error:
+                report.issue(execution.source, execution.line, str(error))
+        if case.id is None:
+            report.counts["unidentified"] += 1
+            writer.write('\n\t<testcase name="{0}">'.format(quoteattr(case.name)))
+        else:
+            writer.write('\n\t<testcase id="{0}" name="{1}">'.format(quoteattr(case.id), quoteattr(case.name)))
+        if tester is not None:
+            writer.element("tester", tester, "\n\t\t")
+        if timestamp:
+            writer.element("timestamp", timestamp, "\n\t\t")
+        writer.element("result", verdict, "\n\t\t")
+        writer.element("notes", execution.notes, "\n\t\t", cdata_text=True)
+        if steps:
+            writer.write("\n\t\t<steps>" + "".join(
+                "\n\t\t\t<step><step_number>{0}</step_number><result>{1}</result><notes>{2}</notes></step>"
+                .format(number, step_verdict, cdata(notes)) for number, step_verdict, notes in sorted(steps))
+                + "\n\t\t</steps>")
+        writer.write("\n\t</testcase>")
+        report.counts["executions"] += 1
+        report.counts["steps"] += len(steps)
+    writer.write("\n</results>\n")
+    return report.report()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     spreadsheet.py
+#
+"""Requirements as spreadsheets (.xlsx or .csv), one row per requirement
+
+Export: write_xlsx / write_csv write the model.ReqSpec returned by Requirement.parse()
+Ingestion: spreadsheet_to_xml writes the TestLink XML of a spreadsheet, without python-docx
+
+The first row holds the column names (COLUMNS, in any order, the missing columns take the default values):
+    spec_doc_id, spec_title, scope    the requirement specification, a new one starts when they change
+    docid, title, description         the requirement
+    type                              a type name (TYPE_NAMES) or number
+    status                            a status letter or word (D=Draft, R=Review... V=Valid)
+    version, revision, node_order, expected_coverage
+
+Like docxstream, the .xlsx files are read and written with zipfile and lxml only: the rows of the sheet are
+streamed with iterparse and each one is dropped once read, the sheet is written row by row with inline strings.
+A file written by Excel keeps its texts in a shared strings part, which is loaded once before the rows.
+The memory does not depend on the number of rows, but for the shared strings.
+"""
+import csv
+import posixpath
+import re
+import zipfile
+
+from lxml import etree
+
+from testlink_tools import testlink_xml
+from testlink_tools.docxstream import part_name
+from testlink_tools.model import ReqSpec, Requirement
+from testlink_tools.xmlwriter import XMLWriter, escape, quoteattr
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+
+SPEC_COLUMNS = ("spec_doc_id", "spec_title", "scope")
+COLUMNS = SPEC_COLUMNS + ("docid", "title", "description", "type", "status", "version", "revision", "node_order",
+                          "expected_coverage")
+# type : 1=Informational, 2=Feature, 3=Use Case, 4=User Interface, 5=Non Functional, 6=Constraint, 7=System Function
+TYPE_NAMES = ('Informational', 'Feature', 'Use Case', 'User Interface', 'Non Functional', 'Constraint', 'System Function')
+_TYPES = dict((name, number) for number, name in enumerate(TYPE_NAMES, 1))
+_INTEGER_COLUMNS = ("version", "revision", "node_order", "expected_coverage")
+_DEFAULTS = Requirement()
+
+S_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+RT_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+RT_SHARED_STRINGS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+_ROW = "{%s}row" % S_NS
+_C = "{%s}c" % S_NS
+_V = "{%s}v" % S_NS
+_T = "{%s}t" % S_NS
+_IS = "{%s}is" % S_NS
+_SI = "{%s}si" % S_NS
+_RPH = "{%s}rPh" % S_NS
+# characters not allowed in XML 1.0, dropped from the cells
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+</Types>"""
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="%s" Target="xl/workbook.xml"/></Relationships>""" % RT_OFFICE_DOCUMENT
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="%s" xmlns:r="%s"><sheets><sheet name="{0}" sheetId="1" r:id="rId1"/></sheets></workbook>""" % (S_NS, R_NS)
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" \
+Target="worksheets/sheet1.xml"/></Relationships>"""
+
+
+def spreadsheet_format(filename):
+    """Return FORMAT_CSV or FORMAT_XLSX from the extension of a file name, None for the other files
+    """
+    extension = filename.lower().rsplit(".", 1)[-1]
+    return extension if extension in FORMATS else None
+
+
+def iter_requirement_rows(specs):
+    """Generate the row (the values of COLUMNS) of each requirement of a list of model.ReqSpec
+    """
+    for spec in specs:
+        for requirement in spec.requirements:
+            req_type = requirement.type
+            if isinstance(req_type, int) and 1 <= req_type <= len(TYPE_NAMES):
+                req_type = TYPE_NAMES[req_type - 1]
+            yield (spec.doc_id or "", spec.title or "", spec.scope if spec.doc_id is not None else "",
+                   requirement.docid, requirement.title, requirement.description, req_type, requirement.status,
+                   requirement.version, requirement.revision, requirement.node_order, requirement.expected_coverage)
+
+
+def write_csv(specs, filename):
+    """Write the requirements of a list of model.ReqSpec to a .csv file, return the number of requirements
+    """
+    count = 0
+    # with a BOM, Excel opens the file as UTF-8
+    with open(filename, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in iter_requirement_rows(specs):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _column_name(index):
+    """Letters of the 0-based column *index*: A, B... Z, AA...
+    """
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def _column_index(letters):
+    """0-based index of the column *letters*, the reverse of _column_name
+    """
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def _cell(reference, value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return '<c r="{0}"><v>{1}</v></c>'.format(reference, value)
+    text = _INVALID_XML.sub("", str(value))
+    return '<c r="{0}" t="inlineStr"><is><t xml:space="preserve">{1}</t></is></c>'.format(reference, escape(text))
+
+
+def write_xlsx(specs, filename, sheet="Requirements"):
+    """Write the requirements of a list of model.ReqSpec to an .xlsx file, return the number of requirements
+
+    The sheet is written to the zip row by row.
+    """
+    count = 0
+    letters = [_column_name(index) for index in range(len(COLUMNS))]
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _ROOT_RELS)
+        package.writestr("xl/workbook.xml", _WORKBOOK.format(quoteattr(sheet[:31])))
+        package.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        with package.open("xl/worksheets/sheet1.xml", "w") as part:
+            part.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{0}"><sheetData>'
+                       .format(S_NS).encode("utf-8"))
+            part.write(_row(1, letters, COLUMNS))
+            for number, row in enumerate(iter_requirement_rows(specs), 2):
+                part.write(_row(number, letters, row))
+                count += 1
+            part.write(b"</sheetData></worksheet>")
+    return count
+
+
+def _row(number, letters, values):
+    cells = "".join(_cell(letter + str(number), value) for letter, value in zip(letters, values))
+    return '<row r="{0}">{1}</row>'.format(number, cells).encode("utf-8")
+
+
+def _string_item(si):
+    """Text of a shared string or inline string, without the phonetic runs
+    """
+    return "".join(t.text or "" for t in si.iter(_T) if t.getparent().tag != _RPH)
+
+
+def _first_sheet(package):
+    """Return the zip member names of the first sheet of the workbook and of the shared strings (or None)
+    """
+    workbook = part_name(package, "_rels/.rels", RT_OFFICE_DOCUMENT)
+    if workbook is None:
+        raise ValueError("file '{0}' is not an Excel file, no workbook part".format(package.filename))
+    directory, name = posixpath.split(workbook)
+    rels_name = posixpath.join(directory, "_rels", name + ".rels")
+    sheet = etree.fromstring(package.read(workbook)).find("{%s}sheets/{%s}sheet" % (S_NS, S_NS))
+    if sheet is None:
+        raise ValueError("file '{0}' has no sheet".format(package.filename))
+    rel_id = sheet.get("{%s}id" % R_NS)
+    target = None
+    for rel in etree.fromstring(package.read(rels_name)):
+        if rel.get("Id") == rel_id:
+            target = posixpath.normpath(posixpath.join("/" + directory, rel.get("Target"))).lstrip("/")
+    if target is None:
+        raise ValueError("file '{0}': sheet {1} not found".format(package.filename, rel_id))
+    return target, part_name(package, rels_name, RT_SHARED_STRINGS, "/" + directory)
+
+
+def iter_xlsx_rows(filename):
+    """Generate the values (strings, "" for the empty cells) of each row of the first sheet of an .xlsx file
+    """
+    with zipfile.ZipFile(filename) as package:
+        sheet, shared = _first_sheet(package)
+        strings = []
+        if shared is not None and shared in package.namelist():
+            with package.open(shared) as source:
+                for _, si in etree.iterparse(source, tag=_SI):
+                    strings.append(_string_item(si))
+                    si.clear()
+        columns = {}
+        with package.open(sheet) as source:
+            for _, row in etree.iterparse(source, tag=_ROW):
+                values = []
+                for c in row:
+                    if c.tag != _C:
+                        continue
+                    reference = c.get("r")
+                    if reference is not None:
+                        letters = reference.rstrip("0123456789")
+                        column = columns.get(letters)
+                        if column is None:
+                            column = columns[letters] = _column_index(letters)
+                        if column > len(values):
+                            values.extend([""] * (column - len(values)))
+                    cell_type = c.get("t")
+                    value = ""
+                    # the children are walked rather than searched (find), the cost of a row is in the cells
+                    for child in c:
+                        if child.tag == _V:
+                            value = child.text or ""
+                            break
+                        if child.tag == _IS:
+                            if len(child) == 1 and child[0].tag == _T:
+                                # a single run, as written by write_xlsx
+                                value = child[0].text or ""
+                            else:
+                                value = _string_item(child)
+                            break
+                    if cell_type == "s" and value:
+                        value = strings[int(value)]
+                    elif (cell_type is None or cell_type == "n") and value.endswith(".0"):
+                        # whole numbers stored as floats
+                        value = value[:-2]
+                    values.append(value)
+                yield values
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+
+
+def iter_csv_rows(filename):
+    """Generate the values of each row of a .csv file (UTF-8, with or without BOM)
+    """
+    with open(filename, encoding="utf-8-sig", newline="") as f:
+        for row in csv.reader(f):
+            yield row
+
+
+def iter_rows(filename):
+    """Generate a {column: value} dict for each row of a .xlsx or .csv file, the first row holding the column names
+    """
+    file_format = spreadsheet_format(filename)
+    if file_format is None:
+        raise ValueError("file '{0}' is neither a .xlsx nor a .csv file".format(filename))
+    rows = iter_xlsx_rows(filename) if file_format == FORMAT_XLSX else iter_csv_rows(filename)
+    header = next(rows, None)
+    if header is None:
+        return
+    header = [name.strip().lower() for name in header]
+    if "docid" not in header:
+        raise ValueError("file '{0}' has no docid column".format(filename))
+    for values in rows:
+        if not any(values):
+            continue
+        yield dict(zip(header, values))
+
+
+def row_to_requirement(row):
+    """Return the model.Requirement of a row, the missing or empty columns take the default values
+    """
+    fields = {}
+    for name in ("docid", "title", "description"):
+        fields[name] = row.get(name, "")
+    for name in _INTEGER_COLUMNS:
+        value = row.get(name, "").strip()
+        fields[name] = int(value) if value.isdigit() else getattr(_DEFAULTS, name)
+    req_type = row.get("type", "").strip()
+    if req_type in _TYPES:
+        req_type = _TYPES[req_type]
+    elif req_type.isdigit():
+        req_type = int(req_type)
+    fields["type"] = req_type or _DEFAULTS.type
+    # the status is the first letter, as in the requirement tables
+    fields["status"] = row.get("status", "").strip()[:1] or _DEFAULTS.status
+    return Requirement(**fields)
+
+
+def read_reqspecs(filename):
+    """Return the list of model.ReqSpec of the requirements of a .xlsx or .csv file
+
+    The requirements before the first specification are in a ReqSpec whose doc_id is None. Unlike
+    spreadsheet_to_xml, the whole file is in memory: used by the --index conversions.
+    """
+    specs = []
+    spec_key = None
+    for row in iter_rows(filename):
+        key = tuple(row.get(name, "") for name in SPEC_COLUMNS)
+        if not specs or (key != spec_key and key[0]):
+            specs.append(ReqSpec(key[1], key[0], scope=key[2]) if key[0] else ReqSpec(None, None))
+        spec_key = key
+        specs[-1].requirements.append(row_to_requirement(row))
+    return specs
+
+
+def spreadsheet_to_xml(filename, out):
+    """Write the TestLink XML of the requirements of a .xlsx or .csv file to the file handle out
+
+    The rows are written as soon as they are read. Return the number of specifications and of requirements.
+    """
+    writer = XMLWriter(out)
+    writer.write(testlink_xml.XML_HEADER + '\n' + testlink_xml.XML_REQ_DOC_START)
+    spec_key = None
+    specifications = requirements = 0
+    for row in iter_rows(filename):
+        key = tuple(row.get(name, "") for name in SPEC_COLUMNS)
+        if key != spec_key and key[0]:
+            if specifications:
+                writer.write('\n' + testlink_xml.XML_SPEC_STOP)
+            testlink_xml.write_reqspec_start(ReqSpec(key[1], key[0], scope=key[2]), writer)
+            specifications += 1
+        spec_key = key
+        testlink_xml.write_requirement(row_to_requirement(row), writer)
+        requirements += 1
+    if specifications:
+        writer.write('\n' + testlink_xml.XML_SPEC_STOP)
+    writer.write('\n' + testlink_xml.XML_REQ_DOC_STOP)
+    return specifications, requirements
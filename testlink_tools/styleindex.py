@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     styleindex.py
+#
+"""Heading level of the paragraph styles of a document, resolved once per document
+
+The converters find their sections and test case tables from the heading level of the paragraph styles.
+Resolving the style of each paragraph through python-docx walks the styles part every time,
+the StyleIndex reads word/styles.xml once and maps each paragraph style id to:
+    name    the normalized (lower case, English for the built-in styles) name of the style
+    level   the heading level, None for the other styles
+
+The level of a style is found, in this order, from:
+1. its name or id, "Heading 2" and the localized names such as "Titre 2" or "Überschrift 2"
+2. its outline level (w:outlineLvl), as set on the custom heading styles
+3. the style it is based on (w:basedOn), so a style derived from Heading 2 is a level 2 heading
+
+Like python-docx, a paragraph without style, or with an unknown or non paragraph style, has the default paragraph style.
+"""
+import re
+
+from lxml import etree
+
+from testlink_tools.docxstream import W_VAL, W_TYPE, paragraph_style_id, qn
+
+# heading names of the localized versions of Word, followed by the level
+_HEADING_NAME = re.compile(r"(?:heading|titre|[uü]berschrift|t[ií]tulo|titolo|encabezado|kop|nagłówek|rubrik|otsikko"
+                           r"|overskrift|nadpis|заголовок)\s*(\d)")
+# w:outlineLvl of the body text
+_BODY_OUTLINE_LEVEL = 9
+
+
+def heading_level(name):
+    """Return the heading level found in a style name or id, None if it is not a heading name
+    """
+    if not name:
+        return None
+    match = _HEADING_NAME.search(name.lower())
+    return int(match.group(1)) if match is not None else None
+
+
+def block_style_id(block):
+    """Return the paragraph style id of a StreamParagraph or of a python-docx Paragraph, None if not set
+    """
+    style_id = getattr(block, "style_id", False)
+    if style_id is not False:
+        return style_id
+    return paragraph_style_id(block._element)
+
+
+class StyleIndex(object):
+    """Normalized name and heading level of each paragraph style of a document
+    """
+
+    def __init__(self, xml=None):
+        """Constructor, xml is the raw XML of word/styles.xml (None or empty: no styles)
+        """
+        self.names = {}
+        self.levels = {}
+        self.default = None
+        if not xml:
+            return
+        root = etree.fromstring(xml)
+        based_on = {}
+        outline_levels = {}
+        # like python-docx, the first style of an id wins, a paragraph with a non paragraph style has the default one
+        seen = set()
+        for style in root.iterchildren(qn("w:style")):
+            style_id = style.get(qn("w:styleId"))
+            is_paragraph = style.get(W_TYPE) == "paragraph"
+            if is_paragraph and style.get(qn("w:default")) in ("1", "true", "on"):
+                # the last default paragraph style wins
+                self.default = style_id
+            if not is_paragraph or style_id is None or style_id in seen:
+                seen.add(style_id)
+                continue
+            seen.add(style_id)
+            name = style.find(qn("w:name"))
+            name = name.get(W_VAL) if name is not None else None
+            self.names[style_id] = (name or "").lower()
+            parent = style.find(qn("w:basedOn"))
+            if parent is not None:
+                based_on[style_id] = parent.get(W_VAL)
+            ppr = style.find(qn("w:pPr"))
+            outline = ppr.find(qn("w:outlineLvl")) if ppr is not None else None
+            if outline is not None and outline.get(W_VAL, "").isdigit() and int(outline.get(W_VAL)) < _BODY_OUTLINE_LEVEL:
+                outline_levels[style_id] = int(outline.get(W_VAL)) + 1
+        for style_id in self.names:
+            self.levels[style_id] = self.__resolve(style_id, based_on, outline_levels)
+
+    def __resolve(self, style_id, based_on, outline_levels):
+        """Heading level of a style from its name, its outline level or the styles it is based on
+        """
+        seen = set()
+        while style_id in self.names and style_id not in seen:
+            seen.add(style_id)
+            level = heading_level(self.names[style_id])
+            if level is None:
+                level = heading_level(style_id)
+            if level is None:
+                level = outline_levels.get(style_id)
+            if level is not None:
+                return level
+            style_id = based_on.get(style_id)
+        return None
+
+    @classmethod
+    def from_document(cls, document):
+        """Return the StyleIndex of a python-docx Document
+        """
+        return cls(etree.tostring(document.styles.element))
+
+    def __effective_id(self, style_id):
+        return style_id if style_id in self.names else self.default
+
+    def name(self, style_id):
+        """Normalized name of the paragraph style *style_id*, of the default style if unknown
+        """
+        return self.names.get(self.__effective_id(style_id))
+
+    def level(self, style_id):
+        """Heading level of the paragraph style *style_id*, of the default style if unknown, None if not a heading
+        """
+        return self.levels.get(self.__effective_id(style_id))
+
+    def block_level(self, block):
+        """Heading level of the style of a StreamParagraph or python-docx Paragraph
+        """
+        return self.level(block_style_id(block))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     tablegrid.py
+#
+"""Snapshot of a Word table as a plain 2-D grid of texts
+
+python-docx rebuilds its merged-cell grid on every access to table.rows, row.cells, table.columns
+and col.cells. A table is read here exactly once into a list of rows, each row holding one text
+per column of the layout grid (w:tblGrid):
+    a cell spanning several columns (w:gridSpan) repeats its text in each of them
+    a cell continuing a vertical merge (w:vMerge) repeats the text of the cell above
+    the columns skipped at the start or the end of a row (w:gridBefore, w:gridAfter) are empty
+"""
+from testlink_tools.docxstream import StreamTable, W_P, W_TC, W_TR, W_VAL, paragraph_text, qn
+
+
+def read_rows(tbl):
+    """Generate (grid_before, [(text, grid_span, vmerge), ...]) for each w:tr of a w:tbl element
+    """
+    for tr in tbl.iterchildren(W_TR):
+        trPr = tr.find(qn("w:trPr"))
+        grid_before = trPr.find(qn("w:gridBefore")) if trPr is not None else None
+        grid_before = 0 if grid_before is None else int(grid_before.get(W_VAL))
+        tcs = []
+        for tc in tr.iterchildren(W_TC):
+            grid_span = 1
+            vmerge = None
+            tcPr = tc.find(qn("w:tcPr"))
+            if tcPr is not None:
+                span = tcPr.find(qn("w:gridSpan"))
+                if span is not None:
+                    grid_span = int(span.get(W_VAL))
+                merge = tcPr.find(qn("w:vMerge"))
+                if merge is not None:
+                    vmerge = merge.get(W_VAL, "continue")
+            text = "\n".join(paragraph_text(p) for p in tc.iterchildren(W_P))
+            tcs.append((text, grid_span, vmerge))
+        yield grid_before, tcs
+
+
+def layout(rows, column_count):
+    """Place the cells of *rows* (as generated by read_rows) on the layout grid
+    """
+    grid = []
+    above = []
+    for grid_before, tcs in rows:
+        row = [""] * grid_before
+        for text, grid_span, vmerge in tcs:
+            for _ in range(grid_span):
+                if vmerge == "continue":
+                    column = len(row)
+                    row.append(above[column] if column < len(above) else "")
+                else:
+                    row.append(text)
+        if len(row) < column_count:
+            row.extend([""] * (column_count - len(row)))
+        grid.append(row)
+        above = row
+    return grid
+
+
+def snapshot(table):
+    """Return the 2-D grid of texts of a python-docx Table or of a StreamTable
+    """
+    if isinstance(table, StreamTable):
+        rows = ((row.grid_before, [(cell.text, grid_span, vmerge) for cell, grid_span, vmerge in row.tcs])
+                for row in table.rows)
+        return layout(rows, table.column_count)
+    tbl = table._tbl
+    column_count = len(tbl.find(qn("w:tblGrid")).findall(qn("w:gridCol")))
+    return layout(read_rows(tbl), column_count)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     tablelayout.py
+#
+"""Declarative layout of the Test Case tables
+
+A layout maps the regions of a Test Case table to the fields of the Test Case, the rows are counted from 0:
+
+    TEMPLATE_LAYOUT = {
+        "name": (0, 0),             # (row, column) of the cell holding the Test Case name
+        "preconditions": (2, 0),    # (row, column) of the cell holding the preconditions, None if there is none
+        "steps": 4,                 # first step row, one step per row
+        "footer": 2,                # rows at the end of the table which are not steps
+        "actions": 1,               # column of the actions in a step row
+        "expectedresults": 2,       # column of the expected results in a step row, None if there is none
+    }
+
+The other rows (labels, header of the steps) are ignored. TableLayout compiles a layout once: the role of each
+row of a table of n rows is computed once for every n (a plan shared by the tables of that length), then a table
+is read in a single pass over its rows, the cells being built only for the rows having a role (row.cells rebuilds
+the merged-cell grid of python-docx on each access). A table too short for its footer (the footer would start on
+an ignored header row) is read to its end, as the positional reader of the Template did.
+
+TableLayout.from_template(filename) infers the layout from the first Test Case table of a template document:
+the Test Case name in the first row, the row after the "Preconditions" label, the row of the step header
+("Step actions", "Expected results") and the merged rows closing the table.
+"""
+from testlink_tools import docxstream
+from testlink_tools.styleindex import StyleIndex
+
+TEMPLATE_LAYOUT = {"name": (0, 0), "preconditions": (2, 0), "steps": 4, "footer": 2, "actions": 1, "expectedresults": 2}
+LAYOUT_KEYS = tuple(sorted(TEMPLATE_LAYOUT))
+
+# roles of the rows
+ROLE_NAME = "name"
+ROLE_PRECONDITIONS = "preconditions"
+ROLE_STEP = "step"
+
+# labels of the template tables, in lower case
+_PRECONDITIONS_LABELS = ("precondition", "précondition")
+_ACTIONS_LABELS = ("action",)
+_EXPECTED_LABELS = ("expected", "attendu")
+
+
+class TableLayout(object):
+    """Compiled layout of the Test Case tables
+    """
+
+    def __init__(self, spec=None):
+        """Constructor, spec is a layout dict (TEMPLATE_LAYOUT when None)
+        """
+        spec = dict(TEMPLATE_LAYOUT if spec is None else spec)
+        if sorted(spec) != list(LAYOUT_KEYS):
+            raise ValueError("a table layout has the keys {0}, not {1}".format(LAYOUT_KEYS, sorted(spec)))
+        if spec["name"] is None or spec["steps"] is None or spec["actions"] is None:
+            raise ValueError("a table layout has a name cell, steps and actions")
+        self.spec = spec
+        self.name = tuple(spec["name"])
+        self.preconditions = tuple(spec["preconditions"]) if spec["preconditions"] is not None else None
+        self.header_roles = {self.name[0]: ROLE_NAME}
+        if self.preconditions is not None:
+            self.header_roles.setdefault(self.preconditions[0], ROLE_PRECONDITIONS)
+        self.steps = spec["steps"]
+        self.footer = spec["footer"]
+        self.plans = {}
+
+    def __eq__(self, other):
+        return isinstance(other, TableLayout) and self.spec == other.spec
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return "TableLayout({0!r})".format(self.spec)
+
+    def key(self):
+        """Text of the layout, part of the cache keys
+        """
+        return repr([(key, self.spec[key]) for key in LAYOUT_KEYS])
+
+    def plan(self, row_count):
+        """Return the roles (ROLE_* or None) of the rows of a table of *row_count* rows, up to the footer
+        """
+        plan = self.plans.get(row_count)
+        if plan is None:
+            stop = row_count - self.footer
+            if stop < self.steps and stop not in self.header_roles:
+                # the footer would start on an ignored header row
+                stop = row_count
+            plan = self.plans[row_count] = tuple(
+                ROLE_STEP if row >= self.steps else self.header_roles.get(row) for row in range(max(stop, 0)))
+        return plan
+
+    def read(self, table):
+        """Return the cells (python-docx _Cell or docxstream.StreamCell, None when the row has no such cell)
+        of a Test Case table: (name cell, preconditions cell, [(actions cell, expected results cell), ...])
+
+        A step row without any cell is not a step, the preconditions cell is None when the layout has none.
+        """
+        name = preconditions = None
+        steps = []
+        rows = table.rows
+        actions, expected = self.spec["actions"], self.spec["expectedresults"]
+        for role, row in zip(self.plan(len(rows)), rows):
+            if role is None:
+                continue
+            cells = row.cells
+            if not cells:
+                continue
+            if role == ROLE_STEP:
+                steps.append((cells[actions] if actions < len(cells) else None,
+                              cells[expected] if expected is not None and expected < len(cells) else None))
+            elif role == ROLE_NAME:
+                name = cells[self.name[1]] if self.name[1] < len(cells) else None
+            else:
+                preconditions = cells[self.preconditions[1]] if self.preconditions[1] < len(cells) else None
+        return name, preconditions, steps
+
+    @classmethod
+    def from_template(cls, filename):
+        """Return the layout of the first Test Case table (a "Test case" Heading 3 in the first cell) of a .docx
+        """
+        index = StyleIndex(docxstream.styles_xml(filename))
+        for block in docxstream.iter_block_items(filename):
+            if not isinstance(block, docxstream.StreamTable) or not block.rows:
+                continue
+            first = block.cell(0, 0)
+            if first.text.lower().find("test case") >= 0 and index.block_level(first.paragraphs[0]) == 3:
+                return cls(infer_layout([[cell.text.lower() for cell in row.cells] for row in block.rows],
+                                        [len(set(map(id, row.cells))) == 1 for row in block.rows]))
+        raise ValueError("file '{0}' has no Test Case table".format(filename))
+
+
+def _find(texts, labels):
+    """Index of the first text containing one of *labels*, None if not found"""
+    for index, text in enumerate(texts):
+        if any(text.find(label) >= 0 for label in labels):
+            return index
+    return None
+
+
+def infer_layout(rows, merged):
+    """Return the layout dict of a template table
+
+    rows holds the lower case texts of the cells of each row, merged tells whether each row is a single cell.
+    """
+    preconditions = None
+    label = _find([" ".join(cells) for cells in rows[1:]], _PRECONDITIONS_LABELS)
+    if label is not None and label + 2 < len(rows):
+        preconditions = (label + 2, 0)
+    header = None
+    for number in range(1, len(rows)):
+        if _find(rows[number], _ACTIONS_LABELS) is not None:
+            header = number
+            break
+    if header is None:
+        raise ValueError("no step header (a cell containing 'action') in the template table")
+    footer = 0
+    while len(rows) - footer - 1 > header and merged[len(rows) - footer - 1]:
+        footer += 1
+    return {"name": (0, 0), "preconditions": preconditions, "steps": header + 1, "footer": footer,
+            "actions": _find(rows[header], _ACTIONS_LABELS), "expectedresults": _find(rows[header], _EXPECTED_LABELS)}
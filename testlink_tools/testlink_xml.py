@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     testlink_xml.py
+#
+"""TestLink XML serializer of the intermediate model (testlink_tools.model)
+
+The converters stream their output with the *_start / write_* functions while the document is scanned,
+write_requirements and write_testsuites write a whole model returned by parse():
+
+    specs = Requirement(filename, reqid, engine="stream").parse()
+    write_requirements(specs, XMLWriter(out))     # the same text as Requirement.write_XML(out)
+
+The layout (indentation, spaces, line breaks) is the one TestLink has always been given by the converters.
+iter_reqspecs and iter_testsuites read such a file back into the model, one specification or Test Suite at a time.
+"""
+from lxml import etree
+
+from testlink_tools.model import ReqSpec, Requirement, Step, TestCase, TestSuite
+from testlink_tools.xmlwriter import XMLWriter, cdata, quoteattr
+
+# requirements
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+XML_REQ_DOC_START = "<requirement-specification>"
+XML_SPEC_START = "   <req_spec>"
+XML_REQ_START = "      <requirement>"
+XML_REQ_STOP = "      </requirement>"
+XML_SPEC_STOP = "   </req_spec>"
+XML_REQ_DOC_STOP = "</requirement-specification>"
+SPEC_FIELDS = ("version", "type", "node_order", "total_req")
+
+# test procedures
+XML_TS_DOC_START = """<?xml version="1.0" encoding="UTF-8"?>
+    <testsuite id="" name="" >
+    <node_order><![CDATA[]]>
+    </node_order><details>
+    <![CDATA[]]></details>"""
+XML_TS_DOC_STOP = "</testsuite>"
+XML_TS_START = '<testsuite name="{}"> \n'
+XML_TS_STOP = '</testsuite>'
+XML_TC_START = '<testcase name="{}"> \n'
+XML_TC_STOP = "</testcase>"
+XML_STEP_START = "<step> \n"
+XML_STEP_STOP = "</step> \n"
+
+
+def _field(tag, value):
+    """ <tag> value </tag> line of the Test Case fields """
+    return "<{0}> {1} </{0}> \n".format(tag, value)
+
+
+def write_reqspec_start(spec, writer):
+    """Write the header of a requirement specification, before its requirements
+    """
+    writer.write('\n   <req_spec title=\"{0}\" doc_id=\"{1}\">'.format(quoteattr(spec.title), quoteattr(spec.doc_id)))
+    for tag in SPEC_FIELDS:
+        writer.element(tag, getattr(spec, tag), '\n      ')
+    # the scope is the text between the heading and the first table
+    writer.element('scope', spec.scope, '\n      ')
+
+
+def write_requirement(requirement, writer):
+    """Write a requirement
+    """
+    writer.write('\n' + XML_REQ_START)
+    for tag in requirement.__slots__:
+        writer.element(tag, getattr(requirement, tag), '\n      ')
+    writer.write('\n' + XML_REQ_STOP)
+
+
+def write_requirements(specs, writer):
+    """Write a whole requirements document, specs is the list of ReqSpec returned by Requirement.parse()
+    """
+    writer.write(XML_HEADER + '\n' + XML_REQ_DOC_START)
+    opened = False
+    for spec in specs:
+        if spec.doc_id is not None:
+            # close the previous specification
+            if opened:
+                writer.write('\n' + XML_SPEC_STOP)
+            write_reqspec_start(spec, writer)
+            opened = True
+        for requirement in spec.requirements:
+            write_requirement(requirement, writer)
+    writer.write('\n' + XML_SPEC_STOP)
+    writer.write('\n' + XML_REQ_DOC_STOP)
+
+
+def write_testcase(testcase, writer):
+    """Write a Test Case with its steps
+
+    Raise ValueError for a Test Case without a name, which TestLink cannot import.
+    """
+    if testcase.name is None:
+        raise ValueError("Test Case without a name (node_order {0})".format(testcase.node_order))
+    writer.write(XML_TC_START.format(quoteattr(testcase.name)))
+    writer.write(_field("node_order", testcase.node_order))
+    writer.write(_field("preconditions", cdata(testcase.preconditions) if testcase.preconditions is not None else ""))
+    steps = []
+    for step in testcase.steps:
+        steps.append(XML_STEP_START)
+        steps.append(_field("step_number", step.number))
+        if step.actions is not None:
+            steps.append(_field("actions", cdata(step.actions + '\n')))
+        if step.expectedresults is not None:
+            steps.append(_field("expectedresults", cdata(step.expectedresults + '\n')))
+        steps.append(XML_STEP_STOP)
+    writer.write(_field("steps", "".join(steps)))
+    writer.write(XML_TC_STOP)
+
+
+def testcase_xml(testcase):
+    """Return the XML text of a Test Case
+    """
+    writer = XMLWriter()
+    write_testcase(testcase, writer)
+    return writer.drain()
+
+
+def write_testsuite_start(testsuite, writer):
+    """Write the header of a Test Suite, before its Test Cases
+    """
+    writer.write(XML_TS_START.format(quoteattr(testsuite.name)))
+    writer.write("<node_order>{}</node_order> \n".format(cdata(testsuite.node_order)))
+    writer.write("<details>{}</details> \n".format(cdata(testsuite.details)))
+
+
+def write_testsuite(testsuite, writer):
+    """Write a Test Suite with its Test Cases
+    """
+    write_testsuite_start(testsuite, writer)
+    for testcase in testsuite.testcases:
+        write_testcase(testcase, writer)
+    writer.write(XML_TS_STOP)
+
+
+def write_testsuites(testsuites, writer):
+    """Write a whole test procedure, testsuites is the list of TestSuite returned by DocXML.parse()
+    """
+    writer.write(XML_TS_DOC_START)
+    for testsuite in testsuites:
+        write_testsuite(testsuite, writer)
+    writer.write(XML_TS_DOC_STOP)
+
+
+def _number(text):
+    """Integer of a numeric field, the text itself otherwise (a requirement type not found in the type names)
+    """
+    text = (text or "").strip()
+    return int(text) if text.isdigit() else text
+
+
+def _unpad(text):
+    """Text of a Test Case field written by _field, without the space added on each side
+    """
+    return text[1:-1] if text is not None and len(text) >= 2 else ""
+
+
+def _drop(elem):
+    """Free an element read by iterparse and the siblings read before it
+    """
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def read_requirement(elem):
+    """Return the model.Requirement of a <requirement> element
+    """
+    fields = {}
+    for child in elem:
+        if child.tag in Requirement.__slots__:
+            text = child.text or ""
+            fields[child.tag] = _number(text) if child.tag in ("version", "revision", "node_order", "type",
+                                                                "expected_coverage") else text
+    return Requirement(**fields)
+
+
+def iter_reqspecs(source):
+    """Generate the model.ReqSpec of a requirements XML file (a filename or a binary file object) in file order
+
+    Only one specification is in memory at a time. The requirements outside any specification
+    are generated in a ReqSpec whose doc_id is None.
+    """
+    for _, elem in etree.iterparse(source, events=("end",), tag=("req_spec", "requirement"), huge_tree=True):
+        parent = elem.getparent()
+        if elem.tag == "requirement":
+            if parent is None or parent.tag != "req_spec":
+                yield ReqSpec(None, None, requirements=[read_requirement(elem)])
+                _drop(elem)
+            continue
+        spec = ReqSpec(elem.get("title"), elem.get("doc_id"))
+        for child in elem:
+            if child.tag == "requirement":
+                spec.requirements.append(read_requirement(child))
+            elif child.tag == "scope":
+                spec.scope = child.text or ""
+            elif child.tag in SPEC_FIELDS:
+                setattr(spec, child.tag, _number(child.text))
+        yield spec
+        _drop(elem)
+
+
+def read_testcase(elem):
+    """Return the model.TestCase of a <testcase> element
+    """
+    testcase = TestCase(elem.get("name"))
+    for child in elem:
+        if child.tag == "node_order":
+            testcase.node_order = _number(child.text)
+        elif child.tag == "preconditions":
+            # "<preconditions>  </preconditions>" when the table has no preconditions row
+            preconditions = _unpad(child.text)
+            testcase.preconditions = preconditions if child.text != "  " else None
+        elif child.tag == "steps":
+            for step in child.iterchildren("step"):
+                fields = dict((field.tag, field.text) for field in step)
+                actions, expectedresults = fields.get("actions"), fields.get("expectedresults")
+                testcase.steps.append(Step(
+                    _number(fields.get("step_number")),
+                    _unpad(actions)[:-1] if actions is not None else None,
+                    _unpad(expectedresults)[:-1] if expectedresults is not None else None))
+    return testcase
+
+
+def iter_testsuites(source):
+    """Generate the model.TestSuite of a test procedure XML file (a filename or a binary file object) in file order
+
+    Only one Test Suite is in memory at a time. The Test Cases outside any Test Suite are generated
+    in a TestSuite whose name is None.
+    """
+    for _, elem in etree.iterparse(source, events=("end",), tag=("testsuite", "testcase"), huge_tree=True):
+        parent = elem.getparent()
+        if parent is None:
+            # the root Test Suite of the document
+            continue
+        if elem.tag == "testcase":
+            if parent.getparent() is None:
+                yield TestSuite(None, "", 0, [read_testcase(elem)])
+                _drop(elem)
+            continue
+        if parent.getparent() is not None:
+            raise ValueError("line {0}: nested Test Suites are not supported".format(elem.sourceline))
+        testsuite = TestSuite(elem.get("name"), "", 0)
+        for child in elem:
+            if child.tag == "testcase":
+                testsuite.testcases.append(read_testcase(child))
+            elif child.tag == "details":
+                testsuite.details = child.text or ""
+            elif child.tag == "node_order":
+                testsuite.node_order = _number(child.text)
+        yield testsuite
+        _drop(elem)
@@ -0,0 +1,73 @@
+'''
+Tests of the section cache
+'''
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from testlink_tools.cache import SectionCache, split_sections
+from testcases.testcases import DocXML
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestSectionCache(unittest.TestCase):
+
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_split_sections(self):
+
+        sections = list(split_sections([1, 2, 0, 3, 0], lambda block: block == 0))
+        self.assertEqual(sections, [[1, 2], [0, 3], [0]])
+
+    def test_get_put(self):
+
+        cache = SectionCache(self.tmpdir)
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", {"lines": ["a", "b"]})
+        # a new instance reads the entries back from the disk
+        cache = SectionCache(self.tmpdir)
+        self.assertEqual(cache.get("key"), {"lines": ["a", "b"]})
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_lru_eviction(self):
+
+        cache = SectionCache(self.tmpdir, max_bytes=200)
+        cache.put("a", "x" * 50)
+        cache.put("b", "x" * 50)
+        cache.get("a")
+        cache.put("c", "x" * 50)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.size, 200)
+
+    def test_version(self):
+
+        SectionCache(self.tmpdir, version="1").put("key", "value")
+        self.assertIsNone(SectionCache(self.tmpdir, version="2").get("key"))
+
+    def test_docx_to_xml(self):
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference = DocXML(TEMPLATE_DOCX).docx_to_xml()
+            for engine in ("docx", "stream"):
+                first = SectionCache(self.tmpdir)
+                self.assertEqual(DocXML(TEMPLATE_DOCX, engine=engine).docx_to_xml(cache=first), reference)
+                second = SectionCache(self.tmpdir)
+                self.assertEqual(DocXML(TEMPLATE_DOCX, engine=engine).docx_to_xml(cache=second), reference)
+                self.assertEqual(second.misses, 0)
+                self.assertEqual(second.hits, first.misses)
+
+if __name__ == "__main__":
+    unittest.main()
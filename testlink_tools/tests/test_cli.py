@@ -0,0 +1,69 @@
+'''
+Tests of the batch command line
+'''
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from testlink_tools import cli
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestCli(unittest.TestCase):
+
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+        for filename in (REQ_DOCX, TEMPLATE_DOCX):
+            shutil.copy(filename, self.tmpdir)
+        with open(os.path.join(self.tmpdir, "broken.docx"), "w") as f:
+            f.write("not a zip")
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_detect_kind(self):
+
+        self.assertEqual(cli.detect_kind(REQ_DOCX), cli.KIND_REQUIREMENTS)
+        self.assertEqual(cli.detect_kind(TEMPLATE_DOCX), cli.KIND_TESTCASES)
+
+    def test_convert_directory(self):
+
+        output_dir = os.path.join(self.tmpdir, "out")
+        summary = io.StringIO()
+        with contextlib.redirect_stdout(summary):
+            status = cli.main(["convert", self.tmpdir, "-o", output_dir, "-j", "2", "--reqid", "DRE-DMX-FW-REQ"])
+        # the broken document fails without aborting the others
+        self.assertEqual(status, 1)
+        self.assertEqual(sorted(os.listdir(output_dir)),
+                         ["0065-DRE_TDM_Firmware_Requirements-V0.8.xml", "Template.xml"])
+        self.assertIn("3 file(s), 1 failed", summary.getvalue())
+        with open(os.path.join(output_dir, "Template.xml"), encoding="utf-8") as f:
+            self.assertIn("<testcase ", f.read())
+
+    def test_unreadable_document(self):
+
+        output_dir = os.path.join(self.tmpdir, "out")
+        summary = io.StringIO()
+        with contextlib.redirect_stdout(summary):
+            status = cli.main(["convert", os.path.join(self.tmpdir, "broken.docx"), "-o", output_dir,
+                               "-k", cli.KIND_TESTCASES, "-e", "docx"])
+        # the error of the converter is reported in the summary
+        self.assertEqual(status, 1)
+        self.assertIn("PackageNotFoundError", summary.getvalue())
+        self.assertFalse(os.listdir(output_dir))
+
+    def test_output_names(self):
+
+        outputs = cli.output_names(["a/doc.docx", "b/doc.docx"], "out")
+        self.assertEqual(outputs, [os.path.join("out", "doc.xml"), os.path.join("out", "doc_2.xml")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+'''
+Tests of the delta export
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from lxml import etree
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools.cache import SectionCache
+from testlink_tools.delta import Delta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestDelta(unittest.TestCase):
+
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def export(self, xml):
+
+        filename = os.path.join(self.tmpdir, "previous.xml")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(xml)
+        return Delta.from_export(filename)
+
+    def test_requirements(self):
+
+        requirement = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", engine="stream")
+        delta = self.export(requirement.docx_to_XML())
+        self.assertEqual(len(delta.previous["requirements"]), 59)
+        self.assertNotIn("<requirement>", requirement.docx_to_XML(delta=delta))
+        self.assertEqual(delta.report()["requirements"]["unchanged"], 59)
+
+        previous = delta.manifest
+        previous["requirements"]["DRE-DMX-FW-REQ-0010"] = "modified"
+        del previous["requirements"]["DRE-DMX-FW-REQ-0020"]
+        previous["requirements"]["DRE-DMX-FW-REQ-9999"] = "removed"
+        delta = Delta(previous)
+        xml = requirement.docx_to_XML(delta=delta)
+        root = etree.fromstring(xml.encode("utf-8"))
+        self.assertEqual([docid.text for docid in root.iter("docid")], ["DRE-DMX-FW-REQ-0010", "DRE-DMX-FW-REQ-0020"])
+        self.assertEqual(len(root.findall("req_spec")), 1)
+        report = delta.report()["requirements"]
+        self.assertEqual((report["added"], report["modified"], report["removed"], report["unchanged"]),
+                         (["DRE-DMX-FW-REQ-0020"], ["DRE-DMX-FW-REQ-0010"], ["DRE-DMX-FW-REQ-9999"], 57))
+
+    def test_testcases_manifest(self):
+
+        procedure = DocXML(TEMPLATE_DOCX, engine="stream")
+        delta = self.export(procedure.docx_to_xml())
+        self.assertNotIn("<testcase ", procedure.docx_to_xml(delta=delta))
+        manifest = os.path.join(self.tmpdir, "manifest.json")
+        delta.save_manifest(manifest)
+
+        delta = Delta.from_manifest(manifest)
+        key = sorted(delta.previous["testcases"])[0]
+        delta.previous["testcases"][key] = "modified"
+        root = etree.fromstring(procedure.docx_to_xml(delta=delta).encode("utf-8"))
+        self.assertEqual(len(root.findall("testsuite/testcase")), 1)
+        self.assertEqual(delta.report()["testcases"]["modified"], [key])
+
+    def test_no_cache(self):
+
+        with self.assertRaises(ValueError):
+            DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml(cache=SectionCache(self.tmpdir), delta=Delta())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+'''
+Tests of the lazy loading of the .docx parts
+'''
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+
+from docx.api import Document
+from docx.opc.exceptions import PackageNotFoundError
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools import docxstream
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+MISSING_IMAGE = (b'<Relationship Id="rIdMissing" Target="media/missing.png" '
+                 b'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"/>')
+
+class TestPackage(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.tmpdir = tempfile.mkdtemp()
+        # the Template with a relationship to an image missing from the zip: python-docx cannot load it
+        cls.docx = os.path.join(cls.tmpdir, "missing-media.docx")
+        with zipfile.ZipFile(TEMPLATE_DOCX) as source, zipfile.ZipFile(cls.docx, "w") as target:
+            for info in source.infolist():
+                data = source.read(info.filename)
+                if info.filename == "word/_rels/document.xml.rels":
+                    data = data.replace(b"</Relationships>", MISSING_IMAGE + b"</Relationships>")
+                target.writestr(info, data)
+
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir)
+
+    def test_text_package(self):
+
+        with docxstream.Package(self.docx) as package:
+            self.assertEqual((package.document, package.styles), ("word/document.xml", "word/styles.xml"))
+            with zipfile.ZipFile(package.text_package()) as light:
+                self.assertEqual(sorted(light.namelist()), ["[Content_Types].xml", "_rels/.rels",
+                                                            "word/_rels/document.xml.rels", "word/document.xml",
+                                                            "word/styles.xml"])
+                self.assertNotIn(b"media/", light.read("word/_rels/document.xml.rels"))
+        with self.assertRaises(KeyError):
+            Document(self.docx)
+        reference = DocXML(TEMPLATE_DOCX).docx_to_xml()
+        for engine in docxstream.ENGINES:
+            self.assertEqual(DocXML(self.docx, engine=engine).docx_to_xml(), reference)
+
+    def test_not_a_package(self):
+
+        empty = os.path.join(self.tmpdir, "empty.docx")
+        open(empty, "wb").close()
+        for filename in (empty, os.path.join(self.tmpdir, "missing.docx")):
+            with self.assertRaises(PackageNotFoundError):
+                docxstream.open_document(filename)
+        with self.assertRaises(zipfile.BadZipFile):
+            docxstream.Package(empty)
+        # the converters raise instead of printing and leaving a converter without document
+        output = io.StringIO()
+        with redirect_stdout(output):
+            with self.assertRaises(PackageNotFoundError):
+                DocXML(empty)
+            with self.assertRaises(PackageNotFoundError):
+                Requirement(empty, engine=docxstream.ENGINE_DOCX)
+        self.assertEqual(output.getvalue(), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+'''
+Tests of the import of the converters: no output, no python-docx, within the import-time budget
+'''
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+# seconds for importing both converters and the package, about 0.1 s on a development machine
+IMPORT_BUDGET = 0.5
+# modules only needed by the "docx" engine, the parallel conversions or the profile captures
+LAZY_MODULES = ("docx", "multiprocessing", "cProfile")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import requirements.requirement, testcases.testcases, testlink_tools
+seconds = time.perf_counter() - start
+loaded = [name for name in {lazy!r} if name in sys.modules]
+sys.stderr.write(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+STREAM_SCRIPT = """
+import json, sys
+import testlink_tools
+testlink_tools.DocXML({template!r}, engine=testlink_tools.ENGINE_STREAM).docx_to_xml()
+testlink_tools.Requirement({req!r}, "DRE-DMX-FW-REQ", "V0.8", engine=testlink_tools.ENGINE_STREAM).docx_to_XML()
+sys.stderr.write(json.dumps({{"docx": "docx" in sys.modules}}))
+"""
+
+def run(script):
+    """Run *script* in a new interpreter, return its stdout and the JSON it writes on stderr"""
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    process = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    return process.stdout, json.loads(process.stderr.splitlines()[-1])
+
+class TestImports(unittest.TestCase):
+
+
+    def test_import(self):
+
+        stdout, report = run(IMPORT_SCRIPT.format(lazy=LAZY_MODULES))
+        self.assertEqual(stdout, "")
+        self.assertEqual(report["loaded"], [])
+        self.assertLess(report["seconds"], IMPORT_BUDGET)
+
+    def test_stream_engine(self):
+
+        stdout, report = run(STREAM_SCRIPT.format(template=TEMPLATE_DOCX, req=REQ_DOCX))
+        self.assertEqual(stdout, "")
+        self.assertFalse(report["docx"])
+
+    def test_api(self):
+
+        import testlink_tools
+        from testcases.testcases import DocXML
+        from testlink_tools.validate import validate
+        self.assertIs(testlink_tools.DocXML, DocXML)
+        self.assertIs(testlink_tools.validate_xml, validate)
+        self.assertIn("spreadsheet_to_xml", dir(testlink_tools))
+        with self.assertRaises(AttributeError):
+            testlink_tools.convert
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+'''
+Tests of the merge of TestLink XML files
+'''
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from benchmarks import synthetic
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools import cli, testlink_xml
+from testlink_tools.merge import merge_requirements, merge_testsuites
+from testlink_tools.validate import validate
+from testlink_tools.xmlwriter import XMLWriter
+
+class TestMerge(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.tmpdir = tempfile.mkdtemp()
+        srs, fw, procedure = (os.path.join(cls.tmpdir, name) for name in ("srs.docx", "fw.docx", "procedure.docx"))
+        synthetic.requirements_document(srs, 2, 2, reqid="XIFU-SRS-R")
+        synthetic.requirements_document(fw, 3, 2)
+        synthetic.procedure_document(procedure, 2, 3)
+        cls.srs = Requirement(srs, "XIFU-SRS-R", engine="stream").docx_to_XML().encode("utf-8")
+        cls.fw = Requirement(fw, synthetic.REQ_ID, engine="stream").docx_to_XML().encode("utf-8")
+        cls.procedure = DocXML(procedure, engine="stream").docx_to_xml().encode("utf-8")
+
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir)
+
+    def test_read_back(self):
+
+        writer = XMLWriter()
+        testlink_xml.write_requirements(list(testlink_xml.iter_reqspecs(io.BytesIO(self.fw))), writer)
+        self.assertEqual(writer.drain().encode("utf-8"), self.fw)
+        testlink_xml.write_testsuites(list(testlink_xml.iter_testsuites(io.BytesIO(self.procedure))), writer)
+        self.assertEqual(writer.drain().encode("utf-8"), self.procedure)
+
+    def test_merge_requirements(self):
+
+        out = io.StringIO()
+        report = merge_requirements([io.BytesIO(self.srs), io.BytesIO(self.fw), io.BytesIO(self.srs)], out)
+        self.assertEqual((report["specifications"], report["requirements"]), (5, 10))
+        self.assertEqual(report["duplicates"], ["XIFU-SRS-R-{0:04d}".format(number) for number in range(1, 5)])
+        specs = list(testlink_xml.iter_reqspecs(io.BytesIO(out.getvalue().encode("utf-8"))))
+        self.assertEqual([spec.doc_id for spec in specs], ["V1.0-SRS{0}".format(number) for number in range(1, 6)])
+        self.assertEqual([spec.node_order for spec in specs], [1, 2, 3, 4, 5])
+        self.assertTrue(validate(io.BytesIO(out.getvalue().encode("utf-8")))["valid"])
+
+    def test_merge_testsuites(self):
+
+        path = os.path.join(self.tmpdir, "procedure.xml")
+        with open(path, "wb") as f:
+            f.write(self.procedure)
+        output = os.path.join(self.tmpdir, "merged.xml")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(cli.main(["merge", "-o", output, path, path]), 0)
+        with open(output, "rb") as f:
+            self.assertEqual(f.read(), self.procedure)
+        out = io.StringIO()
+        report = merge_testsuites([io.BytesIO(self.procedure), io.BytesIO(self.procedure.replace(b"Suite", b"Group"))], out)
+        self.assertEqual((report["testsuites"], report["testcases"], report["duplicates"]), (4, 12, []))
+        testsuites = list(testlink_xml.iter_testsuites(io.BytesIO(out.getvalue().encode("utf-8"))))
+        self.assertEqual([testsuite.node_order for testsuite in testsuites], [1, 2, 3, 4])
+        self.assertEqual([testcase.node_order for testsuite in testsuites for testcase in testsuite.testcases],
+                         list(range(1, 13)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+'''
+Tests of the intermediate model and of its TestLink XML serializer
+'''
+import os
+import pickle
+import unittest
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools import model, testlink_xml
+from testlink_tools.xmlwriter import XMLWriter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestModel(unittest.TestCase):
+
+
+    def test_requirements(self):
+
+        req = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream")
+        specs = req.parse()
+        self.assertEqual(len(specs), 10)
+        self.assertEqual(sum(len(spec.requirements) for spec in specs), 59)
+        self.assertIsInstance(specs[0].requirements[0], model.Requirement)
+        writer = XMLWriter()
+        testlink_xml.write_requirements(specs, writer)
+        self.assertEqual(writer.drain(), req.docx_to_XML())
+
+    def test_testsuites(self):
+
+        procedure = DocXML(TEMPLATE_DOCX, engine="stream")
+        testsuites = procedure.parse()
+        self.assertEqual([len(testsuite.testcases) for testsuite in testsuites], [1, 2, 1])
+        testcase = testsuites[0].testcases[0]
+        self.assertEqual(testcase.node_order, 1)
+        self.assertEqual(testcase.steps[-1].actions, "Lister les participants au test")
+        writer = XMLWriter()
+        testlink_xml.write_testsuites(testsuites, writer)
+        self.assertEqual(writer.drain(), procedure.docx_to_xml())
+        # the model is picklable and comparable
+        self.assertEqual(pickle.loads(pickle.dumps(testsuites)), testsuites)
+        self.assertEqual(testsuites[0].as_dict()["testcases"][0]["name"], testcase.name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+'''
+Tests of the conversion profiles
+'''
+import json
+import os
+import time
+import unittest
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools.profiling import Profile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestProfile(unittest.TestCase):
+
+
+    def test_nested_phases(self):
+
+        profile = Profile()
+        with profile.phase("walk"):
+            with profile.phase("emit"):
+                time.sleep(0.02)
+        self.assertGreaterEqual(profile.phases["emit"], 0.02)
+        self.assertLess(profile.phases["walk"], 0.01)
+
+    def test_requirement_counters(self):
+
+        profile = Profile()
+        for engine in ("docx", "stream"):
+            xml = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", engine=engine).docx_to_XML(profile=profile)
+            self.assertEqual(xml, Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", engine="stream").docx_to_XML())
+        report = json.loads(json.dumps(profile.report()))
+        self.assertEqual([run["engine"] for run in report["runs"]], ["docx", "stream"])
+        self.assertEqual(report["counters"]["requirements"], 2 * 59)
+        self.assertEqual(report["counters"]["bytes_written"], 2 * len(xml.encode("utf-8")))
+        self.assertEqual(sum(section["counters"].get("requirements", 0) for section in report["sections"]), 2 * 59)
+        self.assertEqual(sum(section["bytes_written"] for section in report["sections"][:11]), len(xml.encode("utf-8")) - len(
+            Requirement.XML_HEADER + '\n' + Requirement.XML_DOC_START + '\n' + Requirement.XML_SPEC_STOP + '\n' + Requirement.XML_DOC_STOP))
+        self.assertIn("General requirements", [section["title"] for section in report["sections"]])
+
+    def test_testcases_counters(self):
+
+        profile = Profile()
+        DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml(profile=profile)
+        self.assertEqual(profile.counters["test_cases"], 4)
+        self.assertGreaterEqual(profile.counters["steps"], profile.counters["test_cases"])
+
+    def test_captures(self):
+
+        profile = Profile("cprofile", top=5)
+        DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml(profile=profile)
+        self.assertEqual(len(profile.report()["capture"]["functions"]), 5)
+        profile = Profile("tracemalloc", top=5)
+        DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml(profile=profile)
+        self.assertGreater(profile.report()["capture"]["peak_bytes"], 0)
+        with self.assertRaises(ValueError):
+            Profile("perf")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+'''
+Tests of the execution results written from test bench logs
+'''
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from lxml import etree
+
+from benchmarks import synthetic
+from testcases.testcases import DocXML
+from testlink_tools import cli
+from testlink_tools.results import CaseIndex, iter_executions, iter_log_records, parse_timestamp, write_results
+
+BENCH_CSV = """Test Case,Step,Verdict,Timestamp,Notes
+Test case 1,1,PASS,2026-03-02T10:00:00,
+Test case 1,2,fail,2026-03-02T10:00:05,timeout on the link
+Test case 2,,passed,2026-03-02T10:01:00,all good
+Test case 2,9,pass,,
+Test case 7,1,pass,,
+Test Suite 2: synthetic suite/Test case 4,1,not run,,
+Test Suite 2: synthetic suite/Test case 4,2,blocked,1772445720,no bench B
+Test case 5,1,maybe,,
+"""
+
+class TestResults(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.tmpdir = tempfile.mkdtemp()
+        procedure = os.path.join(cls.tmpdir, "procedure.docx")
+        synthetic.procedure_document(procedure, 2, 3, steps=3)
+        cls.xml = os.path.join(cls.tmpdir, "procedure.xml")
+        with open(cls.xml, "w", encoding="utf-8") as f:
+            DocXML(procedure, engine="stream").write_xml(f)
+        cls.log = os.path.join(cls.tmpdir, "bench.csv")
+        with open(cls.log, "w", encoding="utf-8") as f:
+            f.write(BENCH_CSV)
+
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir)
+
+    def test_results(self):
+
+        index = CaseIndex.from_file(self.xml)
+        self.assertEqual(len(index), 6)
+        checkpoint = os.path.join(self.tmpdir, "ids.jsonl")
+        with open(checkpoint, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": "testsuite:Test Suite 1: synthetic suite", "id": "10"}) + "\n")
+            f.write(json.dumps({"key": "testcase:Test Suite 1: synthetic suite/Test case 1", "id": "11"}) + "\n")
+        self.assertEqual(index.load_ids(checkpoint), 1)
+        out = io.StringIO()
+        report = write_results(iter_executions(iter_log_records([self.log])), index, out, testplan="Plan", build="B1")
+        self.assertEqual((report["records"], report["executions"], report["steps"], report["skipped"],
+                          report["unidentified"]), (8, 3, 3, 2, 2))
+        self.assertEqual([(issue["line"], issue["message"].split(" '")[0]) for issue in report["issues"]],
+                         [(5, "Test Case"), (6, "Test Case"), (9, "unknown verdict")])
+        root = etree.fromstring(out.getvalue().encode("utf-8"))
+        self.assertEqual(root.find("build").get("name"), "B1")
+        testcases = root.findall("testcase")
+        self.assertEqual([(testcase.get("id"), testcase.findtext("result")) for testcase in testcases],
+                         [("11", "f"), (None, "p"), (None, "b")])
+        self.assertEqual(testcases[0].findtext("timestamp"), "2026-03-02 10:00:05")
+        self.assertEqual([(step.findtext("step_number"), step.findtext("result"), step.findtext("notes"))
+                          for step in testcases[0].iter("step")], [("1", "p", ""), ("2", "f", "timeout on the link")])
+        self.assertEqual(testcases[1].findtext("notes"), "all good")
+
+    def test_timestamps(self):
+
+        self.assertEqual(parse_timestamp("2026-03-02T10:00:05Z"), "2026-03-02 10:00:05")
+        for text in ("1e20", "-1e20", "inf", "nan", "yesterday"):
+            with self.assertRaises(ValueError):
+                parse_timestamp(text)
+        # an epoch out of range is an issue of its line, the execution is still written
+        log = os.path.join(self.tmpdir, "overflow.jsonl")
+        with open(log, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"testcase": "Test case 1", "verdict": "pass", "time": 1e20}) + "\n")
+        report = write_results(iter_executions(iter_log_records([log])), CaseIndex.from_file(self.xml), io.StringIO())
+        self.assertEqual(report["executions"], 1)
+        self.assertEqual([issue["message"] for issue in report["issues"]], ["unreadable timestamp '1e+20'"])
+
+    def test_cli(self):
+
+        log = os.path.join(self.tmpdir, "bench.jsonl")
+        with open(log, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"testcase": "Test case 3", "step": 3, "verdict": "OK"}) + "\n\n")
+            f.write(json.dumps({"testcase": "Test case  6 ", "verdict": "KO", "time": 1772445720}) + "\n")
+        output = os.path.join(self.tmpdir, "results.xml")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(cli.main(["results", "-p", self.xml, "-o", output, "--tester", "bench", log]), 0)
+        root = etree.parse(output).getroot()
+        self.assertEqual([(testcase.get("name"), testcase.findtext("tester"), testcase.findtext("result"))
+                          for testcase in root], [("Test case 3", "bench", "p"), ("Test case 6", "bench", "f")])
+
+if __name__ == "__main__":
+    unittest.main()
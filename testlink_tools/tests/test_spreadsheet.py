@@ -0,0 +1,65 @@
+'''
+Tests of the spreadsheet export and ingestion of the requirements
+'''
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from requirements.requirement import Requirement
+from testlink_tools import cli, spreadsheet
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+
+class TestSpreadsheet(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.requirement = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream")
+        cls.xml = cls.requirement.docx_to_XML()
+
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir)
+
+    def test_round_trip(self):
+
+        for write in (self.requirement.write_xlsx, self.requirement.write_csv):
+            path = os.path.join(self.tmpdir, "requirements." + write.__name__.split("_")[1])
+            self.assertEqual(write(path), 59)
+            out = io.StringIO()
+            self.assertEqual(spreadsheet.spreadsheet_to_xml(path, out), (10, 59))
+            self.assertEqual(out.getvalue(), self.xml)
+        output = os.path.join(self.tmpdir, "out")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(cli.main(["convert", "-j", "1", "-o", output, path]), 0)
+        with open(os.path.join(output, "requirements.xml"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), self.xml)
+
+    def test_rows(self):
+
+        path = os.path.join(self.tmpdir, "rows.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("DocID,Title,Type,Status,Version\n"
+                    "R-1,First,Constraint,Draft,3\n"
+                    ",,,,\n"
+                    "R-2,Second,5,,x\n")
+        requirements = [spreadsheet.row_to_requirement(row) for row in spreadsheet.iter_rows(path)]
+        self.assertEqual([(r.docid, r.title, r.type, r.status, r.version) for r in requirements],
+                         [("R-1", "First", 6, "D", 3), ("R-2", "Second", 5, "V", 1)])
+        specs = spreadsheet.read_reqspecs(path)
+        self.assertEqual([(spec.doc_id, len(spec.requirements)) for spec in specs], [(None, 2)])
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("title,status\nFirst,V\n")
+        with self.assertRaises(ValueError):
+            list(spreadsheet.iter_rows(path))
+
+if __name__ == "__main__":
+    unittest.main()
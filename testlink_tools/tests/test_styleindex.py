@@ -0,0 +1,55 @@
+'''
+Tests of the per-document style index
+'''
+import os
+import unittest
+
+from docx.api import Document
+
+from testlink_tools import docxstream
+from testlink_tools.styleindex import StyleIndex, heading_level
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+STYLES = """<w:styles {0}>
+  <w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Titre2"><w:name w:val="Titre 2"/><w:basedOn w:val="Normal"/></w:style>
+  <w:style w:type="paragraph" w:styleId="ReqTitle"><w:name w:val="Req Title"/><w:basedOn w:val="Titre2"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Chapter"><w:name w:val="Chapter"/><w:pPr><w:outlineLvl w:val="2"/></w:pPr></w:style>
+  <w:style w:type="paragraph" w:styleId="Body"><w:name w:val="Body"/><w:pPr><w:outlineLvl w:val="9"/></w:pPr></w:style>
+  <w:style w:type="character" w:styleId="Strong"><w:name w:val="Heading 2 Char"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Loop1"><w:name w:val="Loop 1"/><w:basedOn w:val="Loop2"/></w:style>
+  <w:style w:type="paragraph" w:styleId="Loop2"><w:name w:val="Loop 2"/><w:basedOn w:val="Loop1"/></w:style>
+</w:styles>""".format(W).encode("utf-8")
+
+class TestStyleIndex(unittest.TestCase):
+
+
+    def test_levels(self):
+
+        index = StyleIndex(STYLES)
+        self.assertEqual(index.level("Titre2"), 2)
+        self.assertEqual(index.level("ReqTitle"), 2)
+        self.assertEqual(index.level("Chapter"), 3)
+        self.assertEqual(index.name("ReqTitle"), "req title")
+        for style_id in ("Normal", "Body", "Strong", "Loop1", None, "Unknown"):
+            self.assertIsNone(index.level(style_id), style_id)
+        # a character style id is resolved as the default paragraph style
+        self.assertEqual(index.name("Strong"), "normal")
+        self.assertEqual(heading_level("Überschrift 3"), 3)
+        self.assertIsNone(heading_level("TOC Heading"))
+
+    def test_same_as_python_docx(self):
+
+        document = Document(TEMPLATE_DOCX)
+        index = StyleIndex(docxstream.styles_xml(TEMPLATE_DOCX))
+        # the Heading 2 and Heading 3 paragraphs found by the converters (the title has an outline level 1)
+        for paragraph in document.paragraphs:
+            name = paragraph.style.name.lower()
+            for level in (2, 3):
+                self.assertEqual(index.block_level(paragraph) == level, name == "heading {0}".format(level), paragraph.text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+'''
+Tests of the table snapshot layer
+'''
+import io
+import unittest
+
+import docx
+
+from testlink_tools import docxstream, tablegrid
+
+class TestTableGrid(unittest.TestCase):
+
+
+    def setUp(self):
+
+        document = docx.Document()
+        table = document.add_table(rows=3, cols=3)
+        for i, row in enumerate(table.rows):
+            for j, cell in enumerate(row.cells):
+                cell.text = "{0}{1}".format(i, j)
+        table.cell(0, 0).merge(table.cell(1, 0))
+        table.cell(2, 1).merge(table.cell(2, 2))
+        self.table = table
+        self.expected = [["00\n10", "01", "02"],
+                         ["00\n10", "11", "12"],
+                         ["20", "21\n22", "21\n22"]]
+        self.stream = io.BytesIO()
+        document.save(self.stream)
+
+    def test_docx_table(self):
+
+        self.assertEqual(tablegrid.snapshot(self.table), self.expected)
+
+    def test_stream_table(self):
+
+        tables = [block for block in docxstream.iter_block_items(self.stream)
+                  if isinstance(block, docxstream.StreamTable)]
+        self.assertEqual(tablegrid.snapshot(tables[0]), self.expected)
+
+    def test_grid_before(self):
+
+        rows = [(1, [("a", 2, None)]), (0, [("b", 1, None), ("c", 1, "continue")])]
+        self.assertEqual(tablegrid.layout(rows, 4), [["", "a", "a", ""], ["b", "a", "", ""]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+'''
+Tests of the declarative layout of the Test Case tables
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+import docx
+from lxml import etree
+
+from testcases.testcases import DocXML
+from testlink_tools import model, testlink_xml
+from testlink_tools.tablelayout import ROLE_NAME, ROLE_PRECONDITIONS, ROLE_STEP, TEMPLATE_LAYOUT, TableLayout
+from testlink_tools.validate import validate
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestTableLayout(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        # a variant of the Template: no preconditions, expected results before the actions, one closing row
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.variant = os.path.join(cls.tmpdir, "variant.docx")
+        document = docx.Document()
+        document.add_heading("Test Suite: variant", 2)
+        table = document.add_table(rows=6, cols=3)
+        name = table.cell(0, 0).merge(table.cell(0, 2))
+        name.paragraphs[0].text = "Test case V1"
+        name.paragraphs[0].style = "Heading 3"
+        for column, header in enumerate(("Step", "Expected results", "Step actions")):
+            table.cell(1, column).text = header
+        for row in range(2, 5):
+            table.cell(row, 1).text = "expected {0}".format(row - 1)
+            table.cell(row, 2).text = "action {0}".format(row - 1)
+        table.cell(5, 0).merge(table.cell(5, 2)).text = "Comments:"
+        document.save(cls.variant)
+
+    @classmethod
+    def tearDownClass(cls):
+
+        shutil.rmtree(cls.tmpdir)
+
+    def test_template(self):
+
+        layout = TableLayout.from_template(TEMPLATE_DOCX)
+        self.assertEqual(layout, TableLayout(TEMPLATE_LAYOUT))
+        self.assertEqual(layout.plan(8), (ROLE_NAME, None, ROLE_PRECONDITIONS, None, ROLE_STEP, ROLE_STEP))
+        # the short tables are read as by the positional reader
+        self.assertEqual([len(layout.plan(count)) for count in range(1, 7)], [1, 0, 3, 2, 5, 4])
+        with self.assertRaises(ValueError):
+            TableLayout({"name": (0, 0)})
+
+    def test_variant(self):
+
+        layout = TableLayout.from_template(self.variant)
+        self.assertEqual(layout.spec, {"name": (0, 0), "preconditions": None, "steps": 2, "footer": 1,
+                                       "actions": 2, "expectedresults": 1})
+        for engine in ("docx", "stream"):
+            testsuites = DocXML(self.variant, engine=engine, layout=self.variant).parse()
+            testcase = testsuites[0].testcases[0]
+            self.assertEqual((testcase.name, testcase.preconditions), ("Test case V1", None))
+            self.assertEqual([(step.actions, step.expectedresults) for step in testcase.steps[:-1]],
+                             [("<p>action {0}</p>\n".format(n), "<p>expected {0}</p>\n".format(n)) for n in (1, 2, 3)])
+        # read with the layout of the Template, the steps are lost in the header and footer rows
+        testcase = DocXML(self.variant, engine="stream").parse()[0].testcases[0]
+        self.assertEqual([step.actions for step in testcase.steps], ["Lister les participants au test"])
+
+    def test_no_expected_results(self):
+
+        layout = dict(TEMPLATE_LAYOUT, expectedresults=None)
+        for engine in ("docx", "stream"):
+            xml = DocXML(TEMPLATE_DOCX, engine=engine, layout=layout).docx_to_xml().encode("utf-8")
+            root = etree.fromstring(xml)
+            steps = list(root.iter("step"))
+            # every step is closed, the steps read from the table have no expected results
+            self.assertTrue(all(step.find("step") is None for step in steps))
+            self.assertIsNone(steps[0].find("expectedresults"))
+            with tempfile.TemporaryFile() as f:
+                f.write(xml)
+                f.seek(0)
+                self.assertTrue(validate(f)["valid"])
+        # a Test Case without a name is not written
+        with self.assertRaises(ValueError):
+            testlink_xml.testcase_xml(model.TestCase(None, steps=[model.Step(1, "action")]))
+
+    def test_unnamed_table(self):
+
+        # the name cell of the layout is out of the tables: the Test Case tables are skipped with a warning
+        layout = dict(TEMPLATE_LAYOUT, name=(0, 9))
+        for engine in ("docx", "stream"):
+            with self.assertLogs("testcases.testcases", "WARNING") as logs:
+                xml = DocXML(TEMPLATE_DOCX, engine=engine, layout=layout).docx_to_xml().encode("utf-8")
+            self.assertEqual(len(logs.output), 4)
+            self.assertIsNone(etree.fromstring(xml).find(".//testcase"))
+            with tempfile.TemporaryFile() as f:
+                f.write(xml)
+                f.seek(0)
+                self.assertTrue(validate(f)["valid"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+'''
+Tests of the traceability index
+'''
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from benchmarks import synthetic
+from testcases.testcases import DocXML
+from testlink_tools import cli, model
+from testlink_tools.traceindex import TraceIndex
+
+class TestTraceIndex(unittest.TestCase):
+
+
+    def test_queries(self):
+
+        requirements = [model.Requirement("XIFU-DRE-R-0001", "Reset"), model.Requirement("XIFU-DRE-R-0002", "Clock"),
+                        model.Requirement("XIFU-DRE-R-0003", "Power")]
+        specs = [model.ReqSpec("Firmware requirements", "V1.0-SRS1", requirements=requirements)]
+        testcases = [model.TestCase("TC reset", preconditions="XIFU-DRE-R-0001",
+                                    steps=[model.Step(1, "Reset the board", "XIFU-DRE-R-0001 and XIFU-DRE-R-0002 are met")]),
+                     model.TestCase("TC clock", steps=[model.Step(1, "Measure the clock", "see XIFU-DRE-R-0002, XIFU-DRE-R-0009")])]
+        testsuites = [model.TestSuite("Suite 1", "", 1, testcases)]
+        with TraceIndex(":memory:") as index:
+            index.add_requirements("srs.docx", specs)
+            index.add_testsuites("procedure.docx", testsuites)
+            self.assertEqual(index.coverage("XIFU-DRE-R"),
+                             {"XIFU-DRE-R-0001": 1, "XIFU-DRE-R-0002": 2, "XIFU-DRE-R-0009": 1})
+            self.assertEqual([name for _, _, name in index.covering("XIFU-DRE-R-0002")], ["TC reset", "TC clock"])
+            self.assertEqual(index.uncovered(), ["XIFU-DRE-R-0003"])
+            self.assertEqual(index.dangling(), [("XIFU-DRE-R-0009", "TC clock")])
+            self.assertEqual(index.requirement("XIFU-DRE-R-0003")["spec_doc_id"], "V1.0-SRS1")
+            # indexing a document again replaces its entries only
+            index.add_testsuites("procedure.docx", testsuites[:0])
+            self.assertEqual(index.coverage(), {})
+            self.assertEqual(len(index.uncovered()), 3)
+            index.remove("srs.docx")
+            self.assertEqual(index.documents(), [(os.path.abspath("procedure.docx"), "testcases")])
+
+    def test_convert_index(self):
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            docs = os.path.join(tmpdir, "docs")
+            os.makedirs(docs)
+            synthetic.requirements_document(os.path.join(docs, "a_srs.docx"), 2, 3)
+            synthetic.procedure_document(os.path.join(docs, "b_procedure.docx"), 2, 2, reqid=synthetic.REQ_ID)
+            database = os.path.join(tmpdir, "trace.db")
+            with redirect_stdout(io.StringIO()):
+                status = cli.main(["convert", "--index", database, "-j", "1", "-o", os.path.join(tmpdir, "out"), docs])
+            self.assertEqual(status, 0)
+            # the procedure is converted first, 4 of the 6 requirements are covered
+            with open(os.path.join(tmpdir, "out", "a_srs.xml"), encoding="utf-8") as f:
+                xml = f.read()
+            self.assertEqual(xml.count("<expected_coverage>1</expected_coverage>"), 4)
+            self.assertEqual(xml.count("<expected_coverage>0</expected_coverage>"), 2)
+            with open(os.path.join(tmpdir, "out", "b_procedure.xml"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), DocXML(os.path.join(docs, "b_procedure.docx"), engine="stream").docx_to_xml())
+            with TraceIndex(database) as index:
+                self.assertEqual(index.uncovered(), [synthetic.REQ_ID + "-0005", synthetic.REQ_ID + "-0006"])
+            output = io.StringIO()
+            with redirect_stdout(output):
+                cli.main(["trace", database, synthetic.REQ_ID + "-0003"])
+            self.assertIn("Test case 3", output.getvalue())
+        finally:
+            shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    unittest.main()
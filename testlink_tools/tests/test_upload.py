@@ -0,0 +1,119 @@
+'''
+Tests of the XML-RPC uploader against the local fake server
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools.fakeserver import FakeTestLink
+from testlink_tools.upload import UploadError, Uploader
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+# a "Nominal" Test Suite in each chapter
+NESTED_XML = """<testsuite name="">
+<testsuite name="Chapter 1"><testsuite name="Nominal"><testcase name="Case 1"/></testsuite></testsuite>
+<testsuite name="Chapter 2"><testsuite name="Nominal"><testcase name="Case 1"/></testsuite></testsuite>
+</testsuite>"""
+
+class TestUpload(unittest.TestCase):
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        cls.requirements = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", engine="stream").docx_to_XML()
+        cls.procedure = DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml()
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.server = None
+
+    def tearDown(self):
+
+        if self.server is not None:
+            self.server.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def start(self, **kwargs):
+
+        self.server = FakeTestLink(**kwargs).start()
+        return self.server
+
+    def test_upload(self):
+
+        server = self.start()
+        with Uploader(server.url, "devkey", "PROJECT", jobs=3) as uploader:
+            report = uploader.upload_xml(self.requirements)
+            self.assertEqual((report["created"], dict(report["failed"])), (59 + 10, {}))
+            report = uploader.upload_xml(self.procedure)
+            self.assertEqual((report["created"], dict(report["failed"])), (3 + 4, {}))
+        self.assertEqual((len(server.reqspecs), len(server.requirements)), (10, 59))
+        self.assertEqual((len(server.testsuites), len(server.testcases)), (3, 4))
+        suite_ids = set(server.testsuites)
+        self.assertTrue(all(testcase["testsuiteid"] in suite_ids for testcase in server.testcases.values()))
+        # the connections are kept alive: one per thread
+        self.assertLessEqual(server.connections, 4)
+
+    def test_retries(self):
+
+        server = self.start(fail_every=3)
+        with Uploader(server.url, "devkey", "PROJECT", jobs=2, backoff=0.001) as uploader:
+            report = uploader.upload_xml(self.procedure)
+        self.assertEqual((report["created"], dict(report["failed"])), (7, {}))
+        self.assertEqual(report["retries"], server.failures)
+        self.assertEqual(len(server.testcases), 4)
+
+    def test_resume(self):
+
+        checkpoint = os.path.join(self.tmpdir, "procedure.upload.jsonl")
+        server = self.start(fail_every=4)
+        with Uploader(server.url, "devkey", "PROJECT", jobs=1, retries=0) as uploader:
+            report = uploader.upload_xml(self.procedure, checkpoint)
+        self.assertTrue(report["failed"])
+        self.assertEqual(report["created"] + len(report["failed"]), 7)
+
+        server.fail_every = 0
+        with Uploader(server.url, "devkey", "PROJECT") as uploader:
+            resumed = uploader.upload_xml(self.procedure, checkpoint)
+        self.assertEqual(dict(resumed["failed"]), {})
+        self.assertEqual(resumed["created"], len(report["failed"]))
+        self.assertEqual(len(server.testcases), 4)
+
+    def test_nested_names(self):
+
+        checkpoint = os.path.join(self.tmpdir, "nested.upload.jsonl")
+        server = self.start()
+        with Uploader(server.url, "devkey", "PROJECT", jobs=2) as uploader:
+            keys = [operation.key for operation in uploader.operations(NESTED_XML)]
+            self.assertIn("testcase:Chapter 2/Nominal/Case 1", keys)
+            self.assertEqual(len(set(keys)), 6)
+            report = uploader.upload_xml(NESTED_XML, checkpoint)
+            self.assertEqual((report["created"], dict(report["failed"])), (6, {}))
+            # resumed: nothing is missing
+            resumed = uploader.upload_xml(NESTED_XML, checkpoint)
+            self.assertEqual((resumed["created"], resumed["skipped"]), (0, 6))
+        self.assertEqual(len(server.testcases), 2)
+        self.assertEqual(len(set(testcase["testsuiteid"] for testcase in server.testcases.values())), 2)
+
+    def test_errors(self):
+
+        server = self.start()
+        with Uploader(server.url, "wrong key", "PROJECT") as uploader:
+            with self.assertRaises(UploadError):
+                uploader.upload_xml(self.procedure)
+        with Uploader(server.url, "devkey", "PROJECT") as uploader:
+            with self.assertRaises(ValueError):
+                uploader.upload_xml("<unknown/>")
+            # a requirement outside a specification is not dropped silently
+            with self.assertRaises(ValueError):
+                uploader.upload_xml("<requirement-specification><requirement><docid>R-1</docid></requirement>"
+                                    "</requirement-specification>")
+
+if __name__ == "__main__":
+    unittest.main()
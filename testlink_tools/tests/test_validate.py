@@ -0,0 +1,76 @@
+'''
+Tests of the validator of the TestLink XML
+'''
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools import cli
+from testlink_tools.validate import validate
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+REQUIREMENTS_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<requirement-specification>
+   <req_spec title="1 requirements" doc_id="V1.0-SRS1">
+      <type>3</type>
+      <requirement><docid>R-0001</docid><title>A</title><status>V</status><type>2</type></requirement>
+      <requirement><docid>R-0002</docid><title>B</title><status>X</status><type>9</type></requirement>
+   </req_spec>
+   <req_spec title="2 requirements" doc_id="V1.0-SRS2">
+      <requirement><docid>R-0001</docid><title>C</title><node_order>first</node_order></requirement>
+      <requirement><title>D</title><testcase/></requirement>
+   </req_spec>
+</requirement-specification>"""
+
+TESTCASES_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<testsuite id="" name="">
+<testsuite name="Suite 1"><testcase name="TC 1"><steps><step><step_number>1</step_number></step></steps></testcase>
+<testcase name="TC 1"><steps><step><actions>no number</actions></step></steps></testcase></testsuite>
+<testsuite name="Suite 2"><testcase name="TC 1"></testcase><testcase name="TC 2"><steps><step>
+"""
+
+class TestValidate(unittest.TestCase):
+
+
+    def test_generated_xml_is_valid(self):
+
+        xml = Requirement(REQ_DOCX, "DRE-DMX-FW-REQ", "V0.8", engine="stream").docx_to_XML()
+        report = validate(io.BytesIO(xml.encode("utf-8")))
+        self.assertTrue(report["valid"], report["issues"])
+        self.assertEqual((report["kind"], report["specifications"], report["requirements"]), ("requirements", 10, 59))
+        report = validate(io.BytesIO(DocXML(TEMPLATE_DOCX, engine="stream").docx_to_xml().encode("utf-8")))
+        self.assertTrue(report["valid"], report["issues"])
+        self.assertEqual((report["kind"], report["testsuites"], report["testcases"]), ("testcases", 3, 4))
+
+    def test_issues(self):
+
+        report = validate(io.BytesIO(REQUIREMENTS_XML))
+        self.assertFalse(report["valid"])
+        issues = [(issue["line"], issue["section"], issue["message"].split(" '")[0]) for issue in report["issues"]]
+        self.assertEqual(issues, [(6, "1 requirements", "unknown requirement status"),
+                                  (6, "1 requirements", "unknown requirement type"),
+                                  (9, "2 requirements", "duplicate requirement docid"),
+                                  (9, "2 requirements", "<node_order> is not an integer:"),
+                                  (10, "2 requirements", "unexpected element <testcase> in <requirement>"),
+                                  (10, "2 requirements", "<testcase> without name"),
+                                  (10, "2 requirements", "<requirement> without <docid>")])
+        # the same Test Case name in another Test Suite is not a duplicate, the scan stops at the syntax error
+        report = validate(io.BytesIO(TESTCASES_XML))
+        issues = [(issue["line"], issue["section"], issue["message"].split(" '")[0]) for issue in report["issues"]]
+        self.assertEqual(issues[:2], [(4, "Suite 1", "duplicate Test Case name"),
+                                      (4, "Suite 1", "<step> without <step_number>")])
+        self.assertEqual((issues[2][1], issues[2][2].split(":")[0]), ("Suite 2", "malformed XML"))
+        self.assertEqual(report["testcases"], 4)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = cli.main(["validate", os.path.join(ROOT_DIR, "missing.xml")])
+        self.assertEqual(status, 1)
+
+if __name__ == "__main__":
+    unittest.main()
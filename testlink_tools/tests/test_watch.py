@@ -0,0 +1,92 @@
+'''
+Tests of the watch mode
+'''
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from testlink_tools import cli
+from testlink_tools.watch import InotifyBackend, PollingBackend, Watcher
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REQ_DOCX = os.path.join(ROOT_DIR, "requirements", "tests", "0065-DRE_TDM_Firmware_Requirements-V0.8.docx")
+TEMPLATE_DOCX = os.path.join(ROOT_DIR, "testcases", "test", "Template.docx")
+
+class TestWatch(unittest.TestCase):
+
+
+    def setUp(self):
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.watched = os.path.join(self.tmpdir, "docs")
+        os.makedirs(self.watched)
+        shutil.copy(TEMPLATE_DOCX, os.path.join(self.watched, "procedure.docx"))
+        self.options = cli.conversion_options(cli.build_parser().parse_args(
+            ["watch", self.watched, "--reqid", "DRE-DMX-FW-REQ"]))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmpdir)
+
+    def test_update(self):
+
+        watcher = Watcher(self.watched, self.options, backend=PollingBackend(self.watched, 0.01))
+        results = watcher.update()
+        self.assertEqual([(result["kind"], result["status"]) for result in results], [("testcases", "OK")])
+        self.assertEqual(watcher.update(), [])
+        # a lock file of Word is ignored, a new document is converted
+        open(os.path.join(self.watched, "~$quirements.docx"), "w").close()
+        shutil.copy(REQ_DOCX, os.path.join(self.watched, "requirements.docx"))
+        self.assertTrue(watcher.wait(1.0))
+        results = watcher.update()
+        self.assertEqual([result["kind"] for result in results], ["requirements"])
+        # the same document saved again is taken from its warm section cache
+        path = os.path.join(self.watched, "requirements.docx")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        watcher.update()
+        cache = watcher.caches[os.path.normpath(path)]
+        self.assertEqual(cache.misses, cache.hits)
+        with open(os.path.join(self.watched, "requirements.xml"), encoding="utf-8") as f:
+            self.assertEqual(f.read().count("<requirement>"), 59)
+
+    def test_inotify(self):
+
+        try:
+            backend = InotifyBackend(self.watched)
+        except OSError:
+            self.skipTest("inotify is not available")
+        try:
+            self.assertFalse(backend.wait(0.05))
+            os.makedirs(os.path.join(self.watched, "sub"))
+            self.assertTrue(backend.wait(1.0))
+            shutil.copy(TEMPLATE_DOCX, os.path.join(self.watched, "sub", "new.docx"))
+            self.assertTrue(backend.wait(1.0))
+        finally:
+            backend.close()
+
+    def test_run(self):
+
+        stream = io.StringIO()
+        stop = threading.Event()
+        watcher = Watcher(self.watched, self.options, debounce=0.05, backend=PollingBackend(self.watched, 0.01))
+        thread = threading.Thread(target=watcher.run, args=(stream, stop.is_set))
+        thread.start()
+        try:
+            deadline = time.monotonic() + 10
+            while "watching" not in stream.getvalue() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            shutil.copy(TEMPLATE_DOCX, os.path.join(self.watched, "copy.docx"))
+            while "copy.docx" not in stream.getvalue() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertIn("copy.docx", stream.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.watched, "copy.xml")))
+
+if __name__ == "__main__":
+    unittest.main()
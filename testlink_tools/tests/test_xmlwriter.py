@@ -0,0 +1,74 @@
+'''
+Tests of the incremental XML writer
+'''
+import io
+import unittest
+
+import docx
+from lxml import etree
+
+from requirements.requirement import Requirement
+from testcases.testcases import DocXML
+from testlink_tools.xmlwriter import XMLWriter, cdata, escape, quoteattr
+
+class TestXMLWriter(unittest.TestCase):
+
+
+    def test_escaping(self):
+
+        self.assertEqual(escape('a < b & c > "d"'), 'a &lt; b &amp; c &gt; "d"')
+        self.assertEqual(quoteattr('say "a<b"'), 'say &quot;a&lt;b&quot;')
+        self.assertEqual(cdata("x]]>y"), "<![CDATA[x]]]]><![CDATA[>y]]>")
+
+    def test_writer(self):
+
+        out = io.StringIO()
+        writer = XMLWriter(out)
+        writer.write("<a>")
+        writer.begin_capture()
+        writer.element("b", "1 < 2", "\n  ")
+        self.assertEqual(writer.end_capture(), "\n  <b>1 &lt; 2</b>")
+        writer.write("</a>")
+        self.assertEqual(out.getvalue(), "<a>\n  <b>1 &lt; 2</b></a>")
+        self.assertEqual(writer.bytes_written, len(out.getvalue()))
+        writer.write("<c>é</c>")
+        self.assertEqual(writer.bytes_written, len(out.getvalue().encode("utf-8")))
+
+        writer = XMLWriter()
+        writer.write("a")
+        writer.write("b")
+        self.assertEqual(writer.drain(), "ab")
+        self.assertEqual(writer.drain(), "")
+
+    def test_well_formed_output(self):
+
+        document = docx.Document()
+        document.add_heading('Special "requirements" & <tags>', 2)
+        document.add_paragraph("Scope a < b & c ]]> d")
+        table = document.add_table(rows=5, cols=2)
+        for row, text in enumerate(["T & <t>", "XIFU-DRE-DMX-FW-R-1", "x ]]> y", "Feature", "Draft"]):
+            table.cell(row, 1).text = text
+        document.add_heading('Test Suite: "quotes" & <b>', 2)
+        document.add_paragraph("details ]]> & <i>")
+        table = document.add_table(rows=7, cols=4)
+        paragraph = table.cell(0, 0).paragraphs[0]
+        paragraph.text = 'Test case "1" & <2>'
+        paragraph.style = "Heading 3"
+        table.cell(2, 0).text = "pre ]]> <x>"
+        table.cell(4, 1).text = "act & ]]>"
+        stream = io.BytesIO()
+        document.save(stream)
+
+        for engine in ("docx", "stream"):
+            out = io.StringIO()
+            Requirement(stream, engine=engine).write_XML(out)
+            root = etree.fromstring(out.getvalue().encode("utf-8"))
+            self.assertEqual(root.find("req_spec/requirement/title").text, "T & <t>")
+            out = io.StringIO()
+            DocXML(stream, engine=engine).write_xml(out)
+            root = etree.fromstring(out.getvalue().encode("utf-8"))
+            self.assertEqual(root.find("testsuite/testcase").get("name"), 'Test case "1" & <2>')
+            self.assertIn("<p>act &amp; ]]&gt;</p>", root.find("testsuite/testcase/steps/step/actions").text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     traceindex.py
+#
+"""Requirement to Test Case traceability index, kept in an SQLite database across the converted documents
+
+The index is filled from the intermediate model (testlink_tools.model) while the documents are converted:
+    documents      the indexed .docx files and their kind
+    requirements   docid, title, type and status of each requirement, with its specification
+    testcases      name, preconditions and Test Suite of each Test Case
+    steps          actions and expected results of each step
+    refs           the requirement IDs found in the text of each Test Case
+
+Indexing a document again replaces its rows only, the other documents are kept, so the index is updated
+one document at a time. The queries use indexed columns and answer in a few milliseconds:
+
+    with TraceIndex("trace.db") as index:
+        index.add_testsuites("procedure.docx", DocXML("procedure.docx", engine="stream").parse())
+        index.covering("XIFU-DRE-DMX-FW-R-0010")     # Test Cases referencing the requirement
+        index.coverage("XIFU-DRE-DMX-FW-R")          # {docid: number of Test Cases}, the expected_coverage
+"""
+import os
+import re
+import sqlite3
+import time
+
+# a requirement ID: upper case words separated by "-" (at least three) and a number, XIFU-DRE-DMX-FW-R-0010
+DEFAULT_REFERENCE = r"\b[A-Z][A-Z0-9]*(?:-[A-Z0-9]+){2,}-\d+\b"
+# waiting time for the lock of the database, the worker processes of a batch share it
+DEFAULT_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requirements (
+    document INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    docid TEXT NOT NULL,
+    title TEXT,
+    type INTEGER,
+    status TEXT,
+    spec_doc_id TEXT,
+    spec_title TEXT
+);
+CREATE INDEX IF NOT EXISTS requirements_docid ON requirements(docid);
+CREATE INDEX IF NOT EXISTS requirements_document ON requirements(document);
+CREATE TABLE IF NOT EXISTS testcases (
+    id INTEGER PRIMARY KEY,
+    document INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    testsuite TEXT,
+    name TEXT,
+    preconditions TEXT
+);
+CREATE INDEX IF NOT EXISTS testcases_document ON testcases(document);
+CREATE TABLE IF NOT EXISTS steps (
+    testcase INTEGER NOT NULL REFERENCES testcases(id) ON DELETE CASCADE,
+    number INTEGER,
+    actions TEXT,
+    expectedresults TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_testcase ON steps(testcase);
+CREATE TABLE IF NOT EXISTS refs (
+    testcase INTEGER NOT NULL REFERENCES testcases(id) ON DELETE CASCADE,
+    docid TEXT NOT NULL,
+    PRIMARY KEY (docid, testcase)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_testcase ON refs(testcase);
+"""
+
+
+def testcase_text(testcase):
+    """Return the name, preconditions, actions and expected results of a model.TestCase as one text
+    """
+    texts = [testcase.name, testcase.preconditions]
+    for step in testcase.steps:
+        texts.append(step.actions)
+        texts.append(step.expectedresults)
+    return "\n".join(text for text in texts if text)
+
+
+class TraceIndex(object):
+    """Traceability index stored in the SQLite database *path* (":memory:" for a temporary one)
+    """
+
+    def __init__(self, path, reference=DEFAULT_REFERENCE, timeout=DEFAULT_TIMEOUT):
+        """Constructor, reference is the regular expression of the requirement IDs searched in the Test Cases
+        """
+        self.path = path
+        self.reference = re.compile(reference)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __replace_document(self, filename, kind):
+        """Remove the rows of a document and return the id of its new entry, in the current transaction
+        """
+        path = os.path.abspath(filename)
+        self.connection.execute("DELETE FROM documents WHERE path = ?", (path,))
+        return self.connection.execute("INSERT INTO documents (path, kind, indexed) VALUES (?, ?, ?)",
+                                       (path, kind, time.time())).lastrowid
+
+    def add_requirements(self, filename, specs):
+        """Index the requirements of a document, specs is the list of model.ReqSpec returned by Requirement.parse()
+        """
+        with self.connection:
+            document = self.__replace_document(filename, "requirements")
+            self.connection.executemany(
+                "INSERT INTO requirements (document, docid, title, type, status, spec_doc_id, spec_title) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(document, requirement.docid, requirement.title, requirement.type, requirement.status,
+                  spec.doc_id, spec.title) for spec in specs for requirement in spec.requirements])
+
+    def add_testsuites(self, filename, testsuites):
+        """Index the Test Cases of a document, testsuites is the list of model.TestSuite returned by DocXML.parse()
+        """
+        with self.connection:
+            document = self.__replace_document(filename, "testcases")
+            for testsuite in testsuites:
+                for testcase in testsuite.testcases:
+                    rowid = self.connection.execute(
+                        "INSERT INTO testcases (document, testsuite, name, preconditions) VALUES (?, ?, ?, ?)",
+                        (document, testsuite.name, testcase.name, testcase.preconditions)).lastrowid
+                    self.connection.executemany(
+                        "INSERT INTO steps (testcase, number, actions, expectedresults) VALUES (?, ?, ?, ?)",
+                        [(rowid, step.number, step.actions, step.expectedresults) for step in testcase.steps])
+                    docids = set(self.reference.findall(testcase_text(testcase)))
+                    self.connection.executemany("INSERT INTO refs (testcase, docid) VALUES (?, ?)",
+                                                [(rowid, docid) for docid in sorted(docids)])
+
+    def remove(self, filename):
+        """Remove a document from the index
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM documents WHERE path = ?", (os.path.abspath(filename),))
+
+    def documents(self):
+        """Return the (path, kind) of the indexed documents
+        """
+        return self.connection.execute("SELECT path, kind FROM documents ORDER BY path").fetchall()
+
+    def requirement(self, docid):
+        """Return the dict of a requirement (title, type, status, specification, document), None if not indexed
+        """
+        row = self.connection.execute(
+            "SELECT r.docid, r.title, r.type, r.status, r.spec_doc_id, r.spec_title, d.path "
+            "FROM requirements r JOIN documents d ON d.id = r.document WHERE r.docid = ? LIMIT 1", (docid,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("docid", "title", "type", "status", "spec_doc_id", "spec_title", "document"), row))
+
+    def covering(self, docid):
+        """Return the (document, Test Suite, Test Case name) of the Test Cases referencing the requirement *docid*
+        """
+        return self.connection.execute(
+            "SELECT d.path, t.testsuite, t.name FROM refs f JOIN testcases t ON t.id = f.testcase "
+            "JOIN documents d ON d.id = t.document WHERE f.docid = ? ORDER BY d.path, t.id", (docid,)).fetchall()
+
+    def coverage(self, prefix=""):
+        """Return {docid: number of Test Cases referencing it} for the referenced requirement IDs starting with *prefix*
+        """
+        return dict(self.connection.execute(
+            "SELECT docid, COUNT(*) FROM refs WHERE docid >= ? AND substr(docid, 1, ?) = ? GROUP BY docid",
+            (prefix, len(prefix), prefix)))
+
+    def uncovered(self, prefix=""):
+        """Return the docids of the indexed requirements starting with *prefix* that no Test Case references
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT r.docid FROM requirements r WHERE r.docid >= ? AND substr(r.docid, 1, ?) = ? "
+            "AND NOT EXISTS (SELECT 1 FROM refs f WHERE f.docid = r.docid) ORDER BY r.docid",
+            (prefix, len(prefix), prefix))]
+
+    def dangling(self):
+        """Return the (docid, Test Case name) of the references to requirement IDs which are not indexed
+        """
+        return self.connection.execute(
+            "SELECT f.docid, t.name FROM refs f JOIN testcases t ON t.id = f.testcase "
+            "WHERE NOT EXISTS (SELECT 1 FROM requirements r WHERE r.docid = f.docid) ORDER BY f.docid, t.id").fetchall()
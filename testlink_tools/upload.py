@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     upload.py
+#
+"""Upload of the generated XML to TestLink through its XML-RPC API
+
+    with Uploader(url, devkey, "PROJECT", jobs=4) as uploader:
+        report = uploader.upload_xml(DocXML(filename).docx_to_xml(), checkpoint="procedure.upload.jsonl")
+
+1. The XML text (a requirement-specification or a testsuite document) is read into operations:
+   one per req_spec, requirement, Test Suite and Test Case, each one knowing the operation creating its parent
+2. The operations are sent level by level (the parents, then their children) by a pool of *jobs* threads,
+   each thread keeps its own HTTP/1.1 connection alive, from one document to the next
+3. A call failing with a network error or an HTTP 429/5xx status is sent again after an exponential backoff,
+   an error answered by TestLink is not retried, the children of a failed operation are not sent
+4. The id of each created object is appended to the checkpoint file, an interrupted upload started again
+   with the same checkpoint only sends the operations missing
+
+A call is sent again when the connection drops, even if TestLink already handled it: a Test Case may then
+get a new version (actiononduplicatedname is "create_new_version").
+
+The first level Test Suites already in the project are reused instead of being created again.
+The requirements are created with tl.createRequirementSpec and tl.createRequirement (TestLink 1.9.20 API).
+"""
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import xmlrpc.client
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import etree
+
+DEFAULT_JOBS = 4
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 60.0
+# HTTP status worth a retry
+RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+
+
+class UploadError(Exception):
+    """Error answered by TestLink, or failure of the transport after the retries"""
+
+
+class _Operation(object):
+    """One XML-RPC call creating an object, *parent* is the key of the operation creating its parent"""
+    __slots__ = ("key", "parent", "method", "params", "parent_field")
+
+    def __init__(self, key, parent, method, params, parent_field=None):
+        self.key = key
+        self.parent = parent
+        self.method = method
+        self.params = params
+        self.parent_field = parent_field
+
+
+def _text(element, tag):
+    """Stripped text of the child *tag*, CDATA included"""
+    return (element.findtext(tag) or "").strip()
+
+
+def _int(text, default=0):
+    try:
+        return int(text)
+    except ValueError:
+        return default
+
+
+def requirement_operations(root):
+    """Generate the operations of a <requirement-specification> document
+
+    Raise ValueError when requirements are outside a <req_spec>, TestLink creates a requirement in a specification.
+    """
+    orphans = sum(1 for _ in root.iterchildren("requirement"))
+    if orphans:
+        raise ValueError("{0} requirement(s) outside a <req_spec>".format(orphans))
+    for spec in root.iterchildren("req_spec"):
+        spec_key = "req_spec:" + spec.get("doc_id", "")
+        yield _Operation(spec_key, None, "tl.createRequirementSpec",
+                         {"docid": spec.get("doc_id", ""), "title": spec.get("title", ""),
+                          "scope": _text(spec, "scope"), "type": _text(spec, "type"),
+                          "order": _int(_text(spec, "node_order"))})
+        for requirement in spec.iterchildren("requirement"):
+            docid = _text(requirement, "docid")
+            yield _Operation("requirement:" + docid, spec_key, "tl.createRequirement",
+                             {"docid": docid, "title": _text(requirement, "title"),
+                              "scope": _text(requirement, "description"), "status": _text(requirement, "status"),
+                              "type": _text(requirement, "type"),
+                              "expected_coverage": _int(_text(requirement, "expected_coverage"))},
+                             parent_field="reqspecid")
+
+
+def testcase_operations(root, author):
+    """Generate the operations of a <testsuite> document, the unnamed root Test Suite is not created
+
+    The keys hold the path of the Test Suite, the names from the first level joined by "/": two nested
+    Test Suites of the same name (a "Nominal" in each chapter) are different objects.
+    """
+    # Test Suite element: its path, None for the unnamed root
+    paths = {}
+    for suite in root.iter("testsuite"):
+        if suite is root and not suite.get("name"):
+            paths[suite] = None
+            continue
+        parent_path = paths.get(suite.getparent())
+        path = suite.get("name", "") if parent_path is None else parent_path + "/" + suite.get("name", "")
+        paths[suite] = path
+        parent_key = "testsuite:" + parent_path if parent_path is not None else None
+        suite_key = "testsuite:" + path
+        yield _Operation(suite_key, parent_key, "tl.createTestSuite",
+                         {"testsuitename": suite.get("name", ""), "details": _text(suite, "details"),
+                          "order": _int(_text(suite, "node_order"))}, parent_field="parentid")
+        for testcase in suite.iterchildren("testcase"):
+            steps = [{"step_number": _int(_text(step, "step_number")), "actions": _text(step, "actions"),
+                      "expected_results": _text(step, "expectedresults"), "execution_type": 1}
+                     for step in testcase.iter("step")]
+            name = testcase.get("name", "")
+            yield _Operation("testcase:" + path + "/" + name, suite_key, "tl.createTestCase",
+                             {"testcasename": name, "summary": "", "preconditions": _text(testcase, "preconditions"),
+                              "steps": steps, "order": _int(_text(testcase, "node_order")), "authorlogin": author,
+                              "checkduplicatedname": 1, "actiononduplicatedname": "create_new_version"},
+                             parent_field="testsuiteid")
+
+
+class Checkpoint(object):
+    """Ids of the objects already created, appended to a JSON lines file"""
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.ids = {}
+        self.lock = threading.Lock()
+        self.file = None
+        if filename is None:
+            return
+        complete = True
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as f:
+                for line in f:
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # last line cut by an interruption
+                        continue
+                    self.ids[entry["key"]] = entry["id"]
+        self.file = open(filename, "a", encoding="utf-8")
+        if not complete:
+            self.file.write("\n")
+
+    def get(self, key):
+        return self.ids.get(key)
+
+    def put(self, key, identifier):
+        with self.lock:
+            self.ids[key] = identifier
+            if self.file is not None:
+                self.file.write(json.dumps({"key": key, "id": identifier}) + "\n")
+                self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class _Transport(xmlrpc.client.Transport):
+    """Transport with a socket timeout, its HTTP/1.1 connection is kept alive between the calls"""
+
+    def __init__(self, timeout):
+        xmlrpc.client.Transport.__init__(self)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = xmlrpc.client.Transport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class _SafeTransport(xmlrpc.client.SafeTransport):
+    """HTTPS variant of _Transport"""
+
+    def __init__(self, timeout):
+        xmlrpc.client.SafeTransport.__init__(self)
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        connection = xmlrpc.client.SafeTransport.make_connection(self, host)
+        connection.timeout = self.timeout
+        return connection
+
+
+class Uploader(object):
+    """Send the generated XML to a TestLink server
+    """
+
+    def __init__(self, url, devkey, project, jobs=DEFAULT_JOBS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 timeout=DEFAULT_TIMEOUT, author="admin"):
+        """Constructor
+
+        url is the XML-RPC end point (http://host/testlink/lib/api/xmlrpc/v1/xmlrpc.php), devkey the API key
+        of the user, project the name of the TestLink test project, jobs the number of concurrent requests.
+        """
+        if jobs < 1:
+            raise ValueError("jobs must be at least 1")
+        self.url = url
+        self.devkey = devkey
+        self.project = project
+        self.jobs = jobs
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.author = author
+        self.executor = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.project_id = None
+        self.requests = 0
+        self.retried = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        """Stop the threads, their connections are closed"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __proxy(self):
+        """ServerProxy of the current thread, created once per thread"""
+        proxy = getattr(self.local, "proxy", None)
+        if proxy is None:
+            transport = _SafeTransport(self.timeout) if self.url.startswith("https") else _Transport(self.timeout)
+            proxy = xmlrpc.client.ServerProxy(self.url, transport=transport, allow_none=True)
+            self.local.proxy = proxy
+        return proxy
+
+    def call(self, method, params):
+        """Call the API *method* with the devKey and *params*, retry the transient failures, return the answer"""
+        args = dict(params, devKey=self.devkey)
+        attempt = 0
+        while True:
+            with self.lock:
+                self.requests += 1
+            try:
+                answer = getattr(self.__proxy(), method)(args)
+            except xmlrpc.client.Fault as error:
+                raise UploadError("{0}: fault {1}: {2}".format(method, error.faultCode, error.faultString))
+            except xmlrpc.client.ProtocolError as error:
+                if error.errcode not in RETRY_STATUS or attempt >= self.retries:
+                    raise UploadError("{0}: HTTP {1} {2}".format(method, error.errcode, error.errmsg))
+            except (OSError, http.client.HTTPException) as error:
+                # drop the connection, a new one is opened by the next call
+                self.local.proxy = None
+                if attempt >= self.retries:
+                    raise UploadError("{0}: {1}".format(method, error))
+            else:
+                return self.__check(method, answer)
+            attempt += 1
+            with self.lock:
+                self.retried += 1
+            time.sleep(self.backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    @staticmethod
+    def __check(method, answer):
+        """Raise UploadError if TestLink answered an error list"""
+        if isinstance(answer, list) and answer and isinstance(answer[0], dict) and "code" in answer[0]:
+            raise UploadError("{0}: error {1}: {2}".format(method, answer[0]["code"], answer[0].get("message", "")))
+        return answer
+
+    def __created_id(self, method, answer):
+        """Id of the object in the answer of a create call"""
+        result = answer[0] if isinstance(answer, list) and answer else answer
+        if not isinstance(result, dict) or "id" not in result:
+            raise UploadError("{0}: unexpected answer {1!r}".format(method, answer))
+        return str(result["id"])
+
+    def connect(self):
+        """Check the devKey and find the id of the test project"""
+        if self.project_id is None:
+            answer = self.call("tl.getTestProjectByName", {"testprojectname": self.project})
+            if not isinstance(answer, dict) or "id" not in answer:
+                raise UploadError("tl.getTestProjectByName: unexpected answer {0!r}".format(answer))
+            self.project_id = str(answer["id"])
+        return self.project_id
+
+    def operations(self, xml):
+        """Return the operations of the XML text of docx_to_XML or docx_to_xml"""
+        if isinstance(xml, str):
+            xml = xml.encode("utf-8")
+        root = etree.fromstring(xml, etree.XMLParser(huge_tree=True))
+        if root.tag == "requirement-specification":
+            return list(requirement_operations(root))
+        if root.tag == "testsuite":
+            return list(testcase_operations(root, self.author))
+        raise ValueError("unknown TestLink XML document <{0}>".format(root.tag))
+
+    def __send(self, operation, checkpoint, report):
+        """Send one operation whose parent is created, record its id"""
+        params = dict(operation.params, testprojectid=self.project_id)
+        if operation.parent is not None:
+            params[operation.parent_field] = checkpoint.get(operation.parent)
+        try:
+            identifier = self.__created_id(operation.method, self.call(operation.method, params))
+        except UploadError as error:
+            with self.lock:
+                report["failed"][operation.key] = str(error)
+            return
+        checkpoint.put(operation.key, identifier)
+        with self.lock:
+            report["created"] += 1
+
+    def upload_xml(self, xml, checkpoint=None):
+        """Create the requirements or the Test Suites and Test Cases of the XML text, return the report
+
+        checkpoint is the file recording the objects created, one per document.
+        The report holds the number of created and skipped (already in the checkpoint or in TestLink) objects,
+        the errors of the failed operations by key, the number of requests, retries and the seconds.
+        """
+        start = time.perf_counter()
+        report = OrderedDict((("created", 0), ("skipped", 0), ("failed", OrderedDict()),
+                              ("requests", 0), ("retries", 0), ("seconds", 0.0)))
+        requests, retried = self.requests, self.retried
+        operations = self.operations(xml)
+        checkpoint = Checkpoint(checkpoint)
+        try:
+            self.connect()
+            if any(operation.method == "tl.createTestSuite" and operation.parent is None for operation in operations):
+                answer = self.call("tl.getFirstLevelTestSuitesForTestProject", {"testprojectid": self.project_id})
+                for suite in answer if isinstance(answer, list) else []:
+                    key = "testsuite:" + suite.get("name", "")
+                    if checkpoint.get(key) is None:
+                        checkpoint.put(key, str(suite["id"]))
+
+            # level by level: the children are sent once all the operations of the previous level are done
+            level = [operation for operation in operations if operation.parent is None]
+            children = {}
+            for operation in operations:
+                if operation.parent is not None:
+                    children.setdefault(operation.parent, []).append(operation)
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.jobs)
+            while level:
+                todo = []
+                for operation in level:
+                    if checkpoint.get(operation.key) is not None:
+                        report["skipped"] += 1
+                    else:
+                        todo.append(operation)
+                list(self.executor.map(lambda operation: self.__send(operation, checkpoint, report), todo))
+                next_level = []
+                for operation in level:
+                    if checkpoint.get(operation.key) is None:
+                        # the children of a failed operation are not sent
+                        for child in self.__descendants(operation.key, children):
+                            report["failed"][child.key] = "parent {0} not created".format(operation.key)
+                    else:
+                        next_level.extend(children.get(operation.key, []))
+                level = next_level
+        finally:
+            checkpoint.close()
+        report["requests"] = self.requests - requests
+        report["retries"] = self.retried - retried
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def __descendants(key, children):
+        """All the operations below the operation *key*"""
+        stack = list(children.get(key, []))
+        while stack:
+            operation = stack.pop()
+            yield operation
+            stack.extend(children.get(operation.key, []))
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     validate.py
+#
+"""Single pass validator of the TestLink import XML, before it is sent to the server
+
+    report = validate("procedure.xml")      # a filename or a binary file object
+    report["valid"], report["issues"]       # [{"line": 12, "section": "Test Suite 1", "message": "..."}]
+
+The XML is read with iterparse and each element is dropped once checked, the memory does not depend on the
+size of the file but for the keys of the duplicate checks. The checks are:
+    well-formedness (the scan stops at the first syntax error)
+    the element structure TestLink expects, the attributes and the integer fields of each element
+    duplicate requirement docids and specification doc_ids in the file
+    duplicate Test Case names in a Test Suite (TestLink matches the Test Cases of a suite by name)
+Each issue gives the line of the element and the section it belongs to: the title of the requirement
+specification or the name of the Test Suite.
+"""
+from lxml import etree
+
+KIND_REQUIREMENTS = "requirements"
+KIND_TESTCASES = "testcases"
+# issues kept in the report, the following ones are only counted
+DEFAULT_MAX_ISSUES = 100
+
+REQ_FIELDS = ("docid", "title", "version", "revision", "node_order", "description", "status", "type",
+              "expected_coverage")
+# children allowed in each element, the other elements are leaves holding text
+_CHILDREN = {
+    "requirement-specification": ("req_spec", "requirement"),
+    "req_spec": ("version", "type", "node_order", "total_req", "scope", "requirement"),
+    "requirement": REQ_FIELDS,
+    "testsuite": ("node_order", "details", "testsuite", "testcase"),
+    "testcase": ("node_order", "preconditions", "steps"),
+    "steps": ("step",),
+    "step": ("step_number", "actions", "expectedresults"),
+}
+_REQUIRED_CHILDREN = {"requirement": ("docid", "title"), "step": ("step_number",)}
+_REQUIRED_ATTRIBUTES = {"req_spec": ("title", "doc_id"), "testsuite": ("name",), "testcase": ("name",)}
+_INTEGER_FIELDS = frozenset(("version", "revision", "node_order", "total_req", "expected_coverage", "step_number"))
+# requirement status: Draft, Review, Rework, Finish, Implemented, Valid, Non testable, Obsolete
+_REQ_STATUS = frozenset("DRWFIVNO")
+_REQ_TYPES = frozenset(range(1, 8))
+_SPEC_TYPES = frozenset(range(1, 4))
+
+
+class _Scan(object):
+    """State of the validation of one file
+    """
+
+    def __init__(self, max_issues):
+        self.max_issues = max_issues
+        self.report = {"kind": None, "specifications": 0, "requirements": 0, "testsuites": 0, "testcases": 0,
+                       "steps": 0, "issue_count": 0, "issues": [], "valid": True}
+        # (tag, section, names of the children seen, Test Case names of a Test Suite) of the open elements
+        self.stack = []
+        self.docids = {}
+        self.doc_ids = {}
+
+    def issue(self, line, message, section=None):
+        """Record an issue found at *line* of the current (or given) section, line is a number or an element
+        """
+        if not isinstance(line, int):
+            line = line.sourceline
+        report = self.report
+        report["valid"] = False
+        report["issue_count"] += 1
+        if len(report["issues"]) < self.max_issues:
+            report["issues"].append({"line": line, "section": section if section is not None else self.section(),
+                                     "message": message})
+
+    def section(self):
+        """Title of the innermost requirement specification or Test Suite being read
+        """
+        return self.stack[-1][1] if self.stack else None
+
+    def start(self, elem):
+        """Check an element from its tag and attributes, before its children are read
+        """
+        tag = elem.tag
+        parent = self.stack[-1] if self.stack else None
+        if parent is not None and tag not in _CHILDREN and tag in _CHILDREN.get(parent[0], ()):
+            # a text field where it is expected, the most common case
+            parent[2].add(tag)
+            self.stack.append((tag, parent[1], None, None))
+            return
+        if parent is None:
+            if tag == "requirement-specification":
+                self.report["kind"] = KIND_REQUIREMENTS
+            elif tag == "testsuite":
+                self.report["kind"] = KIND_TESTCASES
+            else:
+                self.issue(elem, "unexpected root element <{0}>".format(tag))
+        elif parent[0] not in _CHILDREN:
+            self.issue(elem, "unexpected element <{0}> in the text field <{1}>".format(tag, parent[0]))
+        elif tag not in _CHILDREN[parent[0]]:
+            self.issue(elem, "unexpected element <{0}> in <{1}>".format(tag, parent[0]))
+        if parent is not None and parent[2] is not None:
+            parent[2].add(tag)
+        # the root test suite of a test procedure has an empty name
+        for name in _REQUIRED_ATTRIBUTES.get(tag, ()):
+            if not elem.get(name) and parent is not None:
+                self.issue(elem, "<{0}> without {1}".format(tag, name))
+        section = parent[1] if parent is not None else None
+        names = None
+        if tag == "req_spec":
+            section = elem.get("title")
+            self.report["specifications"] += 1
+            self.duplicate(self.doc_ids, elem.get("doc_id"), "specification doc_id", elem.sourceline, section)
+        elif tag == "testsuite":
+            if parent is not None:
+                section = elem.get("name")
+                self.report["testsuites"] += 1
+            names = {}
+        elif tag == "testcase":
+            self.report["testcases"] += 1
+            if parent is not None and parent[3] is not None:
+                self.duplicate(parent[3], elem.get("name"), "Test Case name", elem.sourceline, section)
+        elif tag == "requirement":
+            self.report["requirements"] += 1
+        elif tag == "step":
+            self.report["steps"] += 1
+        self.stack.append((tag, section, set(), names))
+
+    def end(self, elem):
+        """Check the text and the children of an element once it is read, return True for the elements holding children
+        """
+        tag, _, children, _ = self.stack.pop()
+        for name in _REQUIRED_CHILDREN.get(tag, ()):
+            if name not in children:
+                self.issue(elem, "<{0}> without <{1}>".format(tag, name))
+        if tag in _CHILDREN or not self.stack:
+            return True
+        parent = self.stack[-1][0]
+        if parent == "requirement":
+            self.requirement_field(tag, (elem.text or "").strip(), elem)
+        elif tag in _INTEGER_FIELDS:
+            text = (elem.text or "").strip()
+            if text and not text.isdigit():
+                self.issue(elem, "<{0}> is not an integer: {1!r}".format(tag, text[:40]))
+        elif tag == "type" and parent == "req_spec":
+            text = (elem.text or "").strip()
+            if not text.isdigit() or int(text) not in _SPEC_TYPES:
+                self.issue(elem, "unknown specification type {0!r}".format(text[:40]))
+        return False
+
+    def requirement_field(self, tag, text, elem):
+        """Check a field of a requirement
+        """
+        if tag in _INTEGER_FIELDS:
+            if text and not text.isdigit():
+                self.issue(elem, "<{0}> is not an integer: {1!r}".format(tag, text[:40]))
+        elif tag == "docid":
+            if not text:
+                self.issue(elem, "requirement with an empty docid")
+            self.duplicate(self.docids, text, "requirement docid", elem)
+        elif tag == "status" and text not in _REQ_STATUS:
+            self.issue(elem, "unknown requirement status {0!r}".format(text[:40]))
+        elif tag == "type" and (not text.isdigit() or int(text) not in _REQ_TYPES):
+            self.issue(elem, "unknown requirement type {0!r}".format(text[:40]))
+
+    def duplicate(self, seen, key, what, line, section=None):
+        """Record *key* in *seen*, an issue if it is already there
+        """
+        if not key:
+            return
+        if not isinstance(line, int):
+            line = line.sourceline
+        first = seen.get(key)
+        if first is None:
+            seen[key] = line
+            return
+        self.issue(line, "duplicate {0} {1!r}, first at line {2}".format(what, key, first), section)
+
+
+def validate(source, max_issues=DEFAULT_MAX_ISSUES):
+    """Validate a TestLink import XML file, source is a filename or a binary file object
+
+    Return a dict with the kind of document, the number of each kind of entry, the issues (at most *max_issues*),
+    the issue count and whether the file is valid.
+    """
+    scan = _Scan(max_issues)
+    try:
+        for event, elem in etree.iterparse(source, events=("start", "end"), huge_tree=True,
+                                           remove_comments=True, remove_pis=True):
+            if event == "start":
+                scan.start(elem)
+                continue
+            if scan.end(elem):
+                # drop this element, its text fields and the previous siblings, their content is checked
+                elem.clear()
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+    except etree.XMLSyntaxError as error:
+        scan.issue(error.position[0], "malformed XML: {0}".format(error.msg))
+    return scan.report
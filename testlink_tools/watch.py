@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     watch.py
+#
+"""Watch mode: convert the .docx documents of a directory again each time they are saved
+
+    python -m testlink_tools watch [options] DIRECTORY
+
+1. Every document of the directory (searched recursively) is converted once at start
+2. The directory is watched with inotify on Linux, by polling the modification time and size
+   of the documents elsewhere (or with --polling)
+3. The events are debounced: a save of Word (temporary file, rename, lock file) or a copy in progress
+   is converted once, when the directory has been quiet for --debounce seconds
+4. Only the documents whose modification time or size changed are converted again
+
+The process stays warm between two saves: the converters are imported once, and each document
+keeps an in-memory section cache, so only its edited Heading 2 sections are converted again.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from testlink_tools.cache import DEFAULT_MAX_BYTES, MemorySectionCache
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_INTERVAL = 1.0
+# files written by Word and LibreOffice next to an open document
+LOCK_PREFIXES = ("~$", ".~lock.")
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def is_document(name):
+    """True for a .docx file which is not a lock file
+    """
+    name = os.path.basename(name)
+    return name.lower().endswith(".docx") and not name.startswith(LOCK_PREFIXES)
+
+
+def scan(directory):
+    """Return {path: (modification time, size)} of the documents of *directory*
+    """
+    signatures = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not is_document(name):
+                continue
+            path = os.path.normpath(os.path.join(root, name))
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+class PollingBackend(object):
+    """Detect the changes by comparing the signatures of the documents every *interval* seconds
+    """
+    name = "polling"
+
+    def __init__(self, directory, interval=DEFAULT_INTERVAL):
+        """Constructor
+        """
+        self.directory = directory
+        self.interval = interval
+        self.signatures = scan(directory)
+
+    def wait(self, timeout):
+        """Wait up to *timeout* seconds, return True if a document changed since the previous call
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            signatures = scan(self.directory)
+            if signatures != self.signatures:
+                self.signatures = signatures
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyBackend(object):
+    """Detect the changes with the inotify API of Linux, through ctypes
+    """
+    name = "inotify"
+
+    def __init__(self, directory):
+        """Constructor, raise OSError if inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches = {}
+        for root, _, _ in os.walk(directory):
+            self.__add_watch(root)
+
+    def __add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        self.watches[wd] = path
+
+    def wait(self, timeout):
+        """Wait up to *timeout* seconds, return True if a document (or a directory) was written, moved or removed
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        changed = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_ISDIR:
+                path = os.path.join(self.watches.get(wd, ""), name)
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    try:
+                        self.__add_watch(path)
+                    except OSError:
+                        pass
+                changed = True
+            elif is_document(name):
+                changed = True
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def make_backend(directory, polling=False, interval=DEFAULT_INTERVAL):
+    """Return the inotify backend, or the polling one if requested or if inotify is not available
+    """
+    if not polling:
+        try:
+            return InotifyBackend(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(directory, interval)
+
+
+class Watcher(object):
+    """Convert the documents of a directory each time they change, with warm per-document section caches
+    """
+
+    def __init__(self, directory, options, output_dir=None, debounce=DEFAULT_DEBOUNCE, backend=None):
+        """Constructor
+
+        options is the dict of the conversion options of testlink_tools.cli.convert_file,
+        backend a PollingBackend or an InotifyBackend (default: make_backend(directory)).
+        """
+        self.directory = directory
+        self.options = options
+        self.output_dir = output_dir
+        self.debounce = debounce
+        self.backend = backend if backend is not None else make_backend(directory)
+        # signatures of the documents when they were last converted
+        self.signatures = {}
+        self.caches = {}
+
+    def __cache(self, filename):
+        """In-memory section cache of a document, None when the options use the disk cache, a delta export or an index
+        """
+        if (self.options.get("cache") or self.options.get("delta") or self.options.get("index")
+                or self.options.get("section_jobs", 1) > 1):
+            return None
+        cache = self.caches.get(filename)
+        if cache is None:
+            cache = self.caches[filename] = MemorySectionCache(self.options.get("cache_size", DEFAULT_MAX_BYTES))
+        return cache
+
+    def update(self):
+        """Convert the documents added or changed since the previous update, return their results
+        """
+        # imported here, testlink_tools.cli imports this module for its watch command
+        from testlink_tools.cli import convert_file, output_names
+        signatures = scan(self.directory)
+        for filename in set(self.signatures) - set(signatures):
+            del self.signatures[filename]
+            self.caches.pop(filename, None)
+        filenames = sorted(signatures)
+        outputs = dict(zip(filenames, output_names(filenames, self.output_dir)))
+        results = []
+        for filename in filenames:
+            if self.signatures.get(filename) == signatures[filename]:
+                continue
+            self.signatures[filename] = signatures[filename]
+            results.append(convert_file((filename, outputs[filename], self.options), self.__cache(filename)))
+        return results
+
+    def wait(self, timeout=None):
+        """Wait for a change, then until the directory has been quiet for the debounce delay
+
+        Return False if nothing changed within *timeout* seconds (None: wait forever).
+        """
+        if not self.backend.wait(timeout if timeout is not None else 3600.0):
+            return False
+        while self.backend.wait(self.debounce):
+            pass
+        return True
+
+    def run(self, stream=None, stop=None):
+        """Convert every document, then the changed ones after each save until interrupted (or stop() is true)
+        """
+        from testlink_tools.cli import print_summary
+        if stream is None:
+            stream = sys.stdout
+        if self.output_dir is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        results = self.update()
+        if results:
+            print_summary(results, time.perf_counter() - start, stream)
+        stream.write("watching {0} ({1}), Ctrl+C to stop\n".format(self.directory, self.backend.name))
+        stream.flush()
+        try:
+            while stop is None or not stop():
+                if not self.wait(DEFAULT_INTERVAL):
+                    continue
+                start = time.perf_counter()
+                results = self.update()
+                if results:
+                    print_summary(results, time.perf_counter() - start, stream)
+                    stream.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.backend.close()
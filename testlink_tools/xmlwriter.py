@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#     Copyright (c) IRAP Toulouse
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#     xmlwriter.py
+#
+"""Incremental writer of the TestLink XML text
+
+The converters write each piece of XML as soon as it is produced, either straight to a file
+handle or to an internal buffer which a generator drains after each block of the document.
+Nothing is concatenated to a growing string, so the memory does not depend on the size of the output.
+
+The TestLink layout (indentation, spaces, line breaks) is written by the converters themselves,
+the writer only adds the escaping of text, attributes and CDATA sections.
+"""
+
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def escape(text):
+    """Escape &, < and > in element text
+    """
+    return str(text).translate(_TEXT_ESCAPES)
+
+
+def quoteattr(text):
+    """Escape &, <, > and double quotes in an attribute value (written between double quotes)
+    """
+    return str(text).translate(_ATTR_ESCAPES)
+
+
+def cdata(text):
+    """Wrap text in a CDATA section, a "]]>" inside the text is split over two sections
+    """
+    return "<![CDATA[{0}]]>".format(str(text).replace("]]>", "]]]]><![CDATA[>"))
+
+
+class XMLWriter(object):
+    """Write XML text to a file handle, or keep it in a buffer until drain() when there is no file handle
+    """
+
+    def __init__(self, out=None):
+        """Constructor
+        """
+        self.out = out
+        self.chunks = []
+        self.captures = []
+        self.bytes_written = 0
+
+    def write(self, text):
+        """Write raw XML text
+        """
+        # size in UTF-8, the ASCII text (the markup, most of the content) is not encoded to be counted
+        self.bytes_written += len(text) if text.isascii() else len(text.encode("utf-8"))
+        for capture in self.captures:
+            capture.append(text)
+        if self.out is None:
+            self.chunks.append(text)
+        else:
+            self.out.write(text)
+
+    def element(self, tag, text, indent="", cdata_text=False):
+        """Write <tag>text</tag>, text is escaped or wrapped in a CDATA section
+        """
+        self.write("{0}<{1}>{2}</{1}>".format(indent, tag, cdata(text) if cdata_text else escape(text)))
+
+    def drain(self):
+        """Return and forget the text buffered since the last call
+        """
+        text = "".join(self.chunks)
+        self.chunks = []
+        return text
+
+    def begin_capture(self):
+        """Start recording the text written, until end_capture()
+        """
+        self.captures.append([])
+
+    def end_capture(self):
+        """Stop the last recording and return the text written since begin_capture()
+        """
+        return "".join(self.captures.pop())